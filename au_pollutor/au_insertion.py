@@ -1,9 +1,9 @@
 import pandas as pd
 import numpy as np
-import random as rd
-from faker import Faker
-fake = Faker()
-from shared_functions import add_primary_key_values
+from shared_functions import (
+    add_primary_key_values,
+    generate_uuid4_strings,
+    assign_foreign_key)
 import logging
 
 logging.basicConfig(
@@ -14,13 +14,19 @@ logging.basicConfig(
 def randomly_select_rows(
     dataframe: pd.DataFrame,
     augmentation_rate: float,
-    replace: bool = False
+    replace: bool = False,
+    rng: np.random.Generator = None
     ):
     """
+        Returns a random selection of rows of the input DataFrame,
+        of size augmentation_rate times its number of rows, drawn
+        with the generator rng
     """
+    if rng is None:
+        rng = np.random.default_rng()
     n_rows = len(dataframe) 
     n_to_select = int(n_rows * augmentation_rate)
-    indices_to_select = np.random.choice(
+    indices_to_select = rng.choice(
         dataframe.index,
         n_to_select, replace=replace
     )
@@ -32,7 +38,8 @@ def randomly_select_rows(
 
 def randomly_duplicate_rows(
     dataframe: pd.DataFrame,
-    augmentation_rate: float
+    augmentation_rate: float,
+    rng: np.random.Generator = None
     ):
     """
         Returns an augmented version of the input DataFrame after
@@ -42,7 +49,8 @@ def randomly_duplicate_rows(
     duplicated_rows = randomly_select_rows(
         dataframe = dataframe,
         augmentation_rate = augmentation_rate,
-        replace = True
+        replace = True,
+        rng = rng
     )
     dataframe_duplicated = pd.concat([dataframe, duplicated_rows])
     dataframe_duplicated.reset_index(drop=True, inplace=True)
@@ -68,11 +76,14 @@ class au_transformator():
         slot_rel: pd.DataFrame,
         appointment_slot_rel: pd.DataFrame,
         doctor_rel: pd.DataFrame,
-        doctor_historization_rel: pd.DataFrame
+        doctor_historization_rel: pd.DataFrame,
+        rng: np.random.Generator = None
         ):
         """
             Initialize the class with the DataFrames corresponding to the 
-            relations of the "clean" version of Perfect Pet database
+            relations of the "clean" version of Perfect Pet database.
+            Random draws are made with the generator rng (see class
+            RandomStreams), a new unseeded one is created if not specified.
         """
         logging.info("Instantiating object from class au_transformator")
 
@@ -99,6 +110,7 @@ class au_transformator():
         self.slot_au = []
         self.appointment_slot_au = []
         self.doctor_au = []
+        self.rng = rng if rng is not None else np.random.default_rng()
 
     #---------------------------------------------------------------- 
     def transform_microchip_code(self,
@@ -112,7 +124,8 @@ class au_transformator():
 
         microchip_code_au = randomly_duplicate_rows(
             dataframe = self.microchip_code_rel,
-            augmentation_rate = augmentation_rate
+            augmentation_rate = augmentation_rate,
+            rng = self.rng
         )
 
         microchip_code_au = add_primary_key_values(
@@ -137,7 +150,8 @@ class au_transformator():
 
         service_au = randomly_duplicate_rows(
             dataframe = self.service_rel,
-            augmentation_rate = augmentation_rate
+            augmentation_rate = augmentation_rate,
+            rng = self.rng
         )
 
         service_au = add_primary_key_values(
@@ -185,7 +199,8 @@ class au_transformator():
 
         duplicated_rows = randomly_select_rows(
             dataframe = animal_additional,
-            augmentation_rate = augmentation_rate
+            augmentation_rate = augmentation_rate,
+            rng = self.rng
         )
 
         animal_au = pd.concat([initial_animals, duplicated_rows])
@@ -241,7 +256,7 @@ class au_transformator():
             id_code: int
             ):
             possible_id_codes = id_code_groups.get(id_code, [])
-            return np.random.choice(possible_id_codes) if possible_id_codes else None
+            return self.rng.choice(possible_id_codes) if possible_id_codes else None
         
         microchip_au['id_code_au'] = microchip_au['id_code']
         microchip_au['id_code_au'] = microchip_au['id_code_au'].apply(get_random_id_mod)
@@ -313,7 +328,7 @@ class au_transformator():
             id_service: int
             ):
             possible_id_services = id_service_groups.get(id_service, [])
-            return np.random.choice(possible_id_services) if possible_id_services else None
+            return self.rng.choice(possible_id_services) if possible_id_services else None
         
         appointment_au['id_service_au'] = appointment_au['id_service']
         appointment_au['id_service_au'] = appointment_au['id_service_au'].apply(get_random_id_mod)
@@ -478,10 +493,11 @@ class au_transformator():
         if owner_au is None:
             owner_au = self.owner_au
 
-        appointment_au = appointment_au.merge(
-            owner_au[['id_animal_au', 'id_owner_au']],
-            on='id_animal_au',
-            how='left'
+        appointment_au = assign_foreign_key(
+            dataframe=appointment_au,
+            key_column='id_animal_au',
+            reference=owner_au,
+            fk_column='id_owner_au'
         )
 
         self.appointment_au = appointment_au
@@ -505,10 +521,11 @@ class au_transformator():
         if animal_au is None:
             animal_au = self.animal_au
 
-        animal_au = animal_au.merge(
-            microchip_au[['id_animal_au', 'id_microchip_au']],
-            on='id_animal_au',
-            how='left'
+        animal_au = assign_foreign_key(
+            dataframe=animal_au,
+            key_column='id_animal_au',
+            reference=microchip_au,
+            fk_column='id_microchip_au'
         )
 
         self.animal_au = animal_au
@@ -532,10 +549,11 @@ class au_transformator():
         if owner_au is None:
             owner_au = self.owner_au
 
-        animal_au = animal_au.merge(
-            owner_au[['id_animal_au', 'id_owner_au']],
-            on='id_animal_au',
-            how='left'
+        animal_au = assign_foreign_key(
+            dataframe=animal_au,
+            key_column='id_animal_au',
+            reference=owner_au,
+            fk_column='id_owner_au'
         )
         animal_au = animal_au.drop_duplicates()
 
@@ -573,15 +591,15 @@ class au_transformator():
 
             if len(match) > 0:
                 for id in animal_list:
-                    id_microchip = rd.choice(missing_owner[
+                    id_microchip = self.rng.choice(missing_owner[
                         missing_owner['id_animal_au'] == id
                     ]['id_microchip'].unique())
 
-                    id_owner = rd.choice(match[
+                    id_owner = self.rng.choice(match[
                         match['id_microchip'] == id_microchip
                     ]['id_owner'].unique())
 
-                    id_owner_au = rd.choice(
+                    id_owner_au = self.rng.choice(
                         owner_au[owner_au['id_owner'] == id_owner
                     ]['id_owner_au'].unique())
 
@@ -609,10 +627,11 @@ class au_transformator():
         if animal_au is None:
             animal_au = self.animal_au
 
-        microchip_au = microchip_au.merge(
-            animal_au[['id_animal_au', 'id_owner_au']],
-            on='id_animal_au',
-            how='left'
+        microchip_au = assign_foreign_key(
+            dataframe=microchip_au,
+            key_column='id_animal_au',
+            reference=animal_au,
+            fk_column='id_owner_au'
         )
 
         self.microchip_au = microchip_au
@@ -638,7 +657,7 @@ class au_transformator():
         )['id_appointment'].transform('min')
         
         mask = animal_au['id_appointment'] != animal_au['min_appt']
-        new_hashes = [fake.uuid4() for _ in range(mask.sum())]
+        new_hashes = generate_uuid4_strings(mask.sum(), self.rng)
         animal_au.loc[mask, 'hash_id'] = new_hashes
         animal_au = animal_au.drop(columns='min_appt')
         
@@ -0,0 +1,171 @@
+import pandas as pd
+import numpy as np
+import logging
+from shared_functions import count_pairs
+from au_pollutor.ground_truth import GroundTruthStore, GROUND_TRUTH_KEYS
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="- %(levelname)s - %(asctime)s - %(message)s"
+)
+
+
+def compute_contingency_counts(
+    predicted_labels,
+    true_labels
+    ):
+    """
+        Build the non-empty cells of the contingency table crossing the
+        predicted clusters and the true clusters, without enumerating
+        pairs of tuples. Labels are encoded with pd.factorize (hash
+        based, O(n)), so any hashable label type is accepted.
+        Returns a dictionnary containing the sizes of the non-empty
+        cells (cell_sizes), the predicted and true cluster of each
+        cell (cell_predicted, cell_true), and the sizes of the
+        predicted and true clusters (predicted_sizes, true_sizes).
+    """
+    predicted_labels = np.asarray(predicted_labels)
+    true_labels = np.asarray(true_labels)
+
+    if len(predicted_labels) != len(true_labels):
+        raise ValueError("predicted_labels and true_labels must be of "
+                         "the same size")
+    if pd.isna(predicted_labels).any() or pd.isna(true_labels).any():
+        raise ValueError("Cluster labels cannot contain missing values")
+
+    predicted_codes, predicted_uniques = pd.factorize(predicted_labels)
+    true_codes, true_uniques = pd.factorize(true_labels)
+    nb_true = len(true_uniques)
+
+    cell_codes, cell_uniques = pd.factorize(
+        predicted_codes.astype(np.int64) * nb_true + true_codes
+    )
+    cell_sizes = np.bincount(cell_codes, minlength=len(cell_uniques))
+
+    return {
+        'cell_sizes': cell_sizes,
+        'cell_predicted': cell_uniques // nb_true,
+        'cell_true': cell_uniques % nb_true,
+        'predicted_sizes': np.bincount(predicted_codes,
+                                       minlength=len(predicted_uniques)),
+        'true_sizes': np.bincount(true_codes, minlength=nb_true)
+    }
+
+
+def evaluate_deduplication(
+    predicted_labels,
+    true_labels
+    ) -> dict:
+    """
+        Score a deduplication result given as one cluster label per
+        tuple (predicted_labels) against the ground truth, given as the
+        identifier of the clean tuple of each tuple (true_labels).
+        Pairwise metrics are computed from contingency table counts:
+        - true positives: sum of C(n, 2) over the cells
+        - predicted pairs: sum of C(n, 2) over the predicted clusters
+        - true pairs: sum of C(n, 2) over the true clusters
+        Cluster metrics count the predicted clusters matching exactly
+        a true cluster (same set of tuples).
+        Runs in O(n) and never enumerates pairs of tuples.
+    """
+    counts = compute_contingency_counts(
+        predicted_labels=predicted_labels,
+        true_labels=true_labels
+    )
+
+    true_positives = count_pairs(counts['cell_sizes'])
+    predicted_pairs = count_pairs(counts['predicted_sizes'])
+    true_pairs = count_pairs(counts['true_sizes'])
+
+    def safe_ratio(numerator, denominator):
+        return numerator / denominator if denominator > 0 else 1.0
+
+    def f1(precision, recall):
+        if precision + recall == 0:
+            return 0.0
+        return 2 * precision * recall / (precision + recall)
+
+    pairwise_precision = safe_ratio(true_positives, predicted_pairs)
+    pairwise_recall = safe_ratio(true_positives, true_pairs)
+
+    # A cell is an exact match when it holds all the tuples of both
+    # its predicted cluster and its true cluster
+    cell_sizes = counts['cell_sizes']
+    exact_matches = int((
+        (cell_sizes == counts['predicted_sizes'][counts['cell_predicted']])
+        & (cell_sizes == counts['true_sizes'][counts['cell_true']])
+    ).sum())
+    nb_predicted_clusters = len(counts['predicted_sizes'])
+    nb_true_clusters = len(counts['true_sizes'])
+
+    cluster_precision = safe_ratio(exact_matches, nb_predicted_clusters)
+    cluster_recall = safe_ratio(exact_matches, nb_true_clusters)
+
+    return {
+        'nb_tuples': int(cell_sizes.sum()),
+        'true_positive_pairs': true_positives,
+        'false_positive_pairs': predicted_pairs - true_positives,
+        'false_negative_pairs': true_pairs - true_positives,
+        'pairwise_precision': pairwise_precision,
+        'pairwise_recall': pairwise_recall,
+        'pairwise_f1': f1(pairwise_precision, pairwise_recall),
+        'nb_predicted_clusters': nb_predicted_clusters,
+        'nb_true_clusters': nb_true_clusters,
+        'exact_cluster_matches': exact_matches,
+        'cluster_precision': cluster_precision,
+        'cluster_recall': cluster_recall,
+        'cluster_f1': f1(cluster_precision, cluster_recall)
+    }
+
+
+def evaluate_relation_deduplication(
+    relation: str,
+    relation_au: pd.DataFrame,
+    cluster_column: str,
+    ground_truth: GroundTruthStore = None
+    ) -> dict:
+    """
+        Score the deduplication of a relation suffering from artificial
+        unicity. relation_au is the DataFrame of the relation (e.g. the
+        content of animal_au.csv) to which the method being evaluated
+        added its cluster assignment in column cluster_column.
+        The ground truth is read from the GroundTruthStore when given,
+        or from the clean identifier column kept in relation_au by
+        au_transformator (e.g. 'id_animal_v1') otherwise.
+    """
+    logging.info(f"Evaluating deduplication of relation {relation} "
+                 f"using clusters in column {cluster_column}.")
+
+    if relation not in GROUND_TRUTH_KEYS:
+        raise KeyError(f"No ground truth identifiers defined for "
+                       f"relation {relation}")
+    au_column, clean_column = GROUND_TRUTH_KEYS[relation]
+
+    if ground_truth is not None:
+        required_columns = [au_column, cluster_column]
+    else:
+        required_columns = [clean_column, cluster_column]
+    if len(np.setdiff1d(required_columns, relation_au.columns)) > 0:
+        raise KeyError(f"Required columns {required_columns} not found "
+                       f"in DataFrame of relation {relation}")
+
+    if ground_truth is not None:
+        true_labels = ground_truth.clean_id(
+            relation, relation_au[au_column].to_numpy()
+        )
+        if (true_labels < 0).any():
+            raise ValueError(f"Some identifiers of column {au_column} are "
+                             f"not found in the ground truth store")
+    else:
+        true_labels = relation_au[clean_column].to_numpy()
+
+    results = evaluate_deduplication(
+        predicted_labels=relation_au[cluster_column].to_numpy(),
+        true_labels=true_labels
+    )
+
+    logging.info(f"Relation {relation}: pairwise precision "
+                 f"{results['pairwise_precision']:.4f}, recall "
+                 f"{results['pairwise_recall']:.4f}, F1 "
+                 f"{results['pairwise_f1']:.4f}.")
+    return results
@@ -0,0 +1,319 @@
+import os
+import json
+import pandas as pd
+import numpy as np
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="- %(levelname)s - %(asctime)s - %(message)s"
+)
+
+# Name of the identifier in the relations suffering from artificial
+# unicity (after finalization) and name of the identifier of the
+# corresponding tuple in the clean relation, for each relation
+GROUND_TRUTH_KEYS = {
+    'animal': ('id_animal', 'id_animal_v1'),
+    'microchip': ('id_microchip', 'id_microchip_v1'),
+    'owner': ('id_owner', 'id_owner_v1'),
+    'microchip_code': ('id_code', 'id_code_v1'),
+    'service': ('id_service', 'id_service_v1'),
+    'doctor': ('id_doctor', 'id_doctor_v1'),
+    'slot': ('id_slot', 'id_slot')
+}
+
+MANIFEST_FILE_NAME = 'manifest.json'
+
+
+def get_smallest_int_dtype(max_value: int):
+    """
+        Returns the smallest signed integer numpy dtype able to
+        store all values between -1 and max_value.
+    """
+    for dtype in (np.int8, np.int16, np.int32):
+        if max_value <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def build_ground_truth_mapping(
+    au_ids: np.ndarray,
+    clean_ids: np.ndarray
+    ):
+    """
+        Build the compact mapping arrays between the identifiers of a
+        relation suffering from artificial unicity (au_ids) and the
+        identifiers of the corresponding tuples in the clean relation
+        (clean_ids). Three arrays are returned in a dictionnary:
+        - au_to_clean: clean id of each au id, indexed by
+          (au id - au_offset), -1 when the au id does not exist
+        - cluster_au_ids: au ids sorted by clean id
+        - cluster_offsets: position of the first au id of each clean
+          id in cluster_au_ids, indexed by (clean id - clean_offset)
+        along with the offsets and sizes used to index them.
+    """
+    au_ids = np.asarray(au_ids, dtype=np.int64)
+    clean_ids = np.asarray(clean_ids, dtype=np.int64)
+
+    if len(au_ids) != len(clean_ids):
+        raise ValueError("au_ids and clean_ids must be of the same size")
+    if len(au_ids) == 0:
+        raise ValueError("Cannot build a ground truth mapping from "
+                         "empty identifiers")
+    if len(np.unique(au_ids)) != len(au_ids):
+        raise ValueError("The identifiers of the relation suffering from "
+                         "artificial unicity must be unique")
+
+    au_offset = int(au_ids.min())
+    clean_offset = int(clean_ids.min())
+    n_au = int(au_ids.max()) - au_offset + 1
+    n_clean = int(clean_ids.max()) - clean_offset + 1
+    dtype = get_smallest_int_dtype(max(int(au_ids.max()), int(clean_ids.max())))
+
+    au_to_clean = np.full(n_au, -1, dtype=dtype)
+    au_to_clean[au_ids - au_offset] = clean_ids
+
+    order = np.argsort(clean_ids, kind='stable')
+    cluster_au_ids = au_ids[order].astype(dtype)
+    counts = np.bincount(clean_ids - clean_offset, minlength=n_clean)
+    cluster_offsets = np.zeros(n_clean + 1, dtype=np.int64)
+    np.cumsum(counts, out=cluster_offsets[1:])
+
+    return {
+        'au_to_clean': au_to_clean,
+        'cluster_au_ids': cluster_au_ids,
+        'cluster_offsets': cluster_offsets,
+        'au_offset': au_offset,
+        'clean_offset': clean_offset,
+        'n_au': n_au,
+        'n_clean': n_clean
+    }
+
+
+def save_ground_truth_store(
+    directory: str,
+    au_relations: dict,
+    ground_truth_keys: dict = None
+    ):
+    """
+        Write the ground truth mapping arrays of the relations suffering
+        from artificial unicity (au_relations, a dictionnary mapping the
+        name of the relation to its finalized DataFrame) in directory.
+        Each array is saved in its own .npy file so that it can be
+        memory-mapped when loaded, and a json manifest describes the
+        offsets and sizes of the arrays of each relation.
+        Returns the content of the manifest.
+    """
+    logging.info(f"Saving the ground truth mapping arrays of relations "
+                 f"{list(au_relations.keys())} in {directory}.")
+
+    if ground_truth_keys is None:
+        ground_truth_keys = GROUND_TRUTH_KEYS
+
+    os.makedirs(directory, exist_ok=True)
+
+    manifest = {}
+    for relation, relation_au in au_relations.items():
+        if relation not in ground_truth_keys:
+            raise KeyError(f"No ground truth identifiers defined for "
+                           f"relation {relation}")
+        au_column, clean_column = ground_truth_keys[relation]
+        if len(np.setdiff1d([au_column, clean_column], relation_au.columns)) > 0:
+            raise KeyError(f"Required columns '{au_column}', '{clean_column}' "
+                           f"not found in DataFrame of relation {relation}")
+
+        mapping = build_ground_truth_mapping(
+            au_ids=relation_au[au_column].to_numpy(),
+            clean_ids=relation_au[clean_column].to_numpy()
+        )
+        for array_name in ('au_to_clean', 'cluster_au_ids', 'cluster_offsets'):
+            np.save(
+                os.path.join(directory, f"{relation}_{array_name}.npy"),
+                mapping[array_name]
+            )
+        manifest[relation] = {
+            'au_column': au_column,
+            'clean_column': clean_column,
+            'au_offset': mapping['au_offset'],
+            'clean_offset': mapping['clean_offset'],
+            'n_au': mapping['n_au'],
+            'n_clean': mapping['n_clean'],
+            'nb_tuples': int(len(relation_au))
+        }
+
+    with open(os.path.join(directory, MANIFEST_FILE_NAME), 'w') as f:
+        json.dump(manifest, f, indent=4)
+
+    logging.info(f"Ground truth mapping arrays saved for "
+                 f"{len(manifest)} relations.")
+    return manifest
+
+
+#================================================================
+class GroundTruthStore():
+    """
+        This class is used to load the ground truth mapping arrays
+        written by function save_ground_truth_store and to answer
+        queries on them: which clean tuple an au tuple corresponds to,
+        which au tuples represent the same real entity (cluster), and
+        whether two au tuples represent the same real entity.
+        All lookups are array indexing operations, so they cost O(1)
+        per identifier queried.
+    """
+    def __init__(self,
+        directory: str,
+        mmap_mode: str = 'r'
+        ):
+        """
+            Initialize the instance by loading the manifest and the
+            arrays located in directory. By default, the arrays are
+            memory-mapped (mmap_mode='r'); set mmap_mode to None to
+            load them fully in memory.
+        """
+        logging.info("Instantiating object from class GroundTruthStore")
+
+        manifest_path = os.path.join(directory, MANIFEST_FILE_NAME)
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(f"No ground truth manifest found in "
+                                    f"{directory}")
+        with open(manifest_path) as f:
+            self.manifest = json.load(f)
+
+        self.directory = directory
+        self.arrays = {}
+        for relation in self.manifest:
+            self.arrays[relation] = {
+                array_name: np.load(
+                    os.path.join(directory, f"{relation}_{array_name}.npy"),
+                    mmap_mode=mmap_mode
+                )
+                for array_name in ('au_to_clean', 'cluster_au_ids', 'cluster_offsets')
+            }
+
+    #----------------------------------------------------------------
+    @property
+    def relations(self):
+        """
+            Return the list of relations covered by the store
+        """
+        return list(self.manifest.keys())
+
+    #----------------------------------------------------------------
+    def _get_relation(self,
+        relation: str
+        ):
+        """
+            Return the manifest entry and the arrays of a relation
+        """
+        if relation not in self.manifest:
+            raise KeyError(f"Relation {relation} not found in the ground "
+                           f"truth store, available relations are: "
+                           f"{self.relations}")
+        return self.manifest[relation], self.arrays[relation]
+
+    #----------------------------------------------------------------
+    def clean_id(self,
+        relation: str,
+        au_ids
+        ):
+        """
+            Return the identifier(s) of the clean tuple(s) corresponding
+            to the au identifier(s) au_ids (scalar or array-like).
+            Returns -1 for au identifiers that do not exist.
+        """
+        meta, arrays = self._get_relation(relation)
+        au_ids = np.asarray(au_ids, dtype=np.int64)
+        positions = au_ids - meta['au_offset']
+        valid = (positions >= 0) & (positions < meta['n_au'])
+        clean_ids = np.where(
+            valid,
+            arrays['au_to_clean'][np.where(valid, positions, 0)],
+            -1
+        ).astype(np.int64)
+        if clean_ids.ndim == 0:
+            return int(clean_ids)
+        return clean_ids
+
+    #----------------------------------------------------------------
+    def same_entity(self,
+        relation: str,
+        au_ids_a,
+        au_ids_b
+        ):
+        """
+            Return True when the au tuples identified by au_ids_a and
+            au_ids_b represent the same real entity (i.e. correspond
+            to the same clean tuple). Accepts scalars or array-likes
+            of the same size.
+        """
+        clean_a = np.asarray(self.clean_id(relation, au_ids_a))
+        clean_b = np.asarray(self.clean_id(relation, au_ids_b))
+        same = (clean_a == clean_b) & (clean_a >= 0)
+        if same.ndim == 0:
+            return bool(same)
+        return same
+
+    #----------------------------------------------------------------
+    def cluster(self,
+        relation: str,
+        clean_id: int
+        ) -> np.ndarray:
+        """
+            Return the au identifiers of all tuples corresponding to
+            the clean tuple identified by clean_id (empty array if
+            the clean identifier is unknown).
+        """
+        meta, arrays = self._get_relation(relation)
+        position = int(clean_id) - meta['clean_offset']
+        if position < 0 or position >= meta['n_clean']:
+            return np.array([], dtype=arrays['cluster_au_ids'].dtype)
+        start = arrays['cluster_offsets'][position]
+        end = arrays['cluster_offsets'][position + 1]
+        return np.asarray(arrays['cluster_au_ids'][start:end])
+
+    #----------------------------------------------------------------
+    def cluster_of(self,
+        relation: str,
+        au_id: int
+        ) -> np.ndarray:
+        """
+            Return the au identifiers of all tuples representing the
+            same real entity as the au tuple identified by au_id
+            (including au_id itself).
+        """
+        clean_id = self.clean_id(relation, au_id)
+        if clean_id < 0:
+            meta, arrays = self._get_relation(relation)
+            return np.array([], dtype=arrays['cluster_au_ids'].dtype)
+        return self.cluster(relation, clean_id)
+
+    #----------------------------------------------------------------
+    def cluster_sizes(self,
+        relation: str
+        ) -> np.ndarray:
+        """
+            Return the number of au tuples associated to each clean
+            identifier, indexed by (clean id - clean_offset).
+        """
+        meta, arrays = self._get_relation(relation)
+        return np.diff(arrays['cluster_offsets'])
+
+    #----------------------------------------------------------------
+    def generate_mapping_df(self,
+        relation: str
+        ) -> pd.DataFrame:
+        """
+            Return the mapping of a relation as a DataFrame with two
+            columns: the au identifier and the clean identifier.
+        """
+        meta, arrays = self._get_relation(relation)
+        au_to_clean = np.asarray(arrays['au_to_clean'])
+        positions = np.flatnonzero(au_to_clean >= 0)
+        au_column = meta['au_column']
+        clean_column = meta['clean_column']
+        if au_column == clean_column:
+            clean_column = clean_column + '_v1'
+        return pd.DataFrame({
+            au_column: positions + meta['au_offset'],
+            clean_column: au_to_clean[positions].astype(np.int64)
+        })
@@ -0,0 +1,112 @@
+import sys
+import json
+import statistics
+import subprocess
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="- %(levelname)s - %(asctime)s - %(message)s"
+)
+
+logging.info(f"Setting values of input parameters.")
+# Set the import time budget of each module, in seconds, not counting the time
+# needed to import pandas and numpy (imported by almost every module, imported
+# first as the baseline). Measured values are around 0.005 to 0.04 second
+import_time_budgets = {
+    'random_streams': 0.1,
+    'shared_functions': 0.1,
+    'database_generator.profile_pool': 0.1,
+    'database_generator.animal': 0.1,
+    'database_generator.owner': 0.1,
+    'database_generator.doctor': 0.1,
+    'database_generator.slot': 0.1,
+    'database_generator.appointment': 0.1,
+    'database_generator.extension': 0.1,
+    'database_generator.sampling': 0.1,
+    'database_generator.multi_clinic': 0.1,
+    'au_pollutor.au_insertion': 0.1,
+    'au_pollutor.ground_truth': 0.1,
+    'data_pollutor.data_pollution_functions': 0.1,
+    'data_pollutor.pollution_plan': 0.1,
+    'data_pollutor.pollution_log': 0.1,
+    'data_pollutor.pollution_provenance': 0.1,
+    'data_pollutor.blocking_index': 0.1,
+    'embedded_db.embedded_schema': 0.1
+}
+baseline_modules = 'pandas, numpy'
+
+# Heavy dependencies which must only be imported when used (first call of
+# get_char_augmenter, get_faker and get_country_holidays). Importing one of
+# them fails the check
+lazy_dependencies = ['nlpaug', 'faker', 'holidays']
+
+# Each import is measured in a new process, nb_runs times (median kept).
+# Exceeding a budget is only reported, unless fail_on_time_budget is True
+nb_runs = 5
+fail_on_time_budget = False
+
+#----------------------------------------------------------------------------
+MEASURE_CODE = """
+import sys, json
+import {baseline_modules}
+sys.stderr.write('{marker}\\n')
+import {module}
+print(json.dumps([name for name in {lazy_dependencies} if name in sys.modules]))
+"""
+MEASURE_MARKER = '-- baseline imported'
+
+def measure_import(module: str) -> dict:
+    """
+        Returns the median import time of module over nb_runs new
+        processes, and the lazy dependencies it imports. The time is
+        measured with -X importtime, after the baseline modules are
+        imported: it is the sum of the self times of the modules
+        imported by module, which does not depend on the time taken
+        to start the interpreter and to import the baseline modules.
+    """
+    import_times = []
+    for _ in range(nb_runs):
+        output = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', MEASURE_CODE.format(
+                baseline_modules=baseline_modules,
+                marker=MEASURE_MARKER,
+                module=module,
+                lazy_dependencies=lazy_dependencies
+            )],
+            capture_output=True,
+            text=True,
+            check=True
+        )
+        # Lines are "import time: self [us] | cumulative | imported package"
+        import_lines = output.stderr.split(MEASURE_MARKER, 1)[1].splitlines()
+        import_times.append(sum(
+            int(line.split(':', 1)[1].split('|')[0]) / 1e6
+            for line in import_lines if line.startswith('import time:')
+        ))
+        loaded = json.loads(output.stdout.strip().splitlines()[-1])
+    return {
+        'import_time': statistics.median(import_times),
+        'loaded': loaded
+    }
+
+failures = []
+warnings = []
+for module, budget in import_time_budgets.items():
+    measure = measure_import(module)
+    logging.info(f"Importing {module} after {baseline_modules} takes "
+                 f"{measure['import_time']:.3f}s (budget {budget:.3f}s).")
+    if len(measure['loaded']) > 0:
+        failures.append(f"{module} imports {measure['loaded']} at import time")
+    if measure['import_time'] > budget:
+        warnings.append(f"{module} exceeds its import time budget by "
+                        f"{measure['import_time'] - budget:.3f}s")
+
+for warning in warnings:
+    logging.warning(warning)
+if fail_on_time_budget:
+    failures.extend(warnings)
+if len(failures) > 0:
+    raise RuntimeError("Import check failed:\n" + "\n".join(failures))
+logging.info(f"None of the {len(import_time_budgets)} modules imports "
+             f"{lazy_dependencies} at import time.")
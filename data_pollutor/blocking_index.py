@@ -0,0 +1,479 @@
+import pandas as pd
+import numpy as np
+from shared_functions import count_pairs
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="- %(levelname)s - %(asctime)s - %(message)s"
+)
+
+# Soundex code of each letter, letters not listed (vowels, h, w, y)
+# are not coded
+SOUNDEX_CODES = {
+    **dict.fromkeys('bfpv', '1'),
+    **dict.fromkeys('cgjkqsxz', '2'),
+    **dict.fromkeys('dt', '3'),
+    'l': '4',
+    **dict.fromkeys('mn', '5'),
+    'r': '6'
+}
+
+#----------------------------------------------------------------
+def normalize_values(
+    values,
+    keep: str = 'alnum'
+    ) -> pd.Series:
+    """
+        Normalize the values of a column before generating blocking
+        keys: cast to lower case string and remove all characters
+        but letters and digits (keep='alnum'), only letters
+        (keep='alpha') or only digits (keep='digits').
+        Missing values are returned as empty strings.
+    """
+    patterns = {
+        'alnum': r'[^a-z0-9]',
+        'alpha': r'[^a-z]',
+        'digits': r'[^0-9]'
+    }
+    if keep not in patterns:
+        raise ValueError(f"Parameter keep must be one of "
+                         f"{list(patterns.keys())}")
+
+    values = pd.Series(values)
+    normalized = values.astype(str).str.lower().str.replace(
+        patterns[keep], '', regex=True
+    )
+    return normalized.where(values.notna(), '').reset_index(drop=True)
+
+#----------------------------------------------------------------
+def soundex(string: str) -> str:
+    """
+        Returns the American Soundex code of a string (first letter
+        followed by three digits), or an empty string if the string
+        contains no letter. For example, soundex('robert') = 'r163'
+    """
+    string = ''.join(c for c in string.lower() if 'a' <= c <= 'z')
+    if not string:
+        return ''
+
+    code = string[0]
+    previous_digit = SOUNDEX_CODES.get(string[0], '')
+    for c in string[1:]:
+        digit = SOUNDEX_CODES.get(c, '')
+        if digit and digit != previous_digit:
+            code += digit
+        # h and w do not separate letters with the same code
+        if c not in 'hw':
+            previous_digit = digit
+    return (code + '000')[:4]
+
+#----------------------------------------------------------------
+def generate_row_keys_from_uniques(
+    values: pd.Series,
+    key_function
+    ):
+    """
+        Apply key_function, returning a list of keys for one value,
+        to the unique values of the Series values only, then expand
+        the keys to all rows. Returns two arrays of the same size:
+        the row positions and their keys (one entry per distinct
+        (row, key) combination).
+    """
+    codes, uniques = pd.factorize(pd.Series(values), use_na_sentinel=True)
+    keys_per_unique = [key_function(value) for value in uniques]
+    nb_keys = np.array([len(keys) for keys in keys_per_unique], dtype=np.int64)
+
+    unique_keys = pd.DataFrame({
+        'code': np.repeat(np.arange(len(uniques)), nb_keys),
+        'key': [key for keys in keys_per_unique for key in keys]
+    })
+    row_codes = pd.DataFrame({
+        'row': np.arange(len(codes)),
+        'code': codes
+    })
+    row_keys = row_codes.merge(
+        unique_keys,
+        on='code',
+        how='inner'
+    )[['row', 'key']].drop_duplicates()
+
+    return row_keys['row'].to_numpy(), row_keys['key'].to_numpy()
+
+#----------------------------------------------------------------
+def generate_qgram_keys(
+    values,
+    q: int = 3,
+    keep: str = 'alnum'
+    ):
+    """
+        Generate q-gram blocking keys: each row gets one key per
+        distinct sequence of q consecutive characters of its normalized
+        value (the whole value when shorter than q, no key when empty).
+        Returns the row positions and their keys.
+    """
+    def get_qgrams(value: str):
+        if len(value) == 0:
+            return []
+        if len(value) <= q:
+            return [value]
+        return list({value[i:i+q] for i in range(len(value) - q + 1)})
+
+    return generate_row_keys_from_uniques(
+        values=normalize_values(values, keep=keep),
+        key_function=get_qgrams
+    )
+
+#----------------------------------------------------------------
+def generate_soundex_keys(values):
+    """
+        Generate phonetic blocking keys: each row gets the Soundex
+        code of its value (no key when the value contains no letter).
+        Returns the row positions and their keys.
+    """
+    return generate_row_keys_from_uniques(
+        values=normalize_values(values, keep='alpha'),
+        key_function=lambda value: [soundex(value)] if value else []
+    )
+
+#----------------------------------------------------------------
+def generate_prefix_keys(
+    values,
+    prefix_length: int = 6,
+    keep: str = 'digits'
+    ):
+    """
+        Generate prefix blocking keys: each row gets the first
+        prefix_length characters of its normalized value (e.g. the
+        first digits of microchip numbers). Values shorter than
+        prefix_length get no key.
+        Returns the row positions and their keys.
+    """
+    normalized = normalize_values(values, keep=keep)
+    valid = normalized.str.len() >= prefix_length
+    return (
+        np.flatnonzero(valid.to_numpy()),
+        normalized[valid].str[:prefix_length].to_numpy()
+    )
+
+#----------------------------------------------------------------
+def generate_sorted_neighbourhood_order(
+    dataframe: pd.DataFrame,
+    columns: list
+    ) -> np.ndarray:
+    """
+        Build the sorting key of the sorted neighbourhood method by
+        concatenating the normalized values of columns, and return the
+        row positions of dataframe sorted by this key.
+    """
+    if len(np.setdiff1d(columns, dataframe.columns)) > 0:
+        raise KeyError(f"Required columns {columns} not found in "
+                       f"DataFrame")
+
+    sorting_key = normalize_values(dataframe[columns[0]])
+    for column in columns[1:]:
+        sorting_key = sorting_key + ' ' + normalize_values(dataframe[column])
+    return np.argsort(sorting_key.to_numpy().astype(str), kind='stable')
+
+#----------------------------------------------------------------
+def enumerate_pairs_within_groups(
+    group_codes: np.ndarray,
+    rows: np.ndarray,
+    nb_rows: int
+    ) -> np.ndarray:
+    """
+        Enumerate the pairs of rows sharing the same group code.
+        group_codes and rows must be sorted by group code. Pairs are
+        encoded as min_row * nb_rows + max_row and returned unique.
+        Cost is proportional to the number of entries times the size
+        of the largest group, so very large blocks should be dropped
+        first (see max_block_size of BlockingIndex.from_row_keys).
+    """
+    group_codes = np.asarray(group_codes)
+    rows = np.asarray(rows, dtype=np.int64)
+    if len(rows) < 2:
+        return np.array([], dtype=np.int64)
+
+    group_sizes = np.bincount(pd.factorize(group_codes)[0])
+    encoded_pairs = []
+    for distance in range(1, int(group_sizes.max())):
+        same_group = group_codes[distance:] == group_codes[:-distance]
+        first = rows[:-distance][same_group]
+        second = rows[distance:][same_group]
+        encoded_pairs.append(
+            np.minimum(first, second) * nb_rows + np.maximum(first, second)
+        )
+    if not encoded_pairs:
+        return np.array([], dtype=np.int64)
+    encoded_pairs = np.unique(np.concatenate(encoded_pairs))
+    # Rows having the same key twice do not form a pair
+    return encoded_pairs[encoded_pairs // nb_rows != encoded_pairs % nb_rows]
+
+
+#================================================================
+class BlockingIndex():
+    """
+        This class is used to store an inverted index of blocking keys
+        built on a polluted relation: for each key, the positions of
+        the rows of the relation having this key. The index is stored
+        in CSR format (keys, offsets, rows) so that the rows of the
+        block of a key are rows[offsets[k]:offsets[k+1]].
+    """
+    def __init__(self,
+        keys: np.ndarray,
+        offsets: np.ndarray,
+        rows: np.ndarray,
+        nb_rows: int,
+        name: str = ''
+        ):
+        """
+            Initialize the instance from its CSR arrays. Use
+            BlockingIndex.from_row_keys to build an index from the
+            output of the generate_*_keys functions.
+        """
+        self.keys = keys
+        self.offsets = offsets
+        self.rows = rows
+        self.nb_rows = int(nb_rows)
+        self.name = name
+        self.key_positions = None
+
+    #----------------------------------------------------------------
+    @classmethod
+    def from_row_keys(cls,
+        row_positions: np.ndarray,
+        row_keys: np.ndarray,
+        nb_rows: int,
+        name: str = '',
+        max_block_size: int = None
+        ):
+        """
+            Build the inverted index from row positions and their keys.
+            Blocks larger than max_block_size (very frequent keys, such
+            as common q-grams) are dropped when it is specified.
+        """
+        logging.info(f"Building blocking index {name} from "
+                     f"{len(row_positions)} row keys.")
+
+        key_codes, keys = pd.factorize(pd.Series(row_keys))
+        order = np.argsort(key_codes, kind='stable')
+        block_sizes = np.bincount(key_codes, minlength=len(keys))
+
+        rows = np.asarray(row_positions, dtype=np.int64)[order]
+        sorted_codes = key_codes[order]
+        keys = np.asarray(keys)
+
+        if max_block_size is not None:
+            kept_blocks = block_sizes <= max_block_size
+            logging.info(f"Dropping {(~kept_blocks).sum()} blocks larger "
+                         f"than {max_block_size} rows.")
+            rows = rows[kept_blocks[sorted_codes]]
+            keys = keys[kept_blocks]
+            block_sizes = block_sizes[kept_blocks]
+
+        offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+        np.cumsum(block_sizes, out=offsets[1:])
+
+        return cls(
+            keys=keys,
+            offsets=offsets,
+            rows=rows,
+            nb_rows=nb_rows,
+            name=name
+        )
+
+    #----------------------------------------------------------------
+    @property
+    def block_sizes(self) -> np.ndarray:
+        """
+            Return the number of rows in each block
+        """
+        return np.diff(self.offsets)
+
+    #----------------------------------------------------------------
+    def get_block(self,
+        key
+        ) -> np.ndarray:
+        """
+            Return the positions of the rows having the given key
+            (empty array for unknown keys).
+        """
+        if self.key_positions is None:
+            self.key_positions = {k: i for i, k in enumerate(self.keys)}
+        position = self.key_positions.get(key)
+        if position is None:
+            return np.array([], dtype=np.int64)
+        return self.rows[self.offsets[position]:self.offsets[position + 1]]
+
+    #----------------------------------------------------------------
+    def get_row_block_codes(self) -> np.ndarray:
+        """
+            Return the position of the block of each entry of rows
+        """
+        return np.repeat(np.arange(len(self.keys)), self.block_sizes)
+
+    #----------------------------------------------------------------
+    def is_disjoint(self) -> bool:
+        """
+            Return True when each row belongs to at most one block
+        """
+        return len(np.unique(self.rows)) == len(self.rows)
+
+    #----------------------------------------------------------------
+    def save(self,
+        path: str
+        ):
+        """
+            Save the index arrays in a npz file
+        """
+        logging.info(f"Saving blocking index {self.name} in {path}.")
+        np.savez(
+            path,
+            keys=self.keys.astype(str),
+            offsets=self.offsets,
+            rows=self.rows,
+            nb_rows=np.array(self.nb_rows),
+            name=np.array(self.name)
+        )
+
+    #----------------------------------------------------------------
+    @classmethod
+    def load(cls,
+        path: str
+        ):
+        """
+            Load an index saved with method save
+        """
+        with np.load(path) as arrays:
+            return cls(
+                keys=arrays['keys'],
+                offsets=arrays['offsets'],
+                rows=arrays['rows'],
+                nb_rows=int(arrays['nb_rows']),
+                name=str(arrays['name'])
+            )
+
+
+#----------------------------------------------------------------
+def evaluate_blocking_index(
+    index: BlockingIndex,
+    true_labels,
+    max_exact_pairs: int = 50_000_000
+    ) -> dict:
+    """
+        Compute the reduction ratio and pair completeness of a blocking
+        index against the ground truth (true_labels: identifier of the
+        clean tuple of each row of the relation, e.g. 'id_animal_v1').
+        - For disjoint indexes (one key per row), candidate and covered
+          true pairs are counted from block and contingency sizes.
+        - For overlapping indexes (e.g. q-grams), covered true pairs are
+          enumerated within (block, true cluster) groups only, and
+          candidate pairs are deduplicated exactly when their upper
+          bound does not exceed max_exact_pairs (the upper bound is
+          used otherwise).
+    """
+    true_labels = np.asarray(true_labels)
+    if len(true_labels) != index.nb_rows:
+        raise ValueError(f"true_labels must contain one label per row "
+                         f"({index.nb_rows})")
+
+    true_codes = pd.factorize(true_labels)[0]
+    nb_rows = index.nb_rows
+    total_pairs = nb_rows * (nb_rows - 1) // 2
+    true_pairs = count_pairs(np.bincount(true_codes))
+    block_codes = index.get_row_block_codes()
+    candidate_pairs_upper_bound = count_pairs(index.block_sizes)
+
+    if index.is_disjoint():
+        candidate_pairs = candidate_pairs_upper_bound
+        cell_codes = pd.factorize(
+            block_codes.astype(np.int64) * (true_codes.max() + 1)
+            + true_codes[index.rows]
+        )[0]
+        covered_true_pairs = count_pairs(np.bincount(cell_codes))
+    else:
+        cell_order = np.lexsort((true_codes[index.rows], block_codes))
+        cell_codes = (
+            block_codes[cell_order].astype(np.int64) * (true_codes.max() + 1)
+            + true_codes[index.rows][cell_order]
+        )
+        covered_true_pairs = len(enumerate_pairs_within_groups(
+            group_codes=cell_codes,
+            rows=index.rows[cell_order],
+            nb_rows=nb_rows
+        ))
+        if candidate_pairs_upper_bound <= max_exact_pairs:
+            candidate_pairs = len(enumerate_pairs_within_groups(
+                group_codes=block_codes,
+                rows=index.rows,
+                nb_rows=nb_rows
+            ))
+        else:
+            logging.info(f"Upper bound of candidate pairs "
+                         f"({candidate_pairs_upper_bound}) exceeds "
+                         f"{max_exact_pairs}, using it as number of "
+                         f"candidate pairs.")
+            candidate_pairs = candidate_pairs_upper_bound
+
+    results = {
+        'index': index.name,
+        'nb_rows': nb_rows,
+        'nb_blocks': len(index.keys),
+        'max_block_size': int(index.block_sizes.max()) if len(index.keys) else 0,
+        'candidate_pairs': candidate_pairs,
+        'true_pairs': true_pairs,
+        'covered_true_pairs': covered_true_pairs,
+        'reduction_ratio': 1 - candidate_pairs / total_pairs if total_pairs else 1.0,
+        'pair_completeness': covered_true_pairs / true_pairs if true_pairs else 1.0,
+        'pair_quality': covered_true_pairs / candidate_pairs if candidate_pairs else 0.0
+    }
+    logging.info(f"Blocking index {index.name}: reduction ratio "
+                 f"{results['reduction_ratio']:.4f}, pair completeness "
+                 f"{results['pair_completeness']:.4f}.")
+    return results
+
+#----------------------------------------------------------------
+def evaluate_sorted_neighbourhood(
+    sorted_rows: np.ndarray,
+    true_labels,
+    window_size: int = 5,
+    name: str = ''
+    ) -> dict:
+    """
+        Compute the reduction ratio and pair completeness of the sorted
+        neighbourhood method: rows are compared with the window_size - 1
+        rows following them in sorted_rows (see function
+        generate_sorted_neighbourhood_order).
+    """
+    true_codes = pd.factorize(np.asarray(true_labels))[0]
+    nb_rows = len(sorted_rows)
+    if len(true_codes) != nb_rows:
+        raise ValueError(f"true_labels must contain one label per row "
+                         f"({nb_rows})")
+
+    sorted_true_codes = true_codes[sorted_rows]
+    candidate_pairs = 0
+    covered_true_pairs = 0
+    for distance in range(1, min(window_size, nb_rows)):
+        candidate_pairs += nb_rows - distance
+        covered_true_pairs += int(
+            (sorted_true_codes[distance:] == sorted_true_codes[:-distance]).sum()
+        )
+
+    total_pairs = nb_rows * (nb_rows - 1) // 2
+    true_pairs = count_pairs(np.bincount(true_codes))
+    results = {
+        'index': name,
+        'nb_rows': nb_rows,
+        'window_size': window_size,
+        'candidate_pairs': candidate_pairs,
+        'true_pairs': true_pairs,
+        'covered_true_pairs': covered_true_pairs,
+        'reduction_ratio': 1 - candidate_pairs / total_pairs if total_pairs else 1.0,
+        'pair_completeness': covered_true_pairs / true_pairs if true_pairs else 1.0,
+        'pair_quality': covered_true_pairs / candidate_pairs if candidate_pairs else 0.0
+    }
+    logging.info(f"Sorted neighbourhood {name}: reduction ratio "
+                 f"{results['reduction_ratio']:.4f}, pair completeness "
+                 f"{results['pair_completeness']:.4f}.")
+    return results
@@ -1,11 +1,7 @@
 import pandas as pd
 import numpy as np
-import random as rd
-import nlpaug.augmenter.char as nac
 import re
 from datetime import datetime, date
-from faker import Faker
-fake = Faker()
 import logging
 
 logging.basicConfig(
@@ -117,16 +113,19 @@ def undouble_letters(string:str):
 #----------------------------------------------------------------
 def randomly_double_letter(
     string: str,
-    letter: str
+    letter: str,
+    rng: np.random.Generator = None
     ):
     """
         Transform a string by doubling a specified letter if when 
         found is not already doubled. For example: 
         randomly_double_letter('banana', 'a') = 'banaana'
     """
+    if rng is None:
+        rng = np.random.default_rng()
     if string.count(letter) >= 1 and letter * 2 not in string:
         indices = [i for i, char in enumerate(string) if char == letter]
-        index_to_double = rd.choice(indices)
+        index_to_double = indices[rng.integers(len(indices))]
         modified_string = string[:index_to_double + 1] + letter + string[index_to_double + 1:]
     else:
         modified_string = string
@@ -135,23 +134,26 @@ def randomly_double_letter(
 #----------------------------------------------------------------
 def randomly_double_letters(
     string: str,
-    letters: list
+    letters: list,
+    rng: np.random.Generator = None
     ):
     """
         Transform a string by doubling specified letters if when 
         found that are not already doubled. For example: 
         randomly_double_letter('banana', ['a','n']) = 'baannana'
     """
+    if rng is None:
+        rng = np.random.default_rng()
     eligible_letters = [
         letter for letter in letters if string.count(letter) >= 1 
         and letter * 2 not in string
     ]
     if not eligible_letters:
         return string  # No eligible letters to double
-    letter_to_double = rd.choice(eligible_letters)
+    letter_to_double = eligible_letters[rng.integers(len(eligible_letters))]
     indices = [i for i, char in enumerate(string) if char == letter_to_double]
     if indices:
-        index_to_double = rd.choice(indices)
+        index_to_double = indices[rng.integers(len(indices))]
         modified_string = (
             string[:index_to_double + 1] +
             letter_to_double +
@@ -161,6 +163,24 @@ def randomly_double_letters(
         modified_string = string
     return modified_string
 
+#----------------------------------------------------------------
+def get_char_augmenter(
+    action: str,
+    aug_char_max: int = 1
+    ):
+    """
+        Returns a character augmenter from nlpaug (RandomCharAug)
+        performing the specified action ('insert', 'swap'...) on at
+        most aug_char_max characters. nlpaug is imported on first call
+        only, as importing it is slow.
+    """
+    import nlpaug.augmenter.char as nac
+
+    return nac.RandomCharAug(
+        action=action,
+        aug_char_max=aug_char_max
+    )
+
 #----------------------------------------------------------------
 def augment_alpha_only(
     string: str,
@@ -169,7 +189,7 @@ def augment_alpha_only(
     """
         Transform a string by randomly injecting an alphanumeric
         character. aug is an instance of BaseAugmenter, instantiated 
-        as follow: nac.RandomCharAug(action="insert", aug_char_max).
+        as follow: get_char_augmenter(action="insert", aug_char_max).
         For example: augment_alpha_only('test', aug) = 'tesjt'
     """
     def replace_alpha(match):
@@ -185,7 +205,7 @@ def swap_char(
     """
         Transform a string by randomly swaping characters. aug is 
         an instance of BaseAugmenter, instantiated as follow: 
-        nac.RandomCharAug(action="swap", aug_char_max).
+        get_char_augmenter(action="swap", aug_char_max).
         For example: swap_char('test', aug) = 'tets'
     """
 
@@ -195,7 +215,8 @@ def swap_char(
 #----------------------------------------------------------------
 def replace_with_random(
     original_value,
-    replacement_list: list
+    replacement_list: list,
+    rng: np.random.Generator = None
     ):
     """
        Transform a string by modifying it by another one randomly
@@ -205,7 +226,9 @@ def replace_with_random(
 
     if not replacement_list:
         raise ValueError("replacement_list cannot be empty.")
-    modified_string = rd.choice(replacement_list)
+    if rng is None:
+        rng = np.random.default_rng()
+    modified_string = replacement_list[rng.integers(len(replacement_list))]
     return modified_string
 
 #----------------------------------------------------------------
@@ -218,7 +241,8 @@ def partially_permute_cell(
     """
         Permute the values on a column of a sample of randomly
         selected rows in a DataFrame. The size of the sample is
-        specified as a fraction.
+        specified as a fraction. seed can be an integer or a
+        np.random.Generator (see class RandomStreams).
     """
     logging.info(f"Permute the values of {fraction*100}% of the values "
                  f"of attribute {column}.")
@@ -244,10 +268,13 @@ def partially_permute_cell(
 def update_to_none_random(
     dataframe: pd.DataFrame,
     column: str,
-    portion: float
+    portion: float,
+    seed = None
     ):
     """
-        
+        Replace by None the values on a column of a portion of
+        randomly selected rows in a DataFrame. seed can be an integer
+        or a np.random.Generator (see class RandomStreams).
     """
     logging.info(f"Replace {portion*100}% of the values of attribute "
                  f"{column} by Null.")
@@ -257,7 +284,12 @@ def update_to_none_random(
     num_indices = min(num_indices, len(dataframe_copy))
     if num_indices == 0:
         return dataframe_copy
-    random_indices = rd.sample(list(dataframe_copy.index), k=num_indices)
+    rng = np.random.default_rng(seed)
+    random_indices = rng.choice(
+        dataframe_copy.index.values,
+        size=num_indices,
+        replace=False
+    )
     dataframe_copy.loc[random_indices, column] = None
     return dataframe_copy
 
@@ -328,7 +360,8 @@ def swap_day_month(date_input: date):
 def replace_year_within_range(
     date_input: date,
     year_start: int,
-    year_end: int
+    year_end: int,
+    rng: np.random.Generator = None
     ):
     """
         Transform a date by replacing its year by another year
@@ -343,7 +376,9 @@ def replace_year_within_range(
     else:
         date = datetime.combine(date_input, datetime.min.time())
 
-    new_year = rd.randint(year_start, year_end)
+    if rng is None:
+        rng = np.random.default_rng()
+    new_year = int(rng.integers(year_start, year_end + 1))
     try:
         return date.replace(year=new_year).date()
     except ValueError:
@@ -352,6 +387,26 @@ def replace_year_within_range(
         else:
             raise
 
+#----------------------------------------------------------------
+def select_random_fraction_of_indices(
+    index: pd.Index,
+    fraction: float,
+    seed = None
+    ) -> np.ndarray:
+    """
+        Randomly select a fraction of the values of a DataFrame's
+        index. seed can be an integer or a np.random.Generator.
+    """
+    rng = np.random.default_rng(seed)
+    shuffled_indices = rng.permutation(index.values)
+    num_to_modify = int(np.floor(fraction * len(index)))
+
+    return rng.choice(
+        shuffled_indices,
+        size=num_to_modify,
+        replace=False
+    )
+
 #----------------------------------------------------------------
 def apply_function_to_fraction(
     dataframe: pd.DataFrame,
@@ -363,7 +418,8 @@ def apply_function_to_fraction(
     ):
     """
         Allows to apply a specific transformation function to a
-        fraction of a dataframe's columns.
+        fraction of a dataframe's columns. seed can be an integer or
+        a np.random.Generator (see class RandomStreams).
     """
     logging.info(f"Polluting the values of attribute {column} "
                  f"by applying function {function} to "
@@ -373,13 +429,11 @@ def apply_function_to_fraction(
         raise ValueError("fraction must be between 0 and 1")
 
     dataframe_copy = dataframe.copy()
-    n = len(dataframe_copy)
-    dataframe_indices = dataframe_copy.index.values.tolist()
-    shuffled_indices = np.random.permutation(dataframe_indices)
-    num_to_modify = int(np.floor(fraction * n))
-
-    rng = np.random.default_rng(seed)
-    indices = rd.sample(list(shuffled_indices), k=num_to_modify)
+    indices = select_random_fraction_of_indices(
+        index=dataframe_copy.index,
+        fraction=fraction,
+        seed=seed
+    )
 
     dataframe_copy.loc[indices, column] = dataframe_copy.loc[
         indices, column
@@ -387,22 +441,199 @@ def apply_function_to_fraction(
 
     return dataframe_copy
 
+#----------------------------------------------------------------
+def to_datetime64_days(values) -> np.ndarray:
+    """
+        Convert a column of dates (strings 'YYYY-MM-DD', date,
+        datetime or Timestamp objects, possibly mixed) to an array
+        of dtype datetime64[D]. Missing and invalid values are
+        converted to NaT.
+    """
+    values = pd.Series(values)
+    if not pd.api.types.is_datetime64_any_dtype(values):
+        values = pd.to_datetime(
+            values.astype('string'),
+            format='ISO8601',
+            errors='coerce'
+        )
+    return values.to_numpy().astype('datetime64[D]')
+
+#----------------------------------------------------------------
+def split_datetime64_days(dates: np.ndarray):
+    """
+        Returns the years, months (1 to 12) and days (1 to 31) of
+        an array of dtype datetime64[D], as integer arrays.
+    """
+    months = dates.astype('datetime64[M]')
+    years = months.astype('datetime64[Y]').astype(np.int64) + 1970
+    month_numbers = months.astype(np.int64) % 12 + 1
+    days = (dates - months.astype('datetime64[D]')).astype(np.int64) + 1
+    return years, month_numbers, days
+
+#----------------------------------------------------------------
+def build_datetime64_days(
+    years: np.ndarray,
+    months: np.ndarray,
+    days: np.ndarray
+    ) -> np.ndarray:
+    """
+        Build an array of dtype datetime64[D] from arrays of years,
+        months (1 to 12) and days. Days must be valid for the month.
+    """
+    month_starts = ((years - 1970) * 12 + months - 1).astype('datetime64[M]')
+    return month_starts.astype('datetime64[D]') + (days - 1).astype('timedelta64[D]')
+
+#----------------------------------------------------------------
+def set_day_to_first_array(
+    dates,
+    relative: str = None,
+    relative_date: date = None
+    ) -> np.ndarray:
+    """
+        Column-level version of function set_day_to_first, applied to
+        an array of dates at once. Returns an array of dtype
+        datetime64[D] where dates earlier (relative='before') or later
+        (relative='after') than relative_date are set to the first day
+        of their month. As in set_day_to_first, dates are returned
+        unchanged when relative is not specified. NaT are kept.
+    """
+    if relative and relative not in ['before', 'after']:
+        raise ValueError("the relative attribute should be 'before' or 'after'")
+    if relative and not relative_date:
+        raise ValueError("please provide a relative date")
+
+    dates = to_datetime64_days(dates)
+    if not relative:
+        return dates
+
+    relative_date = np.datetime64(pd.to_datetime(relative_date).date(), 'D')
+    if relative == 'before':
+        mask = dates < relative_date
+    else:
+        mask = dates > relative_date
+
+    first_days = dates.astype('datetime64[M]').astype('datetime64[D]')
+    return np.where(mask, first_days, dates)
+
+#----------------------------------------------------------------
+def swap_day_month_array(dates) -> np.ndarray:
+    """
+        Column-level version of function swap_day_month, applied to
+        an array of dates at once. Returns an array of dtype
+        datetime64[D] where the day and month of dates with a day
+        lower or equal to 12 are swapped. NaT are kept.
+    """
+    dates = to_datetime64_days(dates)
+    valid = ~np.isnat(dates)
+    years, months, days = split_datetime64_days(dates)
+
+    # The new day is the old month (1 to 12), valid in every month
+    mask = valid & (days <= 12)
+    swapped = build_datetime64_days(
+        years[mask], days[mask], months[mask]
+    )
+    result = dates.copy()
+    result[mask] = swapped
+    return result
+
+#----------------------------------------------------------------
+def replace_year_within_range_array(
+    dates,
+    year_start: int,
+    year_end: int,
+    rng: np.random.Generator = None
+    ) -> np.ndarray:
+    """
+        Column-level version of function replace_year_within_range,
+        applied to an array of dates at once. Returns an array of dtype
+        datetime64[D] where the year of every date is replaced by a
+        year randomly drawn between year_start and year_end (included).
+        As in replace_year_within_range, February 29 is replaced by
+        February 28 when the new year is not a leap year. NaT are kept.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+
+    dates = to_datetime64_days(dates)
+    valid = ~np.isnat(dates)
+    years, months, days = split_datetime64_days(dates[valid])
+    new_years = rng.integers(year_start, year_end + 1, size=len(years))
+
+    # Clip the day to the length of the month in the new year, which
+    # only changes February 29 in non leap years
+    month_starts = ((new_years - 1970) * 12 + months - 1).astype('datetime64[M]')
+    month_lengths = ((month_starts + 1).astype('datetime64[D]')
+                     - month_starts.astype('datetime64[D]')).astype(np.int64)
+    new_days = np.minimum(days, month_lengths)
+
+    result = dates.copy()
+    result[valid] = build_datetime64_days(new_years, months, new_days)
+    return result
+
+#----------------------------------------------------------------
+def apply_date_function_to_fraction(
+    dataframe: pd.DataFrame,
+    column: str,
+    function,
+    fraction: float,
+    seed = None,
+    **kwargs
+    ):
+    """
+        Column-level equivalent of apply_function_to_fraction for the
+        date functions set_day_to_first_array, swap_day_month_array
+        and replace_year_within_range_array: the selected values are
+        transformed at once instead of one by one. Rows are selected
+        as in apply_function_to_fraction, and the modified values are
+        stored as date objects (None for missing dates), as done by
+        the scalar date functions.
+    """
+    logging.info(f"Polluting the values of attribute {column} "
+                 f"by applying function {function.__name__} to "
+                 f"{fraction*100}% of its values.")
+
+    if not (0 < fraction <= 1):
+        raise ValueError("fraction must be between 0 and 1")
+
+    dataframe_copy = dataframe.copy()
+    indices = select_random_fraction_of_indices(
+        index=dataframe_copy.index,
+        fraction=fraction,
+        seed=seed
+    )
+
+    modified_dates = function(
+        dataframe_copy.loc[indices, column].to_numpy(),
+        **kwargs
+    )
+    dataframe_copy[column] = dataframe_copy[column].astype(object)
+    dataframe_copy.loc[indices, column] = pd.Series(
+        modified_dates.astype(object),
+        index=indices,
+        dtype=object
+    )
+
+    return dataframe_copy
+
 #----------------------------------------------------------------
 def replace_random_attribute(
     dataframe: pd.DataFrame,
     column: str,
-    name_map: dict
+    name_map: dict,
+    seed = None
     ):
     """
         Find the subset of the DataFrame where specified column is
         equal to one of the name_map dictionnary's keys and remplace
         a portion of it (from one randomly selected row and all the
         following ones) by the associated value in name_map.
+        seed can be an integer or a np.random.Generator.
     """
     logging.info(f"Replace specific values within attribute {column} "
                  f"with associated values from specified dictionnary: "
                  f"{name_map}.")
 
+    rng = np.random.default_rng(seed)
     dataframe_copy = dataframe.copy()
     for old_name, new_name in name_map.items():
         matches = dataframe_copy[
@@ -411,7 +642,7 @@ def replace_random_attribute(
         
         if not matches.empty:
             match_positions = matches.index.tolist()
-            chosen_position = rd.choice(match_positions)
+            chosen_position = match_positions[rng.integers(len(match_positions))]
 
             for i in match_positions:
                 if i >= chosen_position:
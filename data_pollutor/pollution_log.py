@@ -0,0 +1,270 @@
+import os
+import gzip
+import json
+import pandas as pd
+import numpy as np
+from data_pollutor import data_pollution_functions
+from data_pollutor import pollution_plan
+from data_pollutor.pollution_plan import (
+    RELATION_RNG,
+    check_pollution_plan,
+    is_derivable_step,
+    get_column_dtypes
+)
+from au_pollutor.ground_truth import get_smallest_int_dtype
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="- %(levelname)s - %(asctime)s - %(message)s"
+)
+
+MANIFEST_FILE_NAME = 'manifest.json'
+
+def describe_step(step: dict) -> dict:
+    """
+        Returns a json serializable description of a pollution step:
+        functions are described by their name, the placeholder
+        RELATION_RNG and the nlpaug augmenters by a label (their
+        values are not needed to replay the step, the values it wrote
+        being recorded).
+    """
+    description = {
+        key: value for key, value in step.items()
+        if key not in ['function', 'kwargs']
+    }
+    if 'function' in step:
+        description['function'] = step['function'].__name__
+    kwargs = {}
+    for key, value in step.get('kwargs', {}).items():
+        if value is RELATION_RNG:
+            kwargs[key] = '<relation rng>'
+        elif hasattr(value, 'augment'):
+            kwargs[key] = f"<augmenter {getattr(value, 'action', '')}>"
+        else:
+            kwargs[key] = value
+    description['kwargs'] = kwargs
+    return description
+
+#----------------------------------------------------------------
+def get_step_function(function_name: str):
+    """
+        Returns the pollution function named function_name, defined in
+        data_pollution_functions.py or pollution_plan.py.
+    """
+    for module in (data_pollution_functions, pollution_plan):
+        if hasattr(module, function_name):
+            return getattr(module, function_name)
+    raise KeyError(f"Unknown pollution function '{function_name}'.")
+
+#----------------------------------------------------------------
+def save_pollution_log(
+    directory: str,
+    master_seed: int,
+    relation_plans: dict,
+    relation_logs: dict,
+    chunk_size: int = None
+    ):
+    """
+        Write the replay log of a data pollution in directory, from the
+        pollution plans of the relations (relation_plans) and the
+        changes recorded while applying them (relation_logs, see
+        function record_step_changes), instead of full copies of the
+        polluted relations:
+        - a json manifest with the master seed, the chunk size and the
+          description of the steps of each relation
+        - for each relation, the positions of the rows modified by each
+          step, in a compressed .npz file
+        - for each relation, the values written by the steps which
+          cannot be derived from the positions, in a compressed json
+          file
+        Returns the content of the manifest.
+    """
+    logging.info(f"Saving the replay log of relations "
+                 f"{list(relation_logs.keys())} in {directory}.")
+    os.makedirs(directory, exist_ok=True)
+
+    manifest = {
+        'master_seed': master_seed,
+        'chunk_size': chunk_size,
+        'relations': {}
+    }
+    for relation_name, relation_log in relation_logs.items():
+        plan = relation_plans[relation_name]
+        positions, values = {}, {}
+        steps = []
+        for step_index, step in enumerate(plan):
+            description = describe_step(step)
+            changes = relation_log.get(step_index)
+            if changes is not None:
+                step_positions = (np.concatenate(changes['positions'])
+                                  if len(changes['positions']) > 0 else np.array([], dtype=np.int64))
+                max_position = int(step_positions.max()) if len(step_positions) > 0 else 0
+                positions[f"step_{step_index}"] = step_positions.astype(get_smallest_int_dtype(max_position))
+                if not is_derivable_step(step):
+                    values[f"step_{step_index}"] = changes['values']
+                description['nb_changes'] = int(len(step_positions))
+            steps.append(description)
+
+        np.savez_compressed(os.path.join(directory, f"{relation_name}_positions.npz"), **positions)
+        with gzip.open(os.path.join(directory, f"{relation_name}_values.json.gz"), 'wt') as f:
+            json.dump(values, f)
+        manifest['relations'][relation_name] = {'steps': steps}
+
+    with open(os.path.join(directory, MANIFEST_FILE_NAME), 'w') as f:
+        json.dump(manifest, f, indent=4, default=str)
+
+    logging.info(f"Replay log saved for {len(manifest['relations'])} relations.")
+    return manifest
+
+
+#================================================================
+class PollutionLog():
+    """
+        This class is used to load the replay log of a data pollution
+        saved by function save_pollution_log, and to rebuild the
+        polluted relations from the relations suffering from
+        artificial unicity, without running the pollution again.
+    """
+    def __init__(self,
+        directory: str
+        ):
+        """
+            Initialize the instance with the directory in which the
+            replay log was saved.
+        """
+        logging.info("Instantiating object from class PollutionLog")
+
+        manifest_path = os.path.join(directory, MANIFEST_FILE_NAME)
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(f"No replay log manifest found in {directory}.")
+        self.directory = directory
+        with open(manifest_path) as f:
+            self.manifest = json.load(f)
+
+    #----------------------------------------------------------------
+    @property
+    def relations(self):
+        """
+            Returns the list of the relations of the replay log.
+        """
+        return list(self.manifest['relations'].keys())
+
+    #----------------------------------------------------------------
+    def get_relation_steps(self,
+        relation_name: str
+        ) -> list:
+        """
+            Returns the steps of a relation, with their function and,
+            for the recorded steps, the positions of the modified rows
+            and the values they wrote (None for derivable steps).
+        """
+        if relation_name not in self.manifest['relations']:
+            raise KeyError(f"Relation {relation_name} not found in the replay log, "
+                           f"available relations: {self.relations}.")
+
+        positions = np.load(os.path.join(self.directory, f"{relation_name}_positions.npz"))
+        with gzip.open(os.path.join(self.directory, f"{relation_name}_values.json.gz"), 'rt') as f:
+            values = json.load(f)
+
+        steps = []
+        for step_index, description in enumerate(self.manifest['relations'][relation_name]['steps']):
+            step = dict(description)
+            if 'function' in step:
+                step['function'] = get_step_function(step['function'])
+            step_key = f"step_{step_index}"
+            if step_key in positions:
+                step['positions'] = positions[step_key].astype(np.int64)
+                step['values'] = values.get(step_key)
+            steps.append(step)
+        check_pollution_plan(steps)
+        return steps
+
+    #----------------------------------------------------------------
+    def replay_chunk(self,
+        chunk: pd.DataFrame,
+        steps: list
+        ) -> pd.DataFrame:
+        """
+            Replay the steps of a relation (see function
+            get_relation_steps) on a chunk of the relation suffering
+            from artificial unicity, whose index holds the positions of
+            the rows in the relation (consecutive positions).
+        """
+        if len(chunk) == 0:
+            return chunk
+        start, stop = chunk.index[0], chunk.index[-1] + 1
+        for step in steps:
+            operation, column = step['operation'], step['column']
+            if operation == 'convert':
+                chunk[column] = step['function'](chunk[column])
+                continue
+
+            lower, upper = np.searchsorted(step['positions'], [start, stop])
+            rows = step['positions'][lower:upper]
+            if operation == 'set_none':
+                # Integer columns are cast in every chunk in chunked mode
+                if (self.manifest['chunk_size'] is not None
+                        and pd.api.types.is_integer_dtype(chunk[column])):
+                    chunk[column] = chunk[column].astype(np.float64)
+                if len(rows) > 0:
+                    chunk.loc[rows, column] = None
+                continue
+            if operation == 'apply_date':
+                chunk[column] = chunk[column].astype(object)
+            if len(rows) == 0:
+                continue
+
+            if step['values'] is not None:
+                new_values = step['values'][lower:upper]
+            elif operation == 'apply':
+                new_values = [
+                    step['function'](value, **step['kwargs'])
+                    for value in chunk.loc[rows, column]
+                ]
+            else:
+                new_values = step['function'](
+                    chunk.loc[rows, column].to_numpy(),
+                    **step['kwargs']
+                ).astype(object)
+            chunk.loc[rows, column] = pd.Series(
+                new_values,
+                index=rows,
+                dtype=object if operation == 'apply_date' else None
+            )
+        return chunk
+
+    #----------------------------------------------------------------
+    def replay_relation(self,
+        relation_name: str,
+        input_path: str,
+        output_path: str,
+        chunk_size: int = None
+        ):
+        """
+            Rebuild the polluted relation relation_name from the csv
+            file of the relation suffering from artificial unicity
+            (input_path), and save it in the csv file output_path. If
+            chunk_size is specified, the relation is read and written
+            by chunks of chunk_size rows.
+        """
+        logging.info(f"Replaying the pollution of relation {relation_name}.")
+        steps = self.get_relation_steps(relation_name)
+        for step in steps:
+            if not is_derivable_step(step) and 'positions' in step and step['values'] is None:
+                raise ValueError(f"Values of step {step} of relation {relation_name} "
+                                 f"are missing from the replay log.")
+
+        if chunk_size is None:
+            relation = self.replay_chunk(pd.read_csv(input_path), steps)
+            relation.to_csv(output_path)
+            return
+
+        column_dtypes = get_column_dtypes(input_path, chunk_size)
+        nb_rows = 0
+        for chunk in pd.read_csv(input_path, dtype=column_dtypes, chunksize=chunk_size):
+            chunk = self.replay_chunk(chunk, steps)
+            chunk.to_csv(output_path, mode='w' if nb_rows == 0 else 'a', header=nb_rows == 0)
+            nb_rows += len(chunk)
+        if nb_rows == 0:
+            pd.read_csv(input_path, nrows=0).to_csv(output_path)
@@ -0,0 +1,551 @@
+import random as rd
+import pandas as pd
+import numpy as np
+from data_pollutor.data_pollution_functions import (
+    apply_function_to_fraction,
+    apply_date_function_to_fraction,
+    partially_permute_cell,
+    update_to_none_random,
+    replace_random_attribute,
+    to_datetime64_days
+)
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="- %(levelname)s - %(asctime)s - %(message)s"
+)
+
+# Placeholder used in the kwargs of a pollution step for the random
+# generator of the relation (replaced by a generator proper to the row
+# in chunked mode)
+RELATION_RNG = object()
+
+# Operations of a pollution step: each one modifies a single column
+#   'apply': apply_function_to_fraction
+#   'apply_date': apply_date_function_to_fraction
+#   'permute': partially_permute_cell
+#   'set_none': update_to_none_random
+#   'replace_map': replace_random_attribute (kwargs 'name_map')
+#   'convert': function applied to the whole column (e.g. type conversion)
+OPERATIONS = ['apply', 'apply_date', 'permute', 'set_none', 'replace_map', 'convert']
+
+# Operations needing the values of the whole column, resolved by an
+# additional pass over the relation in chunked mode
+GLOBAL_OPERATIONS = ['permute', 'replace_map']
+
+def convert_to_string(values: pd.Series) -> pd.Series:
+    """
+        Convert the values of a column to strings.
+    """
+    return values.astype(str)
+
+#----------------------------------------------------------------
+def convert_to_date(values: pd.Series) -> pd.Series:
+    """
+        Convert the values of a column to date objects.
+    """
+    return pd.to_datetime(values).dt.date
+
+#----------------------------------------------------------------
+def check_pollution_plan(plan: list):
+    """
+        Check that each step of a pollution plan (list of
+        dictionnaries with keys 'operation', 'column' and, depending
+        on the operation, 'function', 'fraction' and 'kwargs') is
+        valid.
+    """
+    for step_index, step in enumerate(plan):
+        if step.get('operation') not in OPERATIONS:
+            raise ValueError(f"Unknown operation '{step.get('operation')}' in step "
+                             f"{step_index}, expected one of {OPERATIONS}.")
+        if 'column' not in step:
+            raise KeyError(f"Step {step_index} has no 'column'.")
+        if step['operation'] in ['apply', 'apply_date', 'convert'] and 'function' not in step:
+            raise KeyError(f"Step {step_index} ({step['operation']}) has no 'function'.")
+        if step['operation'] == 'replace_map' and 'name_map' not in step.get('kwargs', {}):
+            raise KeyError(f"Step {step_index} (replace_map) has no 'name_map' kwarg.")
+
+#----------------------------------------------------------------
+def get_step_kwargs(
+    step: dict,
+    rng: np.random.Generator
+    ) -> dict:
+    """
+        Returns the kwargs of a pollution step, where the placeholder
+        RELATION_RNG is replaced by the generator rng.
+    """
+    return {
+        key: rng if value is RELATION_RNG else value
+        for key, value in step.get('kwargs', {}).items()
+    }
+
+#----------------------------------------------------------------
+def is_derivable_step(step: dict) -> bool:
+    """
+        Returns True if the values written by a step can be derived
+        again from the positions of the modified rows, i.e. if its
+        function draws no random value (see function needs_row_state).
+    """
+    if step['operation'] in ['set_none', 'convert']:
+        return True
+    return step['operation'] in ['apply', 'apply_date'] and not needs_row_state(step)
+
+#----------------------------------------------------------------
+def to_log_value(value):
+    """
+        Convert a value written by a pollution step to a json
+        serializable value: missing values to None, dates to ISO
+        strings and NumPy scalars to Python scalars.
+    """
+    if value is None:
+        return None
+    if hasattr(value, 'isoformat'):
+        return None if pd.isna(value) else value.isoformat()
+    if isinstance(value, (float, np.floating)) and np.isnan(value):
+        return None
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+#----------------------------------------------------------------
+def record_step_changes(
+    relation_log: dict,
+    step_index: int,
+    step: dict,
+    before: pd.Series,
+    after: pd.Series
+    ):
+    """
+        Record in relation_log (dictionnary mapping the index of each
+        step to its changes) the positions of the rows whose value was
+        modified by a step, and their new values when they cannot be
+        derived from the positions (see function is_derivable_step).
+        before and after are the values of the step's column, indexed
+        by the positions of the rows.
+    """
+    if step['operation'] == 'convert':
+        return
+    before_values = before.to_numpy(dtype=object)
+    after_values = after.to_numpy(dtype=object)
+    if step['operation'] == 'apply_date':
+        # Selected dates are stored as date objects even when unchanged:
+        # compare the dates, a value is also modified when it becomes
+        # missing
+        before_dates = to_datetime64_days(before_values)
+        after_dates = to_datetime64_days(after_values)
+        changed = ((before_dates != after_dates) & ~(np.isnat(before_dates) & np.isnat(after_dates))
+                   | (~pd.isna(before_values) & pd.isna(after_values)))
+    else:
+        changed = ~((before_values == after_values) | (pd.isna(before_values) & pd.isna(after_values)))
+    changes = relation_log.setdefault(step_index, {'positions': [], 'values': []})
+    changes['positions'].append(after.index.to_numpy()[changed])
+    if not is_derivable_step(step):
+        changes['values'].extend(to_log_value(value) for value in after_values[changed])
+
+#----------------------------------------------------------------
+def pollute_relation(
+    dataframe: pd.DataFrame,
+    plan: list,
+    rng: np.random.Generator,
+    relation_log: dict = None
+    ) -> pd.DataFrame:
+    """
+        Apply the steps of a pollution plan, in order, to a copy of
+        the DataFrame of a relation held in memory, with the
+        generator rng of the relation (see class RandomStreams).
+        If relation_log is specified, the changes of each step are
+        recorded in it (see function record_step_changes).
+        Returns the polluted DataFrame.
+    """
+    check_pollution_plan(plan)
+    dataframe = dataframe.copy()
+    for step_index, step in enumerate(plan):
+        operation, column = step['operation'], step['column']
+        if relation_log is not None:
+            before = dataframe[column].copy()
+        kwargs = get_step_kwargs(step, rng)
+        if operation == 'apply':
+            dataframe = apply_function_to_fraction(
+                dataframe,
+                column,
+                step['function'],
+                step['fraction'],
+                seed=rng,
+                **kwargs
+            )
+        elif operation == 'apply_date':
+            dataframe = apply_date_function_to_fraction(
+                dataframe,
+                column,
+                step['function'],
+                step['fraction'],
+                seed=rng,
+                **kwargs
+            )
+        elif operation == 'permute':
+            dataframe = partially_permute_cell(
+                dataframe,
+                column,
+                step['fraction'],
+                seed=rng
+            )
+        elif operation == 'set_none':
+            dataframe = update_to_none_random(
+                dataframe,
+                column,
+                step['fraction'],
+                seed=rng
+            )
+        elif operation == 'replace_map':
+            dataframe = replace_random_attribute(
+                dataframe,
+                column,
+                kwargs['name_map'],
+                seed=rng
+            )
+        else:
+            dataframe[column] = step['function'](dataframe[column])
+        if relation_log is not None:
+            record_step_changes(relation_log, step_index, step, before, dataframe[column])
+    return dataframe
+
+#================================================================
+# Chunked execution: random draws are derived from the seed of the
+# relation, the index of the step and the position of the row in the
+# relation, so that results do not depend on the size of the chunks
+
+def mix_64bits(values: np.ndarray) -> np.ndarray:
+    """
+        Returns the SplitMix64 hashes of an array of unsigned 64 bits
+        integers.
+    """
+    with np.errstate(over='ignore'):
+        values = values + np.uint64(0x9E3779B97F4A7C15)
+        values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return values ^ (values >> np.uint64(31))
+
+#----------------------------------------------------------------
+def get_row_hashes(
+    seed: int,
+    step_index: int,
+    positions,
+    salt: int = 0
+    ) -> np.ndarray:
+    """
+        Returns a 64 bits hash for each row position, depending on the
+        seed of the relation, the index of the step and a salt (to
+        derive several independent draws for the same step).
+    """
+    key = mix_64bits(np.array([seed % 2**64], dtype=np.uint64))
+    key = mix_64bits(key ^ np.uint64(2 * step_index + salt))
+    return mix_64bits(np.asarray(positions, dtype=np.uint64) ^ key)
+
+#----------------------------------------------------------------
+def select_rows_by_position(
+    seed: int,
+    step_index: int,
+    positions,
+    fraction: float
+    ) -> np.ndarray:
+    """
+        Returns a boolean mask selecting each row independently with
+        probability fraction (the selected proportion meets fraction
+        in expectation).
+    """
+    if not (0 < fraction <= 1):
+        raise ValueError("fraction must be between 0 and 1")
+    uniforms = (get_row_hashes(seed, step_index, positions) >> np.uint64(11)).astype(np.float64) * 2.0**-53
+    return uniforms < fraction
+
+#----------------------------------------------------------------
+def needs_row_state(step: dict) -> bool:
+    """
+        Returns True if the function of a step draws random values:
+        from the relation's generator or from the global random states
+        (nlpaug augmenters).
+    """
+    return any(
+        value is RELATION_RNG or hasattr(value, 'augment')
+        for value in step.get('kwargs', {}).values()
+    )
+
+#----------------------------------------------------------------
+def call_with_row_state(
+    function,
+    value,
+    kwargs: dict,
+    row_seed: int
+    ):
+    """
+        Call function on a value with a random state proper to its
+        row: RELATION_RNG is replaced by a generator seeded with
+        row_seed, and the global random states used by the nlpaug
+        augmenters are seeded with row_seed.
+    """
+    row_kwargs = {
+        key: np.random.default_rng(row_seed) if argument is RELATION_RNG else argument
+        for key, argument in kwargs.items()
+    }
+    if any(hasattr(argument, 'augment') for argument in kwargs.values()):
+        rd.seed(row_seed)
+        np.random.seed(row_seed % 2**32)
+    return function(value, **row_kwargs)
+
+#----------------------------------------------------------------
+def replace_names_from_position(
+    chunk: pd.DataFrame,
+    column: str,
+    name_map: dict,
+    chosen_positions: dict
+    ) -> pd.DataFrame:
+    """
+        Chunked equivalent of replace_random_attribute: for each name
+        of name_map with a chosen position, replace the matching
+        values at this position and after by the associated name.
+    """
+    positions = chunk.index.to_numpy()
+    for old_name, new_name in name_map.items():
+        if old_name not in chosen_positions:
+            continue
+        matches = (chunk[column].str.lower() == old_name.lower()).to_numpy(dtype=bool)
+        chunk.loc[matches & (positions >= chosen_positions[old_name]), column] = new_name
+    return chunk
+
+#----------------------------------------------------------------
+def pollute_chunk_column(
+    chunk: pd.DataFrame,
+    plan: list,
+    step_index: int,
+    seed: int,
+    resolutions: dict
+    ) -> pd.DataFrame:
+    """
+        Apply step step_index of a pollution plan to a chunk of a
+        relation, whose index holds the positions of the rows in the
+        relation. Steps with a global operation use their resolution,
+        computed beforehand over the whole relation (see function
+        resolve_global_step).
+    """
+    step = plan[step_index]
+    operation, column = step['operation'], step['column']
+    positions = chunk.index.to_numpy()
+
+    if operation == 'convert':
+        chunk[column] = step['function'](chunk[column])
+    elif operation == 'permute':
+        permuted_positions, permuted_values = resolutions[step_index]
+        locations = np.searchsorted(permuted_positions, positions)
+        found = locations < len(permuted_positions)
+        found[found] = permuted_positions[locations[found]] == positions[found]
+        if found.any():
+            chunk.loc[positions[found], column] = permuted_values[locations[found]]
+    elif operation == 'replace_map':
+        chunk = replace_names_from_position(
+            chunk,
+            column,
+            step['kwargs']['name_map'],
+            resolutions[step_index]
+        )
+    else:
+        mask = select_rows_by_position(seed, step_index, positions, step['fraction'])
+        rows = positions[mask]
+        if operation == 'set_none':
+            # Cast integer columns in every chunk, as a None would in any of them
+            if pd.api.types.is_integer_dtype(chunk[column]):
+                chunk[column] = chunk[column].astype(np.float64)
+            if len(rows) > 0:
+                chunk.loc[rows, column] = None
+            return chunk
+
+        kwargs = step.get('kwargs', {})
+        values = chunk.loc[rows, column].to_numpy()
+        if operation == 'apply':
+            if needs_row_state(step):
+                row_seeds = get_row_hashes(seed, step_index, rows, salt=1)
+                new_values = [
+                    call_with_row_state(step['function'], value, kwargs, int(row_seed))
+                    for value, row_seed in zip(values, row_seeds)
+                ]
+            else:
+                new_values = [step['function'](value, **kwargs) for value in values]
+            if len(rows) > 0:
+                chunk.loc[rows, column] = pd.Series(new_values, index=rows)
+        else:
+            if needs_row_state(step):
+                row_seeds = get_row_hashes(seed, step_index, rows, salt=1)
+                modified_dates = [
+                    call_with_row_state(step['function'], values[i:i + 1], kwargs, int(row_seed))
+                    for i, row_seed in enumerate(row_seeds)
+                ]
+                modified_dates = (np.concatenate(modified_dates) if len(modified_dates) > 0
+                                  else np.array([], dtype='datetime64[D]'))
+            else:
+                modified_dates = step['function'](values, **kwargs)
+            chunk[column] = chunk[column].astype(object)
+            if len(rows) > 0:
+                chunk.loc[rows, column] = pd.Series(
+                    modified_dates.astype(object),
+                    index=rows,
+                    dtype=object
+                )
+    return chunk
+
+#----------------------------------------------------------------
+def get_column_dtypes(
+    input_path: str,
+    chunk_size: int
+    ) -> dict:
+    """
+        Returns the dtype of each column of a csv file read by chunks,
+        as inferred over the whole file: a column is float if its
+        chunks are numeric with different dtypes, object if one of
+        them is not numeric.
+    """
+    chunk_dtypes = {}
+    for chunk in pd.read_csv(input_path, chunksize=chunk_size):
+        for column, dtype in chunk.dtypes.items():
+            chunk_dtypes.setdefault(column, set()).add(dtype)
+
+    column_dtypes = {}
+    for column, dtypes in chunk_dtypes.items():
+        if len(dtypes) == 1:
+            column_dtypes[column] = dtypes.pop()
+        elif all(pd.api.types.is_numeric_dtype(dtype)
+                 and not pd.api.types.is_bool_dtype(dtype) for dtype in dtypes):
+            column_dtypes[column] = np.float64
+        else:
+            column_dtypes[column] = object
+    return column_dtypes
+
+#----------------------------------------------------------------
+def read_polluted_column(
+    input_path: str,
+    plan: list,
+    step_index: int,
+    seed: int,
+    resolutions: dict,
+    chunk_size: int,
+    column_dtypes: dict
+    ):
+    """
+        Read the column of step step_index by chunks, and yield each
+        chunk after applying the previous steps on this column (every
+        step only modifies its own column).
+    """
+    column = plan[step_index]['column']
+    for chunk in pd.read_csv(
+        input_path,
+        usecols=[column],
+        dtype={column: column_dtypes[column]},
+        chunksize=chunk_size
+    ):
+        for previous_index in range(step_index):
+            if plan[previous_index]['column'] == column:
+                chunk = pollute_chunk_column(chunk, plan, previous_index, seed, resolutions)
+        yield chunk
+
+#----------------------------------------------------------------
+def resolve_global_step(
+    input_path: str,
+    plan: list,
+    step_index: int,
+    seed: int,
+    resolutions: dict,
+    chunk_size: int,
+    column_dtypes: dict
+    ):
+    """
+        Compute, with additional passes over the relation, what a step
+        with a global operation needs to be applied chunk by chunk:
+          - permute: the positions of the selected rows and their
+            permuted values (only the selected values are held in
+            memory)
+          - replace_map: for each name of name_map, the randomly chosen
+            position from which its matches are replaced (one pass per
+            name, as a replacement can create matches of the next ones)
+    """
+    step = plan[step_index]
+    column = step['column']
+    step_rng = np.random.default_rng([seed % 2**63, step_index])
+
+    if step['operation'] == 'permute':
+        positions, values = [], []
+        for chunk in read_polluted_column(input_path, plan, step_index, seed,
+                                          resolutions, chunk_size, column_dtypes):
+            mask = select_rows_by_position(seed, step_index, chunk.index.to_numpy(), step['fraction'])
+            positions.append(chunk.index.to_numpy()[mask])
+            values.append(chunk[column].to_numpy()[mask])
+        positions = np.concatenate(positions) if len(positions) > 0 else np.array([], dtype=np.int64)
+        values = np.concatenate(values) if len(values) > 0 else np.array([], dtype=object)
+        return positions, step_rng.permutation(values)
+
+    name_map = step['kwargs']['name_map']
+    chosen_positions = {}
+    resolutions[step_index] = chosen_positions
+    for old_name in name_map:
+        match_positions = []
+        for chunk in read_polluted_column(input_path, plan, step_index, seed,
+                                          resolutions, chunk_size, column_dtypes):
+            chunk = replace_names_from_position(chunk, column, name_map, chosen_positions)
+            matches = (chunk[column].str.lower() == old_name.lower()).to_numpy(dtype=bool)
+            match_positions.append(chunk.index.to_numpy()[matches])
+        match_positions = np.concatenate(match_positions) if len(match_positions) > 0 else []
+        if len(match_positions) > 0:
+            chosen_positions[old_name] = match_positions[step_rng.integers(len(match_positions))]
+    return chosen_positions
+
+#----------------------------------------------------------------
+def pollute_relation_by_chunk(
+    input_path: str,
+    output_path: str,
+    plan: list,
+    seed: int,
+    chunk_size: int = 100000,
+    relation_log: dict = None
+    ):
+    """
+        Apply the steps of a pollution plan to a relation stored in a
+        csv file, read and written by chunks of chunk_size rows, for
+        relations too large to be held in memory. The polluted chunks
+        are appended to the csv file output_path, which has the same
+        structure as the one written by the in-memory mode.
+        Rows are selected independently with probability 'fraction'
+        (instead of exactly a fraction of the rows), and every random
+        draw depends on seed, the step and the position of the row, so
+        that the output does not depend on chunk_size. Global
+        operations (permute, replace_map) are resolved beforehand by
+        additional passes reading only their column.
+        If output_path is None, the polluted chunks are not saved (to
+        only record the changes in relation_log, see function
+        record_step_changes).
+        Returns the number of rows of the relation.
+    """
+    check_pollution_plan(plan)
+    column_dtypes = get_column_dtypes(input_path, chunk_size)
+
+    resolutions = {}
+    for step_index, step in enumerate(plan):
+        if step['operation'] in GLOBAL_OPERATIONS:
+            logging.info(f"Resolving step {step_index} ({step['operation']} on "
+                         f"attribute {step['column']}) over the whole relation.")
+            resolutions[step_index] = resolve_global_step(
+                input_path, plan, step_index, seed, resolutions, chunk_size, column_dtypes
+            )
+
+    nb_rows = 0
+    for chunk in pd.read_csv(input_path, dtype=column_dtypes, chunksize=chunk_size):
+        for step_index, step in enumerate(plan):
+            if relation_log is not None:
+                before = chunk[step['column']].copy()
+            chunk = pollute_chunk_column(chunk, plan, step_index, seed, resolutions)
+            if relation_log is not None:
+                record_step_changes(relation_log, step_index, step, before, chunk[step['column']])
+        if output_path is not None:
+            chunk.to_csv(output_path, mode='w' if nb_rows == 0 else 'a', header=nb_rows == 0)
+        nb_rows += len(chunk)
+        logging.info(f"Polluted {nb_rows} rows of {input_path}.")
+    if nb_rows == 0 and output_path is not None:
+        pd.read_csv(input_path, nrows=0).to_csv(output_path)
+    return nb_rows
@@ -0,0 +1,321 @@
+import os
+import json
+import pandas as pd
+import numpy as np
+from au_pollutor.ground_truth import get_smallest_int_dtype
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="- %(levelname)s - %(asctime)s - %(message)s"
+)
+
+MANIFEST_FILE_NAME = 'manifest.json'
+
+# Pollution function applied by the operations not taking a function
+OPERATION_FUNCTIONS = {
+    'permute': 'partially_permute_cell',
+    'set_none': 'update_to_none_random',
+    'replace_map': 'replace_random_attribute'
+}
+
+# Arrays of the provenance of a relation, one value per modified cell
+PROVENANCE_ARRAYS = ('positions', 'columns', 'steps')
+
+def get_step_function_name(step: dict) -> str:
+    """
+        Returns the name of the pollution function applied by a step.
+    """
+    if step['operation'] in OPERATION_FUNCTIONS:
+        return OPERATION_FUNCTIONS[step['operation']]
+    return step['function'].__name__
+
+#----------------------------------------------------------------
+def build_provenance_arrays(
+    plan: list,
+    relation_log: dict,
+    column_names: list
+    ) -> dict:
+    """
+        Build the provenance of a relation in sparse COO form, from the
+        changes of the steps of its pollution plan (relation_log, see
+        function record_step_changes): one entry (position of the row,
+        index of the column in column_names, index of the step) per
+        cell modified by a step, sorted by column, row and step.
+    """
+    positions, columns, steps = [], [], []
+    for step_index, changes in relation_log.items():
+        step_positions = (np.concatenate(changes['positions'])
+                          if len(changes['positions']) > 0 else np.array([], dtype=np.int64))
+        positions.append(step_positions.astype(np.int64))
+        columns.append(np.full(len(step_positions), column_names.index(plan[step_index]['column'])))
+        steps.append(np.full(len(step_positions), step_index))
+
+    if len(positions) == 0:
+        positions, columns, steps = ([np.array([], dtype=np.int64)] for _ in range(3))
+    positions = np.concatenate(positions)
+    columns = np.concatenate(columns)
+    steps = np.concatenate(steps)
+    order = np.lexsort((steps, positions, columns))
+
+    max_position = int(positions.max()) if len(positions) > 0 else 0
+    return {
+        'positions': positions[order].astype(get_smallest_int_dtype(max_position)),
+        'columns': columns[order].astype(get_smallest_int_dtype(len(column_names))),
+        'steps': steps[order].astype(get_smallest_int_dtype(len(plan)))
+    }
+
+#----------------------------------------------------------------
+def save_pollution_provenance(
+    directory: str,
+    relation_plans: dict,
+    relation_logs: dict,
+    relation_columns: dict,
+    relation_sizes: dict
+    ):
+    """
+        Write the cell-level provenance of a data pollution in
+        directory: for each relation, the arrays of the modified cells
+        (see function build_provenance_arrays), each one in its own
+        .npy file so that it can be memory-mapped when loaded, and a
+        json manifest describing the columns, the number of rows and
+        the steps (operation, function, column) of each relation.
+        relation_columns and relation_sizes are dictionnaries mapping
+        the name of each relation to its list of columns and to its
+        number of rows.
+        Returns the content of the manifest.
+    """
+    logging.info(f"Saving the pollution provenance of relations "
+                 f"{list(relation_logs.keys())} in {directory}.")
+    os.makedirs(directory, exist_ok=True)
+
+    manifest = {}
+    for relation_name, relation_log in relation_logs.items():
+        plan = relation_plans[relation_name]
+        column_names = list(relation_columns[relation_name])
+        arrays = build_provenance_arrays(plan, relation_log, column_names)
+        for array_name in PROVENANCE_ARRAYS:
+            np.save(
+                os.path.join(directory, f"{relation_name}_{array_name}.npy"),
+                arrays[array_name]
+            )
+        positions, columns = arrays['positions'], arrays['columns']
+        # Entries are sorted by column and row: a cell is counted once,
+        # at its first entry
+        first_entries = np.ones(len(positions), dtype=bool)
+        first_entries[1:] = (positions[1:] != positions[:-1]) | (columns[1:] != columns[:-1])
+        column_offsets = np.zeros(len(column_names) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(columns, minlength=len(column_names)), out=column_offsets[1:])
+
+        manifest[relation_name] = {
+            'columns': column_names,
+            'nb_rows': int(relation_sizes[relation_name]),
+            'nb_cells': int(len(positions)),
+            'column_offsets': column_offsets.tolist(),
+            'nb_modified_cells': np.bincount(
+                columns[first_entries],
+                minlength=len(column_names)
+            ).tolist(),
+            'steps': [
+                {
+                    'operation': step['operation'],
+                    'function': get_step_function_name(step),
+                    'column': step['column']
+                }
+                for step in plan
+            ]
+        }
+
+    with open(os.path.join(directory, MANIFEST_FILE_NAME), 'w') as f:
+        json.dump(manifest, f, indent=4)
+
+    logging.info(f"Pollution provenance saved for {len(manifest)} relations.")
+    return manifest
+
+
+#================================================================
+class PollutionProvenance():
+    """
+        This class is used to load the cell-level provenance of a data
+        pollution saved by function save_pollution_provenance, and to
+        query which cells were modified, by which steps and functions,
+        and the error rate of each column. Arrays are memory-mapped and
+        sorted by column, row and step, so that queries only read the
+        range of their column (offsets stored in the manifest) and are
+        vectorized or binary searches.
+    """
+    def __init__(self,
+        directory: str
+        ):
+        """
+            Initialize the instance with the directory in which the
+            provenance was saved.
+        """
+        logging.info("Instantiating object from class PollutionProvenance")
+
+        manifest_path = os.path.join(directory, MANIFEST_FILE_NAME)
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(f"No provenance manifest found in {directory}.")
+        self.directory = directory
+        with open(manifest_path) as f:
+            self.manifest = json.load(f)
+        self._arrays = {}
+
+    #----------------------------------------------------------------
+    @property
+    def relations(self):
+        """
+            Returns the list of the relations of the provenance.
+        """
+        return list(self.manifest.keys())
+
+    #----------------------------------------------------------------
+    def _get_relation(self,
+        relation_name: str
+        ) -> tuple:
+        """
+            Returns the manifest entry and the memory-mapped arrays of
+            a relation, loaded on first access.
+        """
+        if relation_name not in self.manifest:
+            raise KeyError(f"Relation {relation_name} not found in the provenance, "
+                           f"available relations: {self.relations}.")
+        if relation_name not in self._arrays:
+            self._arrays[relation_name] = {
+                array_name: np.load(
+                    os.path.join(self.directory, f"{relation_name}_{array_name}.npy"),
+                    mmap_mode='r'
+                )
+                for array_name in PROVENANCE_ARRAYS
+            }
+        return self.manifest[relation_name], self._arrays[relation_name]
+
+    #----------------------------------------------------------------
+    def _get_column_range(self,
+        relation: dict,
+        column: str
+        ) -> tuple:
+        """
+            Returns the range of the entries of a column in the arrays
+            of a relation, from the column offsets of its manifest.
+        """
+        if column not in relation['columns']:
+            raise KeyError(f"Column {column} not found, available columns: "
+                           f"{relation['columns']}.")
+        column_index = relation['columns'].index(column)
+        return (relation['column_offsets'][column_index],
+                relation['column_offsets'][column_index + 1])
+
+    #----------------------------------------------------------------
+    def get_step_table(self,
+        relation_name: str
+        ) -> pd.DataFrame:
+        """
+            Returns a DataFrame describing the steps of a relation
+            (operation, function, column) and the number of cells each
+            one modified.
+        """
+        relation, arrays = self._get_relation(relation_name)
+        step_table = pd.DataFrame(relation['steps'])
+        step_table['nb_cells'] = np.bincount(arrays['steps'], minlength=len(step_table))
+        step_table.index.name = 'step'
+        return step_table
+
+    #----------------------------------------------------------------
+    def get_cells(self,
+        relation_name: str,
+        function: str = None,
+        operation: str = None,
+        column: str = None,
+        step: int = None
+        ) -> pd.DataFrame:
+        """
+            Returns the cells of a relation modified by the steps
+            matching all the specified filters (name of the pollution
+            function, operation, column, index of the step), as a
+            DataFrame with the position of the row, the column and the
+            step. A cell modified by several matching steps appears
+            once per step.
+        """
+        relation, arrays = self._get_relation(relation_name)
+        matching_steps = np.array([
+            (function is None or description['function'] == function)
+            and (operation is None or description['operation'] == operation)
+            and (column is None or description['column'] == column)
+            and (step is None or step_index == step)
+            for step_index, description in enumerate(relation['steps'])
+        ], dtype=bool)
+
+        # Only read the ranges of the columns of the matching steps
+        matching_columns = sorted(set(
+            relation['steps'][step_index]['column']
+            for step_index in np.flatnonzero(matching_steps)
+        ), key=relation['columns'].index)
+        positions, columns, steps = [], [], []
+        for matching_column in matching_columns:
+            lower, upper = self._get_column_range(relation, matching_column)
+            column_steps = arrays['steps'][lower:upper]
+            mask = matching_steps[column_steps]
+            positions.append(arrays['positions'][lower:upper][mask])
+            columns.append(arrays['columns'][lower:upper][mask])
+            steps.append(column_steps[mask])
+        return pd.DataFrame({
+            'position': np.concatenate(positions) if len(positions) > 0 else np.array([], dtype=np.int64),
+            'column': pd.Categorical.from_codes(
+                np.concatenate(columns) if len(columns) > 0 else np.array([], dtype=np.int8),
+                categories=relation['columns']
+            ),
+            'step': np.concatenate(steps) if len(steps) > 0 else np.array([], dtype=np.int8)
+        })
+
+    #----------------------------------------------------------------
+    def get_error_rates(self,
+        relation_name: str
+        ) -> pd.Series:
+        """
+            Returns the error rate of each column of a relation: the
+            proportion of its cells modified by at least one step.
+        """
+        relation, _ = self._get_relation(relation_name)
+        return pd.Series(
+            np.array(relation['nb_modified_cells']) / max(relation['nb_rows'], 1),
+            index=relation['columns'],
+            name='error_rate'
+        )
+
+    #----------------------------------------------------------------
+    def get_cell_steps(self,
+        relation_name: str,
+        position: int,
+        column: str
+        ) -> list:
+        """
+            Returns the list of the steps (index, operation, function)
+            that modified a cell, in order of application. The list is
+            empty if the cell was not modified.
+        """
+        relation, arrays = self._get_relation(relation_name)
+        lower, upper = self._get_column_range(relation, column)
+        positions = arrays['positions'][lower:upper]
+        if not 0 <= position <= np.iinfo(positions.dtype).max:
+            return []
+        # Search a value of the array's dtype, to avoid converting the array
+        position = positions.dtype.type(position)
+        first = np.searchsorted(positions, position, side='left')
+        last = np.searchsorted(positions, position, side='right')
+        return [
+            {'step': int(step_index), **relation['steps'][int(step_index)]}
+            for step_index in arrays['steps'][lower + first:lower + last]
+        ]
+
+    #----------------------------------------------------------------
+    def is_polluted(self,
+        relation_name: str,
+        position: int,
+        column: str
+        ) -> bool:
+        """
+            Returns True if the cell of a relation at the given row
+            position and column was modified by the pollution.
+        """
+        return len(self.get_cell_steps(relation_name, position, column)) > 0
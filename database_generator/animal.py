@@ -1,12 +1,13 @@
 import pandas as pd
 import numpy as np
-import random as rd
-from datetime import date, timedelta
-from faker import Faker
-fake = Faker()
+from datetime import date
 from shared_functions import (
     add_primary_key_values,
-    generate_random_dates)
+    generate_random_dates_array,
+    generate_uuid4_strings,
+    assign_foreign_key,
+    build_dense_key_map,
+    translate_keys)
 import logging
 
 logging.basicConfig(
@@ -27,7 +28,8 @@ class Animal():
                 nb_animals: int,
                 clinic_start_year: int = 2015,
                 last_operation_date: date = date.today(),
-                initial_augmentation_seed: int = None):
+                initial_augmentation_seed: int = None,
+                rng: np.random.Generator = None):
         """
             Initialize the instance with the data contained in csv
             file animal_list.csv included in the package, and the
@@ -39,6 +41,11 @@ class Animal():
             also included in package. If the breeds are modified in
             the base file, then these two files should be modified
             accordingly to document the weight range of added breeds.
+            Random draws are made with the generator rng (see class
+            RandomStreams), a new unseeded one is created if not
+            specified. When initial_augmentation_seed
+            is specified, it is used instead of rng to sample the base
+            animal profiles.
         """
         logging.info("Instantiating object from class Animal")
 
@@ -49,7 +56,7 @@ class Animal():
         if nb_animals < 100:
             raise ValueError(f"The number of animals should be"
                              f"at least 100.")
-        if clinic_start_year < 2000 | clinic_start_year > date.today().year:
+        if clinic_start_year < 2000 or clinic_start_year > date.today().year:
             raise ValueError(f"The clinic opening year should be between'"
                              f"2000 and the current year.")
         if last_operation_date.year - clinic_start_year < 5:
@@ -60,6 +67,11 @@ class Animal():
         self.nb_animals = nb_animals
         self.clinic_start_year = clinic_start_year
         self.last_operation_date = last_operation_date
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+        augmentation_seed = initial_augmentation_seed
+        if augmentation_seed is None:
+            augmentation_seed = self.rng
 
         nb_animal_base = nb_base_animals
         if nb_animals <= nb_animal_base:
@@ -67,13 +79,13 @@ class Animal():
                 n=nb_animals,
                 replace=True,
                 random_state=augmentation_seed
-            )
+            ).reset_index(drop=True)
         else:
             animal_additional = nb_animals - nb_animal_base
             duplicated_animal_data = base_animal_data.sample(
                 n=animal_additional,
                 replace=True,
-                random_state=initial_augmentation_seed
+                random_state=augmentation_seed
             )
             animal_data = pd.concat(
                 [base_animal_data, duplicated_animal_data],
@@ -121,18 +133,19 @@ class Animal():
             raise ValueError(f"The proportion of patients born before'"
                              f"the clinic's opening should be less than 50%.")
 
-        animal_data['dob'] = None
         nb_animals_born_before_opening = int(self.nb_animals*prop_born_before_opening)
         nb_animals_born_after_opening = self.nb_animals - nb_animals_born_before_opening
 
-        indices_animals_born_before_opening = np.random.choice(
-            animal_data.index,
+        # Rows are drawn by position, which does not rely on the labels
+        # of the index being unique
+        positions_animals_born_before_opening = self.rng.choice(
+            np.arange(len(animal_data)),
             size=nb_animals_born_before_opening,
             replace=False
         )
-        indices_animals_born_after_opening = np.setdiff1d(
-            animal_data.index,
-            indices_animals_born_before_opening
+        positions_animals_born_after_opening = np.setdiff1d(
+            np.arange(len(animal_data)),
+            positions_animals_born_before_opening
         )
 
         def distribute_quantity_per_year_progressive(
@@ -165,24 +178,32 @@ class Animal():
         def generate_random_dates_following_yearly_distribution(
                 years_counts: zip,
                 max_date: date
-            ):
+            ) -> np.ndarray:
             """
-                This function is used to generate a list of random
-                dates in a specific period of time, respecting a
-                given yearly distribution, ensure that none is higher
-                than a spcified max date.
+                This function is used to generate an array of random
+                dates (dtype datetime64[D]) in a specific period of time,
+                respecting a given yearly distribution, ensure that none
+                is higher than a spcified max date. The day offsets of
+                all the years are drawn in one call.
             """
-            generated_dates = []
-            for year, count in years_counts:
-                start_date = date(year, 1, 1)
-                end_date = date(year + 1, 1, 1) if year < max_date.year else max_date
-                days_range = (end_date - start_date).days
-                year_dates = [start_date + timedelta(
-                    days=rd.randrange(days_range)) for _ in range(count)
-                ]
-                generated_dates.extend(year_dates)
-            rd.shuffle(generated_dates)
-            return generated_dates
+            years_counts = list(years_counts)
+            if not years_counts:
+                return np.array([], dtype='datetime64[D]')
+            years, counts = zip(*years_counts)
+            years = np.array(years)
+            counts = np.array(counts, dtype=np.int64)
+            start_dates = (years - 1970).astype('datetime64[Y]').astype('datetime64[D]')
+            end_dates = (years - 1969).astype('datetime64[Y]').astype('datetime64[D]')
+            end_dates = np.where(
+                years < max_date.year,
+                end_dates,
+                np.datetime64(max_date, 'D')
+            )
+            days_ranges = (end_dates - start_dates).astype(np.int64)
+
+            offsets = self.rng.integers(np.repeat(days_ranges, counts))
+            generated_dates = np.repeat(start_dates, counts) + offsets.astype('timedelta64[D]')
+            return self.rng.permutation(generated_dates)
 
         # Randomly generate date of births for each year in range
         logging.info("Randomly generate dates of births for animals born before the clinic opened")
@@ -190,28 +211,21 @@ class Animal():
             years_counts = before_years_counts,
             max_date = self.last_operation_date
         )
-        
-        animal_data.loc[
-            indices_animals_born_before_opening,
-            'dob'
-            ] = generated_dob_before_opening
         # Randomly generate date of births after opening
         logging.info("Randomly generate dates of births for animals born after the clinic opened")
-        generated_dob_after_opening = generate_random_dates(
+        generated_dob_after_opening = generate_random_dates_array(
             min_date = date(self.clinic_start_year, 1, 1),
             max_date = self.last_operation_date,
-            n = nb_animals_born_after_opening
-        )
-        animal_data.loc[
-            indices_animals_born_after_opening,
-            'dob'
-            ] = generated_dob_after_opening
-
-        animal_data['dob'] = pd.to_datetime(
-            animal_data['dob'],
-            errors='coerce'
+            n = nb_animals_born_after_opening,
+            rng = self.rng
         )
 
+        # Write both samples straight into a datetime64 column
+        dob = np.full(len(animal_data), np.datetime64('NaT'), dtype='datetime64[D]')
+        dob[positions_animals_born_before_opening] = generated_dob_before_opening
+        dob[positions_animals_born_after_opening] = generated_dob_after_opening
+        animal_data['dob'] = dob.astype('datetime64[ns]')
+
         logging.info(f"Generated Animal relation of size {len(animal_data)}")
         self.animal_data = animal_data
         return animal_data
@@ -222,17 +236,13 @@ class Animal():
         ):
         """
             Creates a new column ('hash_id') to the dataframe (animal_data)
-            and fill it with randomly generated hash values using package Faker.
+            and fill it with randomly generated UUID4 strings, generated
+            in one batch from the generator rng.
         """
         logging.info("Adding SK hash_id to relation Animal")
         if animal_data is None or len(animal_data) < self.nb_animals:
             animal_data = self.animal_data
-        hashes = []
-        for _ in range(self.nb_animals):
-            hashes.append(
-                fake.uuid4()
-            )
-        animal_data['hash_id'] = np.array(hashes)
+        animal_data['hash_id'] = generate_uuid4_strings(self.nb_animals, self.rng)
         return animal_data
     
     #----------------------------------------------------------------
@@ -320,10 +330,11 @@ class Animal():
             raise ValueError("DataFrames microchip_data and animal_data "
                              f"must be of the same size")
 
-        animal_data = animal_data.merge(
-            microchip_data[['id_tmp', 'id_microchip']],
-            on='id_tmp',
-            how='left'
+        animal_data = assign_foreign_key(
+            dataframe=animal_data,
+            key_column='id_tmp',
+            reference=microchip_data,
+            fk_column='id_microchip'
         )
 
         self.animal_data = animal_data
@@ -368,13 +379,19 @@ class AnimalWeigth():
                 animal_data: pd.DataFrame,
                 appointment_data: pd.DataFrame,
                 cat_breed_weight_range: pd.DataFrame,
-                dog_breed_weight_range: pd.DataFrame):
+                dog_breed_weight_range: pd.DataFrame,
+                rng: np.random.Generator = None,
+                min_nb_rows: int = 100):
         """
             Initialize the instance with the previouly generated
             DataFrames animal_data and appointment_data and the
             weight ranges for all represented breeds (csv files
             cat_breed_weight_range and dog_breed_weight_range
             included in package).
+            Random draws are made with the generator rng, a new
+            unseeded one is created if not specified.
+            Both DataFrames must contain at least min_nb_rows rows
+            (lower it to generate the weights of a few animals only).
         """
         logging.info("Instantiating object from class AnimalWeight")
 
@@ -390,13 +407,13 @@ class AnimalWeigth():
             raise KeyError(f"Required columns 'id_animal', 'id_appointment',"
                            f"'appt_date' not found in DataFrame"
                            f"'appointment_data'")
-        if len(animal_data) < 100:
+        if len(animal_data) < min_nb_rows:
             raise ValueError(f"The number of rows of DataFrame animal_data "
-                             f"should be at least 100.")
-        if len(appointment_data) < 100:
+                             f"should be at least {min_nb_rows}.")
+        if len(appointment_data) < min_nb_rows:
             raise ValueError(f"The number of rows of DataFrame appointment_data "
-                             f"should be at least 100 (at least one appointment "
-                             f"per animal).")
+                             f"should be at least {min_nb_rows} (at least one "
+                             f"appointment per animal).")
 
         self.initial_weight_data = animal_data[
             ['id_animal', 'species', 'breed', 'gender']
@@ -405,6 +422,7 @@ class AnimalWeigth():
             ['id_animal', 'id_appointment', 'appt_date']
         ].sort_values(['appt_date', 'id_animal']).reset_index(drop=[True, True])
         self.animal_weight_data = []
+        self.rng = rng if rng is not None else np.random.default_rng()
 
     #----------------------------------------------------------------    
     def generate_animal_weight_data_df(self):
@@ -495,10 +513,8 @@ class AnimalWeigth():
         cats_n = len(cats_merged)
         dogs_n = len(dogs_merged)
 
-        rng = np.random.default_rng()
-
-        cat_uniforms = rng.random(cats_n)
-        dog_uniforms = rng.random(dogs_n)
+        cat_uniforms = self.rng.random(cats_n)
+        dog_uniforms = self.rng.random(dogs_n)
 
         cats_merged["weight"] = np.round(
             cat_min_w + (cat_max_w - cat_min_w) * cat_uniforms, 
@@ -555,8 +571,7 @@ class AnimalWeigth():
         first_mask = (df.groupby("id_animal")["id_appointment"]
                         .cumcount() == 0)
         n = len(df)
-        rng = np.random.default_rng()
-        offsets = rng.uniform(-0.1, 0.1, size=n)
+        offsets = self.rng.uniform(-0.1, 0.1, size=n)
         offsets[first_mask] = 0.0
 
         df["multiplier"] = 1.0 + offsets
@@ -604,4 +619,85 @@ class AnimalWeigth():
         self.animal_weight_data = animal_weight_data
         return animal_weight_data
 
+    #----------------------------------------------------------------
+    def generate_animal_weight_data_by_chunk(self,
+        chunk_size: int,
+        cat_breed_weight_range: pd.DataFrame,
+        dog_breed_weight_range: pd.DataFrame,
+        first_id_appointment: int,
+        pk_column_name: str = 'id_weight',
+        starting_id_value: int = 1
+        ):
+        """
+            Streaming version of the generation of relation
+            animal_weight: runs functions assign_initial_weight_to_animals
+            and assign_weight_per_appointment on chunks of chunk_size
+            animals (with the appointments of these animals), and
+            yields the weights of each chunk, so that only one chunk is
+            held at a time.
+            The identifiers (pk_column_name) are derived from the
+            consecutive values of id_appointment starting at
+            first_id_appointment (one weight per appointment), so that
+            they are those assign_id_weight would assign, whatever the
+            chunk size.
+            The random draws of each chunk are made with its own
+            generator, spawned from the instance's generator.
+        """
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}.")
+
+        initial_weight_data = self.initial_weight_data
+        appointment_data = self.appointment_data
+
+        # Position of the animal of each appointment, to group the
+        # appointments by chunk without searching them for each chunk
+        animal_positions = translate_keys(
+            build_dense_key_map(
+                initial_weight_data['id_animal'],
+                np.arange(len(initial_weight_data))
+            ),
+            appointment_data['id_animal']
+        )
+        if animal_positions.dtype.kind == 'f':
+            raise KeyError(f"Some animals of DataFrame appointment_data are not "
+                           f"found in DataFrame animal_data.")
+        nb_chunks = max(1, -(-len(initial_weight_data) // chunk_size))
+        appointment_chunks = animal_positions // chunk_size
+        appointment_order = np.argsort(appointment_chunks, kind='stable')
+        chunk_offsets = np.zeros(nb_chunks + 1, dtype=np.int64)
+        np.cumsum(np.bincount(appointment_chunks, minlength=nb_chunks), out=chunk_offsets[1:])
+        logging.info(f"Generating the weights of {len(initial_weight_data)} "
+                     f"animals in {nb_chunks} chunks of at most {chunk_size} animals.")
+
+        rng = self.rng
+        try:
+            for i, chunk_rng in enumerate(rng.spawn(nb_chunks)):
+                self.rng = chunk_rng
+                self.initial_weight_data = initial_weight_data.iloc[
+                    i * chunk_size:(i + 1) * chunk_size
+                ]
+                self.appointment_data = appointment_data.iloc[
+                    appointment_order[chunk_offsets[i]:chunk_offsets[i + 1]]
+                ]
+                chunk = self.assign_initial_weight_to_animals(
+                    cat_breed_weight_range = cat_breed_weight_range,
+                    dog_breed_weight_range = dog_breed_weight_range
+                )
+                chunk = self.assign_weight_per_appointment(
+                    initial_weight_data = chunk
+                )
+                chunk = chunk.sort_values('id_appointment').reset_index(drop=True)
+                chunk.insert(
+                    0,
+                    pk_column_name,
+                    chunk['id_appointment'] - first_id_appointment + starting_id_value
+                )
+                yield chunk
+        finally:
+            # Only keep the narrow input DataFrames, not the last chunk
+            self.rng = rng
+            self.initial_weight_data = initial_weight_data
+            self.appointment_data = appointment_data
+            self.animal_weight_data = []
+
 
@@ -1,11 +1,12 @@
 import pandas as pd
 import numpy as np
-import random as rd
-import holidays
 import warnings
 from datetime import date, timedelta
 from collections import defaultdict
-from shared_functions import add_primary_key_values, get_country_holidays
+from shared_functions import (
+    add_primary_key_values,
+    get_country_holidays,
+    assign_foreign_key)
 import logging
 
 logging.basicConfig(
@@ -30,7 +31,8 @@ class Appointment:
                 microchip_data: pd.DataFrame,
                 clinic_start_year: int = 2015,
                 last_operation_date: date = date.today(),
-                life_expectancy: int = 15
+                life_expectancy: int = 15,
+                rng: np.random.Generator = None
                 ):
         """
             Initialize the instance with the previously generated
@@ -39,6 +41,8 @@ class Appointment:
             when initializing class Animal, and the life expectancy
             of patients, to be used to assign a number of appointment
             to each patient.
+            Random draws are made with the generator rng, a new
+            unseeded one is created if not specified.
         """
         logging.info("Instantiating object from class Appointment")
 
@@ -57,6 +61,7 @@ class Appointment:
         self.clinic_start_year = clinic_start_year
         self.date_opening = date(self.clinic_start_year, 1, 1)
         self.life_expectancy = life_expectancy
+        self.rng = rng if rng is not None else np.random.default_rng()
 
     #---------------------------------------------------------------- 
     def generate_appointment_data_denorm_df(self):
@@ -96,26 +101,22 @@ class Appointment:
         if appointment_data_denorm is None:
             appointment_data_denorm = self.appointment_data_denorm
 
-        def define_nb_appointment_animal(dob):
-            """
-                Assign a number of appointments based on the date of
-                birth of the patient, while considering also the 
-                opening year of the clinic and the date of the last
-                appointment.
-            """
-            if pd.isnull(dob):
-                raise ValueError(f"Date of birth '{dob}' is null")
-            last_date = pd.Timestamp(self.last_operation_date)
-            start_date = max(dob, pd.Timestamp(self.date_opening))
-            end_date = min(dob + pd.DateOffset(years=self.life_expectancy), last_date)
-            years = (end_date - start_date).days / 365.25
-            app_range = int(years * 2)
-            nb_app = rd.randrange(app_range) if app_range > 0 else 1
-            return nb_app if nb_app > 0 else 1
-
-        appointment_data_denorm['nb_appointment'] = appointment_data_denorm['dob'].apply(
-            define_nb_appointment_animal
-        )
+        dob = pd.to_datetime(appointment_data_denorm['dob'])
+        if dob.isna().any():
+            raise ValueError(f"Date of birth is null for "
+                             f"{int(dob.isna().sum())} animals")
+
+        # Time range during which each animal can visit the clinic
+        start_date = dob.clip(lower=pd.Timestamp(self.date_opening))
+        end_date = (dob + pd.DateOffset(years=self.life_expectancy)).clip(
+            upper=pd.Timestamp(self.last_operation_date))
+        years = (end_date - start_date).dt.days.to_numpy() / 365.25
+        app_range = (years * 2).astype(np.int64)
+
+        # Random number of appointments below app_range, at least 1
+        nb_app = self.rng.integers(np.maximum(app_range, 1))
+        nb_app = np.where(app_range > 0, nb_app, 1)
+        appointment_data_denorm['nb_appointment'] = np.maximum(nb_app, 1)
 
         self.appointment_data_denorm = appointment_data_denorm
 
@@ -127,7 +128,8 @@ class Appointment:
         dataframe: pd.DataFrame,
         attribute: str,
         indices_list: list,
-        prop_dict: dict
+        prop_dict: dict,
+        rng: np.random.Generator = None
         ):
         """
             Fill values of a column (attribute) to the input DataFrame
@@ -138,7 +140,9 @@ class Appointment:
         """
 ## CONTROLER LE DICTIONNAIRE POUR VERIFIER LES CATEGORIES & PROP
 
-        shuffled_indices = np.random.permutation(indices_list)
+        if rng is None:
+            rng = np.random.default_rng()
+        shuffled_indices = rng.permutation(indices_list)
         total = len(shuffled_indices)
         counts = {k: int(v * total) for k, v in prop_dict.items()}
 
@@ -209,14 +213,16 @@ class Appointment:
             appointment_data_denorm,
             'appt_reason_1',
             indices_microchip_before_opening,
-            distribution_reason_microchipped_before_opening
+            distribution_reason_microchipped_before_opening,
+            self.rng
         )
 
         appointment_data_denorm = self._assign_visit_reason(
             appointment_data_denorm,
             'appt_reason_1',
             indices_microchip_after_opening,
-            distribution_reason_microchipped_after_opening
+            distribution_reason_microchipped_after_opening,
+            self.rng
         )
 
         self.appointment_data_denorm = appointment_data_denorm
@@ -249,45 +255,31 @@ class Appointment:
                            f"'appt_reason_1' not found in DataFrame"
                            f"'appointment_data_denorm'")
 
-        appointment_data_denorm['appt_date_1'] = None
-
-        def assign_first_visit_date(
-            implant_date: pd.Timestamp,
-            nb_visits: int,
-            clinic_start_year: int,
-            last_operation_date: date
-            ) -> pd.Timestamp:
-            """
-            """
-            start_date = date(clinic_start_year, 1, 1)
-            if pd.isnull(implant_date):
-                raise ValueError(f"Microchip implant date is null")
-            if pd.isnull(nb_visits) or nb_visits <= 0:
-                raise ValueError(f"Invalid number of visits: {nb_visits}")
-            min_date = max(implant_date, pd.Timestamp(start_date))
-            end_date = pd.Timestamp(last_operation_date)
-            max_days = (end_date - min_date).days
-            divider = max(1,nb_visits)
-            interval = max(1, int(max_days / divider))
-            offset_days = rd.randrange(interval)
-            return min_date + pd.Timedelta(days=offset_days)
-
-        non_initial_visit_tuples = appointment_data_denorm[
-            appointment_data_denorm['appt_reason_1'] != 'initial_visit'
-            ]
-        appointment_data_denorm['appt_date_1'] = non_initial_visit_tuples.apply(
-                lambda row: assign_first_visit_date(row['implant_date'], 
-                                                    row['nb_appointment'],
-                                                    self.clinic_start_year,
-                                                    self.last_operation_date),
-                axis=1
-            )
+        implant_date = pd.to_datetime(appointment_data_denorm['implant_date'])
+        nb_visits = appointment_data_denorm['nb_appointment'].to_numpy()
+        if implant_date.isna().any():
+            raise ValueError(f"Microchip implant date is null")
+        invalid_nb_visits = pd.isnull(nb_visits) | (nb_visits <= 0)
+        if invalid_nb_visits.any():
+            raise ValueError(f"Invalid number of visits: "
+                             f"{nb_visits[invalid_nb_visits][0]}")
+
+        # Initial visits take place on the microchip implant date, other
+        # first visits are drawn within the first 1/nb_visits of the time
+        # range from the implant date (or clinic's opening) to the last
+        # appointment date
+        is_initial_visit = (appointment_data_denorm['appt_reason_1'] == 'initial_visit').to_numpy()
+        implant_days = implant_date.to_numpy().astype('datetime64[D]')
+        min_date = np.maximum(
+            implant_days[~is_initial_visit],
+            np.datetime64(date(self.clinic_start_year, 1, 1), 'D')
+        )
+        max_days = (np.datetime64(self.last_operation_date, 'D') - min_date).astype(np.int64)
+        interval = np.maximum(1, (max_days / np.maximum(1, nb_visits[~is_initial_visit])).astype(np.int64))
 
-        initial_visit_tuples = appointment_data_denorm[
-            appointment_data_denorm['appt_reason_1'] == 'initial_visit'
-            ]
-        for row in initial_visit_tuples.itertuples():
-            appointment_data_denorm.loc[row.Index, 'appt_date_1'] = row.implant_date
+        appt_date_1 = implant_days.copy()
+        appt_date_1[~is_initial_visit] = min_date + self.rng.integers(interval)
+        appointment_data_denorm['appt_date_1'] = pd.to_datetime(appt_date_1)
 
         self.appointment_data_denorm = appointment_data_denorm
         return appointment_data_denorm
@@ -351,7 +343,7 @@ class Appointment:
             end_date = pd.Timestamp(max_date)
             revised_max_day=min(max_day, (end_date-last_visit_date).days)
             days_range=max(1,revised_max_day-min_day)
-            offset_days = rd.randrange(days_range)
+            offset_days = int(self.rng.integers(days_range))
             return last_visit_date + pd.Timedelta(days=min_day + offset_days)
 
         def assign_random_visit_date(
@@ -373,7 +365,7 @@ class Appointment:
                 raise ValueError(f"Last visit date {last_visit_date} is in the future of 31/12/2024")
             divider = max(nb_visits_remaining,1)
             interval = max(1, int(max_days / divider))
-            offset_days = rd.randrange(interval)
+            offset_days = int(self.rng.integers(interval))
             return last_visit_date + pd.Timedelta(days=offset_days)
         
         while n <= max_n:
@@ -395,10 +387,11 @@ class Appointment:
                     ].index
 
                 indices_last_visit_sickness_injury_list = indices_last_visit_sickness_injury.tolist()
-                selected_indices_last_visit_sickness_injury = rd.sample(
+                selected_indices_last_visit_sickness_injury = self.rng.choice(
                     indices_last_visit_sickness_injury_list,
-                    round(perc_followup * len(indices_last_visit_sickness_injury_list))
-                )
+                    size=round(perc_followup * len(indices_last_visit_sickness_injury_list)),
+                    replace=False
+                ).tolist()
 
                 other_indices = list(
                     set(indices) -
@@ -413,7 +406,8 @@ class Appointment:
                     appointment_data_denorm,
                     reason_attribute,
                     other_indices,
-                    prop_visit_non_followup
+                    prop_visit_non_followup,
+                    self.rng
                 )
 
                 ### assign visit date ###
@@ -511,6 +505,73 @@ class Appointment:
         self.appointment_data = appointment_data
         return appointment_data
 
+    #---------------------------------------------------------------- 
+    def generate_appointment_data_by_chunk(self,
+        chunk_size: int,
+        distribution_reason_microchipped_before_opening: dict = None,
+        distribution_reason_microchipped_after_opening: dict = None,
+        prop_visit_non_followup: dict = None,
+        perc_followup: float = 0.5
+        ) -> pd.DataFrame:
+        """
+            Streaming version of the generation of appointments: runs
+            functions assign_nb_appointments, assign_first_appointment_reason,
+            assign_first_appointment_date, assign_appointment_details
+            and reformatting_appointment_df on chunks of chunk_size
+            animals, so that the denormalized DataFrame (one column per
+            appointment rank) only ever holds one chunk. Only the
+            normalized appointments ('id_tmp','appt_date','appt_reason')
+            of the chunks are kept.
+            The random draws of each chunk are made with its own
+            generator, spawned from the instance's generator.
+            Returns DataFrame appointment_data.
+        """
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}.")
+
+        appointment_data_denorm = self.appointment_data_denorm
+        nb_chunks = max(1, -(-len(appointment_data_denorm) // chunk_size))
+        logging.info(f"Generating the appointments of "
+                     f"{len(appointment_data_denorm)} animals in {nb_chunks} "
+                     f"chunks of at most {chunk_size} animals.")
+
+        rng = self.rng
+        chunks = []
+        for i, chunk_rng in enumerate(rng.spawn(nb_chunks)):
+            self.rng = chunk_rng
+            chunk = appointment_data_denorm.iloc[
+                i * chunk_size:(i + 1) * chunk_size
+            ].copy()
+            chunk = self.assign_nb_appointments(
+                appointment_data_denorm = chunk
+            )
+            chunk = self.assign_first_appointment_reason(
+                appointment_data_denorm = chunk,
+                distribution_reason_microchipped_before_opening = distribution_reason_microchipped_before_opening,
+                distribution_reason_microchipped_after_opening = distribution_reason_microchipped_after_opening
+            )
+            chunk = self.assign_first_appointment_date(
+                appointment_data_denorm = chunk
+            )
+            chunk = self.assign_appointment_details(
+                appointment_data_denorm = chunk,
+                prop_visit_non_followup = prop_visit_non_followup,
+                perc_followup = perc_followup
+            )
+            chunks.append(self.reformatting_appointment_df(
+                appointment_data_denorm = chunk
+            ))
+        self.rng = rng
+
+        # Only keep the narrow input DataFrame, not the last chunk
+        self.appointment_data_denorm = appointment_data_denorm
+        appointment_data = pd.concat(chunks, ignore_index=True)
+
+        logging.info(f"Normalized Appointment relation of size "
+                     f"{len(appointment_data)} generated by chunk.")
+        self.appointment_data = appointment_data
+        return appointment_data
+
     #---------------------------------------------------------------- 
     #@staticmethod
     def correction_appt_date_daysoff(self,
@@ -547,7 +608,7 @@ class Appointment:
                 start_of_next_week = date + timedelta(days=days_until_monday)
                 working_days = [i for i in range(7) if i not in weekly_days_off]
                 valid_days = [start_of_next_week + timedelta(days=i) for i in working_days]
-                date = rd.choice(valid_days)
+                date = valid_days[self.rng.integers(len(valid_days))]
             return date
 
         appointment_data['appt_date'] = appointment_data.apply(
@@ -603,10 +664,11 @@ class Appointment:
             raise KeyError(f"Required column 'id_tmp' not found"
                            f"in DataFrame 'animal_data'")
                            
-        appointment_data = appointment_data.merge(
-            animal_data[['id_tmp', 'id_animal']],
-            on='id_tmp',
-            how='left'
+        appointment_data = assign_foreign_key(
+            dataframe=appointment_data,
+            key_column='id_tmp',
+            reference=animal_data,
+            fk_column='id_animal'
         )
 
         self.appointment_data = appointment_data
@@ -709,9 +771,9 @@ class Appointment:
                 available = [owner for owner in list_id_owners if owner in unused_owners]
                 
                 if not available:
-                    chosen_owner = int(rd.choice(list_id_owners))
+                    chosen_owner = int(self.rng.choice(list_id_owners))
                 else:
-                    chosen_owner = int(rd.choice(available))
+                    chosen_owner = int(self.rng.choice(available))
                     unused_owners.discard(chosen_owner)
                     used_owners.add(chosen_owner)
                 
@@ -739,10 +801,11 @@ class Appointment:
         if appointment_data is None or len(appointment_data) == 0:
             appointment_data = self.appointment_data
 
-        appointment_data = appointment_data.merge(
-            owner_data[['id_owner_tmp', 'id_owner']],
-            on='id_owner_tmp',
-            how='left'
+        appointment_data = assign_foreign_key(
+            dataframe=appointment_data,
+            key_column='id_owner_tmp',
+            reference=owner_data,
+            fk_column='id_owner'
         )
 
         self.appointment_data = appointment_data
@@ -1,20 +1,17 @@
 import pandas as pd
 import numpy as np
-import random as rd
 import math
 import string
-import holidays
 from dateutil import relativedelta
 from datetime import date, datetime, timedelta
 from pandas.tseries.offsets import MonthEnd, MonthBegin
 from bisect import bisect_left
-from faker import Faker
-fake = Faker()
 from shared_functions import (
     add_primary_key_values,
     generate_random_strings,
     select_random_date_in_range,
     generate_random_dates)
+from database_generator.profile_pool import ProfilePool
 import logging
 
 logging.basicConfig(
@@ -34,11 +31,17 @@ class Doctor:
         yearly_turnover: float = 1/8,
         weekly_worked_days: int = 6,
         daily_max_worked_hours: int = 8,
-        yearly_holiday_weeks: int = 5
+        yearly_holiday_weeks: int = 5,
+        rng: np.random.Generator = None,
+        profile_pool: ProfilePool = None
         ):
         """
             Initialize the instance with the previously generated
             DataFrame appointment_data and other input parameters.
+            Random draws are made with the generator rng (see class
+            RandomStreams), and the doctors' names are sampled from
+            the pools of profile_pool (see class ProfilePool). New
+            unseeded ones are created if not specified.
         """
         logging.info("Instantiating object from class Doctor")
 
@@ -55,6 +58,10 @@ class Doctor:
 
         self.max_monthly_hours_doctor = (daily_max_worked_hours * weekly_worked_days * (52-yearly_holiday_weeks))/12
         self.monthly_turnover = yearly_turnover/12
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.profile_pool = profile_pool if profile_pool is not None else ProfilePool(
+            fields=['first_name', 'last_name']
+        )
 
 
     #----------------------------------------------------------------
@@ -139,23 +146,16 @@ class Doctor:
         ):
         """
             Create the DataFrame doctor_data to store the data of
-            relation doctor. The attributes' values are mainly
-            generated with the help of package Faker.
+            relation doctor. The doctors' names are sampled from the
+            pools of values generated with package Faker (see class
+            ProfilePool).
         """
         logging.info("Start generating the doctors' profiles.")
 
-        doctors_first_names = []
-        for _ in range(nb_doctor):
-            doctors_first_names.append(
-                fake.first_name()
-            )
-        doctors_last_names = []
-        for _ in range(nb_doctor):
-            doctors_last_names.append(
-                fake.last_name()
-            )
+        doctors_first_names = self.profile_pool.sample('first_name', nb_doctor, self.rng)
+        doctors_last_names = self.profile_pool.sample('last_name', nb_doctor, self.rng)
 
-        license_numbers = generate_random_strings(nb_doctor)
+        license_numbers = generate_random_strings(nb_doctor, rng=self.rng)
 
         doctor_data = pd.DataFrame({
             'first_name': doctors_first_names,
@@ -196,7 +196,7 @@ class Doctor:
         available_indices = doctor_data.index
 
         for key, value in specialy_dict.items():
-            indices_category = np.random.choice(
+            indices_category = self.rng.choice(
                 available_indices,
                 size=value,
                 replace=False
@@ -243,7 +243,7 @@ class Doctor:
         max_index = doctor_data.index.max()
         indices_late = range(nb_doctor_min,max_index+1)
         late_start_min_date = first_appt_date + timedelta(days=min_contract)
-        late_start_dates = generate_random_dates(late_start_min_date, last_appt_date, len(indices_late))
+        late_start_dates = generate_random_dates(late_start_min_date, last_appt_date, len(indices_late), self.rng)
         late_start_dates.sort()
 
         doctor_data.loc[indices_late, 'start_date'] = late_start_dates
@@ -257,7 +257,7 @@ class Doctor:
                 min_end_date = doctor_data.loc[j, 'start_date']
                 if min_end_date <= last_appt_date:
                     max_end_date = min_end_date + timedelta(days=max_overlap)
-                    random_date = select_random_date_in_range(min_end_date, max_end_date)
+                    random_date = select_random_date_in_range(min_end_date, max_end_date, self.rng)
                     doctor_data.loc[i, 'end_date'] = random_date
                     i=i+1
                     a=a+1
@@ -273,14 +273,14 @@ class Doctor:
         left_end_nb = len(left_end_indices)
         left_to_add = nb_doctor_min - left_end_nb
         if left_to_add < 0:
-            remove_indices = np.random.choice(
+            remove_indices = self.rng.choice(
                 left_end_indices,
                 size=(left_to_add*-1),
                 replace=False
             )
             doctor_data.drop(index=remove_indices)
         elif left_to_add > 0:
-            add_indices = np.random.choice(
+            add_indices = self.rng.choice(
                 not_left_end_indices,
                 size=left_to_add,
                 replace=False
@@ -340,19 +340,50 @@ class Doctor:
         doctor_data_copy['start_date'] = pd.to_datetime(doctor_data_copy['start_date'])
         doctor_data_copy['end_date'] = pd.to_datetime(doctor_data_copy['end_date'])
 
+        months = pd.to_datetime(monthly_demand["month"]).reset_index(drop=True)
+        last_days_month = months + MonthEnd(0)
+
+        # A doctor is available from the first month ending after its start
+        # date to the last month starting before its end date: both are
+        # found with a binary search in the sorted months, and the doctors
+        # available each month are grouped once (in their original order)
+        month_order = np.argsort(months.to_numpy(), kind='stable')
+        first_months = np.searchsorted(
+            last_days_month.to_numpy()[month_order],
+            doctor_data_copy['start_date'].to_numpy(),
+            side='left'
+        )
+        last_months = np.searchsorted(
+            months.to_numpy()[month_order],
+            doctor_data_copy['end_date'].fillna(pd.Timestamp.max).to_numpy(),
+            side='right'
+        ) - 1
+        nb_available_months = np.maximum(last_months - first_months + 1, 0)
+
+        doctor_positions = np.repeat(np.arange(len(doctor_data_copy)), nb_available_months)
+        month_ranks = (
+            np.repeat(first_months, nb_available_months)
+            + np.arange(len(doctor_positions))
+            - np.repeat(np.cumsum(nb_available_months) - nb_available_months, nb_available_months)
+        )
+        month_positions = month_order[month_ranks]
+        availability_order = np.lexsort((doctor_positions, month_positions))
+        doctor_positions = doctor_positions[availability_order]
+        month_offsets = np.searchsorted(
+            month_positions[availability_order],
+            np.arange(len(months) + 1)
+        )
+
         monthly_summary_rows = []
         employees_monthly_rows = []
 
-        for _, demand_row in monthly_demand.iterrows():
+        for m, (_, demand_row) in enumerate(monthly_demand.iterrows()):
             month = demand_row["month"]
             total_hours = demand_row["hours"]
-            nxt_mnth = month.replace(day=28) + timedelta(days=4)
-            last_day_month = nxt_mnth - timedelta(days=nxt_mnth.day)
+            last_day_month = last_days_month[m]
 
-            available_doctors = doctor_data_copy[
-                (doctor_data_copy["start_date"] <= last_day_month) &
-                ((doctor_data_copy["end_date"].isna())
-                | (doctor_data_copy["end_date"] >= month))
+            available_doctors = doctor_data_copy.iloc[
+                doctor_positions[month_offsets[m]:month_offsets[m+1]]
             ].copy()
 
             if available_doctors.empty:
@@ -362,7 +393,7 @@ class Doctor:
             available_doctors["max_monthly_hours"] = 0
             available_doctors["assigned_hours"]    = 0
 
-            available_doctors["max_monthly_hours"] = np.random.choice(
+            available_doctors["max_monthly_hours"] = self.rng.choice(
                 weekly_max_working_hours,
                 size=len(available_doctors)
             )
@@ -0,0 +1,152 @@
+import os
+import bz2
+import gzip
+import lzma
+import time
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="- %(levelname)s - %(asctime)s - %(message)s"
+)
+
+# Compression of the exported files: file extension and function opening
+# the file in text mode
+COMPRESSIONS = {
+    None: ('', open),
+    'gzip': ('.gz', gzip.open),
+    'bz2': ('.bz2', bz2.open),
+    'xz': ('.xz', lzma.open)
+}
+
+def export_relation(
+    relation: pd.DataFrame,
+    path: str,
+    compression: str = None,
+    chunk_size: int = 100000
+    ) -> dict:
+    """
+        Write a relation in the csv file path (with the same content
+        as relation.to_csv(path)), by chunks of chunk_size rows, so
+        that the formatting of a chunk overlaps the writing of the
+        previous ones when relations are exported concurrently. The
+        file is compressed if compression is specified (see
+        COMPRESSIONS), its extension being appended to path.
+        Returns the path, number of rows, number of bytes written and
+        duration of the export.
+        Defined at module level to be usable in a process pool.
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression '{compression}', expected one "
+                         f"of {list(COMPRESSIONS.keys())}.")
+    extension, open_file = COMPRESSIONS[compression]
+    path = f"{path}{extension}"
+
+    start_time = time.perf_counter()
+    with open_file(path, 'wt', newline='') as file:
+        relation.iloc[:0].to_csv(file)
+        for chunk_start in range(0, len(relation), chunk_size):
+            relation.iloc[chunk_start:chunk_start + chunk_size].to_csv(file, header=False)
+    duration = time.perf_counter() - start_time
+
+    return {
+        'path': path,
+        'nb_rows': len(relation),
+        'nb_bytes': os.path.getsize(path),
+        'duration': duration
+    }
+
+#----------------------------------------------------------------
+def export_relation_chunks(
+    chunks,
+    path: str,
+    columns: list,
+    compression: str = None
+    ) -> dict:
+    """
+        Write in the csv file path the relation formed by the
+        DataFrames yielded by chunks (e.g. by a function generating a
+        relation chunk by chunk), restricted to columns, with the same
+        content as the concatenation of the chunks (with a new index)
+        written by export_relation. Only one chunk is held at a time.
+        See function export_relation for compression.
+        Returns the path, number of rows, number of bytes written and
+        duration of the export (including the generation of the
+        chunks).
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression '{compression}', expected one "
+                         f"of {list(COMPRESSIONS.keys())}.")
+    extension, open_file = COMPRESSIONS[compression]
+    path = f"{path}{extension}"
+
+    start_time = time.perf_counter()
+    nb_rows = 0
+    with open_file(path, 'wt', newline='') as file:
+        pd.DataFrame(columns=columns).to_csv(file)
+        for chunk in chunks:
+            chunk = chunk[columns]
+            chunk.index = pd.RangeIndex(nb_rows, nb_rows + len(chunk))
+            chunk.to_csv(file, header=False)
+            nb_rows += len(chunk)
+    duration = time.perf_counter() - start_time
+
+    logging.info(f"Saved {nb_rows} rows in {path} by chunks ({duration:.2f}s).")
+    return {
+        'path': path,
+        'nb_rows': nb_rows,
+        'nb_bytes': os.path.getsize(path),
+        'duration': duration
+    }
+
+#----------------------------------------------------------------
+def export_relations(
+    relations: dict,
+    output_directory: str,
+    nb_workers: int = 4,
+    compression: str = None,
+    chunk_size: int = 100000,
+    use_processes: bool = False
+    ) -> pd.DataFrame:
+    """
+        Write the relations (dictionnary mapping the name of the file,
+        without extension, to the DataFrame of the relation) in csv
+        files in output_directory, nb_workers at a time in a thread
+        pool (or in a process pool if use_processes is True, which
+        formats the relations in parallel at the cost of copying them
+        to the worker processes). The largest relations are submitted
+        first. See function export_relation for compression and
+        chunk_size.
+        Returns a DataFrame reporting, for each relation, the number of
+        rows and bytes written, the duration of the export, and the
+        rows and megabytes written per second.
+    """
+    os.makedirs(output_directory, exist_ok=True)
+    names = sorted(relations, key=lambda name: len(relations[name]), reverse=True)
+    arguments = [
+        (relations[name], os.path.join(output_directory, f"{name}.csv"), compression, chunk_size)
+        for name in names
+    ]
+
+    start_time = time.perf_counter()
+    if nb_workers > 1:
+        executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with executor_class(max_workers=nb_workers) as executor:
+            results = list(executor.map(export_relation, *zip(*arguments)))
+    else:
+        results = [export_relation(*args) for args in arguments]
+    total_duration = time.perf_counter() - start_time
+
+    export_report = pd.DataFrame(results, index=pd.Index(names, name='relation'))
+    export_report['rows_per_second'] = export_report['nb_rows'] / export_report['duration']
+    export_report['megabytes_per_second'] = export_report['nb_bytes'] / 2**20 / export_report['duration']
+    for name, row in export_report.iterrows():
+        logging.info(f"Saved {row['nb_rows']} rows of relation {name} in {row['path']} "
+                     f"({row['nb_bytes'] / 2**20:.1f} MB, {row['duration']:.2f}s, "
+                     f"{row['rows_per_second']:.0f} rows/s, "
+                     f"{row['megabytes_per_second']:.1f} MB/s).")
+    logging.info(f"Saved {len(relations)} relations ({export_report['nb_bytes'].sum() / 2**20:.1f} MB) "
+                 f"in {total_duration:.2f}s with {nb_workers} workers.")
+    return export_report
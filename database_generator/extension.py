@@ -0,0 +1,478 @@
+import os
+import pandas as pd
+import numpy as np
+from datetime import date, timedelta
+from database_generator.appointment import Appointment
+from shared_functions import (
+    add_primary_key_values,
+    generate_random_dates_array,
+    generate_uuid4_strings,
+    translate_keys,
+    build_dense_key_map)
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="- %(levelname)s - %(asctime)s - %(message)s"
+)
+
+# Relations of the clean database instance, saved as <relation>_rel.csv
+RELATION_NAMES = [
+    'microchip_code',
+    'microchip',
+    'animal',
+    'animal_weight',
+    'service',
+    'appointment',
+    'appointment_services',
+    'slot',
+    'appointment_slot',
+    'owner',
+    'animal_owner',
+    'doctor',
+    'doctor_historization'
+]
+
+def load_relations(
+    directories: list,
+    relation_names: list = None,
+    suffix: str = 'rel'
+    ) -> dict:
+    """
+        Returns a dictionnary of the relations of a clean database
+        instance (by default RELATION_NAMES), read from the files
+        <relation>_<suffix>.csv of the specified directories: the
+        directory of the generated instance, followed by the
+        directories of its successive extensions (if any), whose rows
+        are appended. Rows of relation doctor written by an extension
+        update the existing ones (same id_doctor).
+        Use suffix 'au' to read the instance polluted with artificial
+        unicity.
+    """
+    if relation_names is None:
+        relation_names = RELATION_NAMES
+
+    relations = {}
+    for relation_name in relation_names:
+        relation_parts = []
+        for directory in directories:
+            path = os.path.join(directory, f"{relation_name}_{suffix}.csv")
+            if os.path.exists(path):
+                relation_parts.append(pd.read_csv(path, index_col=0))
+        if len(relation_parts) == 0:
+            raise KeyError(f"No file found for relation '{relation_name}' "
+                           f"in directories {directories}.")
+        relation = pd.concat(relation_parts, ignore_index=True)
+        if relation_name == 'doctor':
+            relation = relation.drop_duplicates(
+                'id_doctor', keep='last'
+            ).sort_values('id_doctor').reset_index(drop=True)
+        relations[relation_name] = relation
+    return relations
+
+
+class InstanceExtension():
+    """
+        This class is used to extend an existing clean database
+        instance to a later last operation date, to mimic a live
+        clinic. Only the new tuples (delta) of each relation are
+        generated: the monthly working conditions of the doctors still
+        working at the clinic, the appointments continuing the
+        timeline of the living animals, and the new patients with
+        their microchips. New values of the surrogate keys are
+        allocated above the current maximum of each relation.
+        The slots, appointment services and weights of the new period
+        are then generated with classes Slot, Service and AnimalWeigth.
+    """
+    def __init__(self,
+        relations: dict,
+        last_operation_date: date,
+        rng: np.random.Generator = None
+        ):
+        """
+            Initialize the instance with the relations of the existing
+            instance (see function load_relations) and the new last
+            appointment date. The new period starts the day after the
+            last period of relation doctor_historization.
+            Random draws are made with the generator rng, a new
+            unseeded one is created if not specified.
+        """
+        logging.info("Instantiating object from class InstanceExtension")
+
+        self.relations = relations
+        self.last_operation_date = last_operation_date
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+        doctor_historization = relations['doctor_historization']
+        self.opening_date = pd.to_datetime(doctor_historization['period_start_date']).min()
+        self.period_start_date = (
+            pd.to_datetime(doctor_historization['period_end_date']).max()
+            + pd.Timedelta(days=1)
+        )
+        self.period_end_date = pd.Timestamp(last_operation_date)
+        if self.period_end_date < self.period_start_date:
+            raise ValueError(f"The new last operation date {last_operation_date} "
+                             f"should be after the end of the existing instance "
+                             f"({self.period_start_date.date() - timedelta(days=1)}).")
+        self.nb_period_days = (self.period_end_date - self.period_start_date).days + 1
+        logging.info(f"Extending the instance from {self.period_start_date.date()} "
+                     f"to {self.period_end_date.date()}.")
+
+    #----------------------------------------------------------------
+    def get_next_id(self,
+        relation_name: str,
+        pk_column_name: str
+        ) -> int:
+        """
+            Return the first value of the surrogate key pk_column_name
+            available for the new tuples of a relation.
+        """
+        relation = self.relations[relation_name]
+        if len(relation) == 0:
+            return 1
+        return int(relation[pk_column_name].max()) + 1
+
+    #----------------------------------------------------------------
+    def extend_doctor_historization(self,
+        max_monthly_hours: list = [200, 175, 150, 125, 100]
+        ):
+        """
+            Create the new tuples of relation doctor_historization:
+            one per month of the new period and doctor still working at
+            the clinic (no end date, or an end date after the start of
+            the month). Doctors keep the maximal workload of their last
+            period, or get one drawn from max_monthly_hours if they had
+            none. Returns the updated tuples of relation doctor (latest
+            working conditions) and the new tuples of relation
+            doctor_historization.
+        """
+        logging.info(f"Adding the monthly working conditions of the new "
+                     f"period to relation Doctor_Historization.")
+
+        doctor_data = self.relations['doctor'].copy()
+        doctor_historization = self.relations['doctor_historization'].copy()
+        doctor_historization['period_start_date'] = pd.to_datetime(
+            doctor_historization['period_start_date']
+        )
+        last_periods = doctor_historization.sort_values(
+            'period_start_date'
+        ).drop_duplicates('id_doctor', keep='last').set_index('id_doctor')
+
+        months = pd.date_range(
+            self.period_start_date.to_period('M').start_time,
+            self.period_end_date,
+            freq='MS'
+        )
+        end_dates = pd.to_datetime(doctor_data['end_date']).fillna(pd.Timestamp.max)
+
+        rows = []
+        for month in months:
+            active_doctors = doctor_data[
+                (pd.to_datetime(doctor_data['start_date']) <= month + pd.offsets.MonthEnd(0))
+                & (end_dates >= month)
+            ]
+            for doctor in active_doctors.itertuples(index=False):
+                if doctor.id_doctor in last_periods.index:
+                    monthly_hours = int(last_periods.loc[doctor.id_doctor, 'max_monthly_hours'])
+                else:
+                    monthly_hours = int(self.rng.choice(max_monthly_hours))
+                rows.append({
+                    'id_doctor': doctor.id_doctor,
+                    'first_name': doctor.first_name,
+                    'last_name': doctor.last_name,
+                    'specialty': doctor.specialty,
+                    'license_number': doctor.license_number,
+                    'period_start_date': max(month, self.period_start_date),
+                    'period_end_date': month + pd.offsets.MonthEnd(0),
+                    'max_monthly_hours': monthly_hours
+                })
+
+        doctor_historization_delta = pd.DataFrame(rows, columns=[
+            'id_doctor', 'first_name', 'last_name', 'specialty', 'license_number',
+            'period_start_date', 'period_end_date', 'max_monthly_hours'
+        ]).sort_values(['period_start_date', 'id_doctor']).reset_index(drop=True)
+        doctor_historization_delta = add_primary_key_values(
+            relation=doctor_historization_delta,
+            pk_column_name='id_doctor_histo',
+            starting_id_value=self.get_next_id('doctor_historization', 'id_doctor_histo')
+        )
+
+        # Latest working conditions of the doctors working in the last month
+        last_month = doctor_historization_delta[
+            doctor_historization_delta['period_start_date']
+            == doctor_historization_delta['period_start_date'].max()
+        ]
+        doctor_delta = doctor_data[
+            doctor_data['id_doctor'].isin(last_month['id_doctor'])
+        ].drop(columns=['max_monthly_hours', 'period_start_date', 'period_end_date'])
+        doctor_delta = doctor_delta.merge(
+            last_month[['id_doctor', 'max_monthly_hours', 'period_start_date', 'period_end_date']],
+            on='id_doctor',
+            how='left'
+        ).reset_index(drop=True)
+
+        logging.info(f"Generated {len(doctor_historization_delta)} new tuples "
+                     f"of relation Doctor_Historization for "
+                     f"{doctor_historization_delta['id_doctor'].nunique()} doctors.")
+        return doctor_delta, doctor_historization_delta
+
+    #----------------------------------------------------------------
+    def continue_appointments(self,
+        life_expectancy: int = 15,
+        prop_visit_non_followup: dict = None
+        ) -> pd.DataFrame:
+        """
+            Create the appointments of the new period for the animals
+            of the existing instance still alive (younger than
+            life_expectancy years). Each animal visits the clinic about
+            once a year: its number of new appointments follows a
+            Poisson distribution of mean the length of the new period
+            in years, and their dates are drawn uniformly in the
+            period. Reasons follow the distribution
+            prop_visit_non_followup.
+            Returns a DataFrame with columns 'id_animal', 'appt_date'
+            and 'appt_reason'.
+        """
+        logging.info(f"Continuing the appointment timeline of the living "
+                     f"animals during the new period.")
+
+        if prop_visit_non_followup is None:
+            prop_visit_non_followup = {
+                'annual_visit':0.5,
+                'sick_pet':0.2,
+                'injured_pet':0.2,
+                'surgery':0.1
+            }
+
+        animal_data = self.relations['animal']
+        dob = pd.to_datetime(animal_data['dob'])
+        is_alive = (dob + pd.DateOffset(years=life_expectancy)) > self.period_start_date
+        living_animals = animal_data.loc[is_alive, 'id_animal'].to_numpy()
+
+        nb_appointments = self.rng.poisson(
+            self.nb_period_days / 365.25,
+            size=len(living_animals)
+        )
+        appointment_data = pd.DataFrame({
+            'id_animal': np.repeat(living_animals, nb_appointments),
+            'appt_date': pd.to_datetime(generate_random_dates_array(
+                min_date=self.period_start_date.date(),
+                max_date=self.period_end_date.date(),
+                n=int(nb_appointments.sum()),
+                rng=self.rng
+            )),
+            'appt_reason': None
+        })
+        appointment_data = Appointment._assign_visit_reason(
+            appointment_data,
+            'appt_reason',
+            appointment_data.index,
+            prop_visit_non_followup,
+            self.rng
+        )
+
+        logging.info(f"Generated {len(appointment_data)} appointments for "
+                     f"{len(living_animals)} living animals.")
+        return appointment_data
+
+    #----------------------------------------------------------------
+    def estimate_nb_new_animals(self) -> int:
+        """
+            Return the number of new patients of the new period, so
+            that the clinic keeps registering patients at the same
+            average daily rate as in the existing instance.
+        """
+        nb_existing_days = max(1, (self.period_start_date - self.opening_date).days)
+        daily_rate = len(self.relations['animal']) / nb_existing_days
+        return int(round(daily_rate * self.nb_period_days))
+
+    #----------------------------------------------------------------
+    def generate_new_animals(self,
+        base_animal_data: pd.DataFrame,
+        nb_new_animals: int,
+        dob_microchip_gap: int = 100
+        ) -> pd.DataFrame:
+        """
+            Create the new patients of the period: young animals
+            microchipped during the new period (between one and two
+            times dob_microchip_gap days after their birth), whose
+            profiles are sampled from base_animal_data (csv file
+            animal_list.csv included in the package).
+            Returns a DataFrame with a temporary id ('id_tmp') and
+            columns 'species', 'breed', 'name', 'gender', 'dob',
+            'hash_id' and 'implant_date'.
+        """
+        logging.info(f"Generating {nb_new_animals} new patients "
+                     f"microchipped during the new period.")
+
+        profiles = base_animal_data.iloc[
+            self.rng.integers(len(base_animal_data), size=nb_new_animals)
+        ].reset_index(drop=True)
+
+        implant_dates = generate_random_dates_array(
+            min_date=self.period_start_date.date(),
+            max_date=self.period_end_date.date(),
+            n=nb_new_animals,
+            rng=self.rng
+        )
+        gaps = 2*dob_microchip_gap - self.rng.integers(dob_microchip_gap, size=nb_new_animals)
+
+        animal_data = pd.DataFrame({
+            'species': profiles['species'],
+            'breed': profiles['breed'],
+            'name': profiles['name'],
+            'gender': profiles['gender'],
+            'dob': pd.to_datetime(implant_dates - gaps.astype('timedelta64[D]')),
+            'hash_id': generate_uuid4_strings(nb_new_animals, self.rng),
+            'implant_date': pd.to_datetime(implant_dates)
+        })
+        animal_data = add_primary_key_values(
+            relation=animal_data,
+            pk_column_name='id_tmp',
+            starting_id_value=1
+        )
+        return animal_data
+
+    #----------------------------------------------------------------
+    def assign_new_animal_ids(self,
+        animal_data: pd.DataFrame,
+        microchip_data: pd.DataFrame
+        ):
+        """
+            Assign the values of id_animal and id_microchip to the new
+            patients and their microchips (DataFrames animal_data and
+            microchip_data, joined on 'id_tmp'), in order of implant
+            date (their first appointment), above the existing values.
+            Returns both DataFrames with the new keys.
+        """
+        logging.info(f"Assigning id_animal and id_microchip values to the "
+                     f"new patients.")
+
+        animal_data = animal_data.sort_values(
+            ['implant_date', 'id_tmp']
+        ).reset_index(drop=True)
+        animal_data = add_primary_key_values(
+            relation=animal_data,
+            pk_column_name='id_animal',
+            starting_id_value=self.get_next_id('animal', 'id_animal')
+        )
+        animal_data['id_microchip'] = (
+            np.arange(len(animal_data)) + self.get_next_id('microchip', 'id_microchip')
+        )
+
+        microchip_positions = translate_keys(
+            build_dense_key_map(animal_data['id_tmp'].to_numpy(), np.arange(len(animal_data))),
+            microchip_data['id_tmp'].to_numpy()
+        )
+        microchip_data = microchip_data.copy()
+        microchip_data['id_microchip'] = animal_data['id_microchip'].to_numpy()[microchip_positions]
+        microchip_data = microchip_data.sort_values('id_microchip').reset_index(drop=True)
+        return animal_data, microchip_data
+
+    #----------------------------------------------------------------
+    def assign_new_animals_to_owners(self,
+        animal_data: pd.DataFrame
+        ) -> pd.DataFrame:
+        """
+            Create the new tuples of relation animal_owner: each new
+            patient joins the household of an existing owner, drawn at
+            random. Returns the DataFrame with columns
+            'id_animal_owner', 'id_microchip' and 'id_owner'.
+        """
+        logging.info(f"Assigning the new patients to existing owners.")
+        owner_ids = self.relations['owner']['id_owner'].to_numpy()
+        animal_owner_data = pd.DataFrame({
+            'id_microchip': animal_data['id_microchip'].to_numpy(),
+            'id_owner': owner_ids[self.rng.integers(len(owner_ids), size=len(animal_data))]
+        })
+        animal_owner_data = add_primary_key_values(
+            relation=animal_owner_data,
+            pk_column_name='id_animal_owner',
+            starting_id_value=self.get_next_id('animal_owner', 'id_animal_owner')
+        )
+        return animal_owner_data
+
+    #----------------------------------------------------------------
+    def assign_id_appointment(self,
+        appointment_data: pd.DataFrame,
+        new_animal_data: pd.DataFrame,
+        new_animal_owner_data: pd.DataFrame
+        ) -> pd.DataFrame:
+        """
+            Assign the values of id_appointment to the new appointments
+            (sorted by date and id_animal) above the existing values,
+            and the id_owner of each appointment, drawn among the owners
+            of the animal in relation animal_owner (completed with the
+            new patients of new_animal_data and their owners in
+            new_animal_owner_data).
+        """
+        logging.info(f"Assigning id_appointment and id_owner values to "
+                     f"the new appointments.")
+
+        appointment_data = appointment_data.sort_values(
+            ['appt_date', 'id_animal']
+        ).reset_index(drop=True)
+        appointment_data = add_primary_key_values(
+            relation=appointment_data,
+            pk_column_name='id_appointment',
+            starting_id_value=self.get_next_id('appointment', 'id_appointment')
+        )
+
+        animal_data = pd.concat([
+            self.relations['animal'][['id_animal', 'id_microchip']],
+            new_animal_data[['id_animal', 'id_microchip']]
+        ], ignore_index=True)
+        animal_owner_data = pd.concat([
+            self.relations['animal_owner'][['id_microchip', 'id_owner']],
+            new_animal_owner_data[['id_microchip', 'id_owner']]
+        ], ignore_index=True).sort_values('id_microchip', kind='stable')
+
+        # Draw one of the owners of each appointment's animal, the owners
+        # of a microchip being contiguous once sorted
+        appointment_microchips = translate_keys(
+            build_dense_key_map(
+                animal_data['id_animal'].to_numpy(),
+                animal_data['id_microchip'].to_numpy()
+            ),
+            appointment_data['id_animal'].to_numpy()
+        )
+        owner_microchips = animal_owner_data['id_microchip'].to_numpy()
+        first_owners = np.searchsorted(owner_microchips, appointment_microchips, side='left')
+        nb_owners = np.searchsorted(owner_microchips, appointment_microchips, side='right') - first_owners
+        if (nb_owners == 0).any():
+            raise KeyError(f"No owner found for the animals "
+                           f"{np.unique(appointment_data['id_animal'].to_numpy()[nb_owners == 0])}.")
+        appointment_data['id_owner'] = animal_owner_data['id_owner'].to_numpy()[
+            first_owners + self.rng.integers(nb_owners)
+        ]
+
+        logging.info(f"Generated {len(appointment_data)} new tuples of "
+                     f"relation Appointment.")
+        return appointment_data
+
+    #----------------------------------------------------------------
+    def get_initial_weights(self,
+        initial_weight_data: pd.DataFrame
+        ) -> pd.DataFrame:
+        """
+            Replace in DataFrame initial_weight_data (one weight per
+            animal, drawn from its breed's weight range, see class
+            AnimalWeigth) the weight of the animals of the existing
+            instance by their last recorded weight, varied by plus or
+            minus 10% for their first appointment of the new period.
+        """
+        animal_weight_data = self.relations['animal_weight'].sort_values(
+            ['id_animal', 'id_appointment']
+        ).drop_duplicates('id_animal', keep='last')
+        last_weights = initial_weight_data['id_animal'].map(
+            animal_weight_data.set_index('id_animal')['weight']
+        )
+        has_last_weight = last_weights.notna().to_numpy()
+
+        initial_weight_data = initial_weight_data.copy()
+        initial_weight_data.loc[has_last_weight, 'weight'] = np.round(
+            last_weights[has_last_weight].to_numpy()
+            * (1 + self.rng.uniform(-0.1, 0.1, size=int(has_last_weight.sum()))),
+            2
+        )
+        return initial_weight_data
@@ -1,8 +1,8 @@
 import pandas as pd
 import numpy as np
-import random as rd
-from datetime import date, timedelta
-from shared_functions import add_primary_key_values
+from shared_functions import (
+    add_primary_key_values,
+    sample_unique_integers)
 import logging
 
 logging.basicConfig(
@@ -77,11 +77,14 @@ class Microchip():
     """
     def __init__(self,
         animal_data: pd.DataFrame,
-        microchip_code_data: pd.DataFrame
+        microchip_code_data: pd.DataFrame,
+        rng: np.random.Generator = None
         ):
         """
             Initialize the instance with the previouly generated
             DataFrames animal_data and microchip_code_data.
+            Random draws are made with the generator rng, a new
+            unseeded one is created if not specified.
         """
         logging.info("Instantiating object from class Microchip")
 
@@ -95,6 +98,7 @@ class Microchip():
                      f"{len(self.microchip_data)}.")
 
         self.microchip_code_data = microchip_code_data
+        self.rng = rng if rng is not None else np.random.default_rng()
 
     #---------------------------------------------------------------- 
     def generate_microchip_data_df(self):
@@ -124,24 +128,28 @@ class Microchip():
         if microchip_data is None or len(microchip_data) == 0:
             microchip_data = self.microchip_data
 
-        microchip_data['implant_date'] = None
-        microchip_data['implant_date'] = [
-            microchip_data['dob'].iloc[i] + pd.Timedelta(
-                days=2*dob_microchip_gap - rd.randrange(dob_microchip_gap)
-                )
-            for i in range(len(microchip_data))
-        ]
+        gaps = 2*dob_microchip_gap - self.rng.integers(
+            dob_microchip_gap,
+            size=len(microchip_data)
+        )
+        microchip_data['implant_date'] = (
+            pd.to_datetime(microchip_data['dob']).to_numpy()
+            + gaps.astype('timedelta64[D]')
+        )
 
         self.microchip_data = microchip_data
         return microchip_data
 
     #----------------------------------------------------------------
     def assign_random_microchip_number(self,
-        microchip_data: pd.DataFrame = None
+        microchip_data: pd.DataFrame = None,
+        excluded_numbers: np.ndarray = None
         ):
         """
             Creates a new column ('microchip_number') to the DataFrame
-            microchip_data and fills it with random series of 10 digits.
+            microchip_data and fills it with distinct random series of
+            12 digits, different from the numbers already in use listed
+            in excluded_numbers (if any).
             Returns DataFrame microchip_data with newly added and filled
             column.
         """
@@ -151,13 +159,46 @@ class Microchip():
         if microchip_data is None or len(microchip_data) == 0:
             microchip_data = self.microchip_data
 
-        microchip_data['microchip_number'] = [
-            rd.randint(10**11, 10**12 - 1) for _ in range(len( microchip_data))
-        ]
+        microchip_data['microchip_number'] = sample_unique_integers(
+            low=10**11,
+            high=10**12,
+            n=len(microchip_data),
+            rng=self.rng,
+            excluded=excluded_numbers
+        )
 
         self.microchip_data = microchip_data
         return microchip_data
 
+    #---------------------------------------------------------------- 
+    def get_eligible_codes_per_year(self,
+        years: np.ndarray
+        ):
+        """
+            Precompute the table of microchip codes eligible for each
+            of the specified implant years: codes without market year,
+            or put on the market on or before the implant year.
+            Returns the sorted distinct years, and the eligible id_code
+            values of all years concatenated with the offset of each
+            year's list (the list of years[i] is
+            code_ids[offsets[i]:offsets[i+1]]).
+        """
+        market_years = self.microchip_code_data['market_year']
+        code_ids = self.microchip_code_data['id_code'].to_numpy()
+        years = np.unique(years)
+
+        # Sort the codes by market year (codes without market year first)
+        # so that each year's eligible codes form a prefix of the order
+        sort_keys = market_years.fillna(np.iinfo(np.int64).min).to_numpy(dtype=np.int64)
+        order = np.argsort(sort_keys, kind='stable')
+        nb_eligible = np.searchsorted(sort_keys[order], years, side='right')
+
+        offsets = np.concatenate([[0], np.cumsum(nb_eligible)])
+        eligible_code_ids = np.concatenate(
+            [code_ids[order[:k]] for k in nb_eligible]
+        ) if len(years) > 0 else code_ids[:0]
+        return years, eligible_code_ids, offsets
+
     #---------------------------------------------------------------- 
     def assign_fk_microchip_code(self,
         microchip_data: pd.DataFrame = None
@@ -174,19 +215,24 @@ class Microchip():
         if microchip_data is None or len(microchip_data) == 0:
             microchip_data = self.microchip_data
 
-        def get_valid_code(
-            implant_date: date
-            ):
-            implant_year = pd.to_datetime(implant_date).year
-            valid_codes = self.microchip_code_data[
-                self.microchip_code_data['market_year'].isna() 
-                | (self.microchip_code_data['market_year'] <= implant_year)
-            ]['id_code'].tolist()
-            return rd.choice(valid_codes)
-
-        microchip_data['id_code'] = microchip_data['implant_date'].apply(
-            get_valid_code
+        # Microchips without implant date are only eligible to the codes
+        # without market year
+        implant_years = pd.to_datetime(
+            microchip_data['implant_date']
+        ).dt.year.fillna(np.iinfo(np.int64).min + 1).to_numpy(dtype=np.int64)
+
+        years, eligible_code_ids, offsets = self.get_eligible_codes_per_year(
+            implant_years
         )
+        year_positions = np.searchsorted(years, implant_years)
+        nb_eligible = np.diff(offsets)[year_positions]
+        if (nb_eligible == 0).any():
+            raise ValueError(f"No microchip code available for implant years "
+                             f"{np.unique(implant_years[nb_eligible == 0])}.")
+
+        # Pick each code by a random offset into the year's eligible list
+        picks = offsets[year_positions] + self.rng.integers(nb_eligible)
+        microchip_data['id_code'] = eligible_code_ids[picks]
 
         self.microchip_data = microchip_data
         return microchip_data
@@ -220,7 +266,7 @@ class Microchip():
         microchip_data['location'] = None
 
         indices_microchip_list = microchip_data.index.values.tolist()
-        indices_microchip_list = np.random.permutation(indices_microchip_list)
+        indices_microchip_list = self.rng.permutation(indices_microchip_list)
 
         nb_microchip = len(indices_microchip_list)
         used_indices = []
@@ -235,7 +281,11 @@ class Microchip():
             if nb_cat_microchip == 0:
                 continue
 
-            selected_indices = rd.sample(list(available_indices), k=nb_cat_microchip)
+            selected_indices = list(self.rng.choice(
+                available_indices,
+                size=nb_cat_microchip,
+                replace=False
+            ))
             microchip_data.loc[selected_indices, 'location'] = str(k)
             used_indices.extend(selected_indices)
 
@@ -0,0 +1,265 @@
+import os
+import runpy
+import pandas as pd
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="- %(levelname)s - %(asctime)s - %(message)s"
+)
+
+# Primary keys of the relations of a clean instance. Relations microchip_code
+# and service are lookup relations shared by all the clinics (same keys)
+PRIMARY_KEYS = {
+    'microchip_code': 'id_code',
+    'microchip': 'id_microchip',
+    'animal': 'id_animal',
+    'animal_weight': 'id_weight',
+    'service': 'id_service',
+    'appointment': 'id_appointment',
+    'appointment_services': 'id_appointment_service',
+    'slot': 'id_slot',
+    'appointment_slot': 'id_appointment_slot',
+    'owner': 'id_owner',
+    'animal_owner': 'id_animal_owner',
+    'doctor': 'id_doctor',
+    'doctor_historization': 'id_doctor_histo'
+}
+SHARED_RELATIONS = ['microchip_code', 'service']
+
+# Surrogate keys are stored as integer columns in the PostgreSQL schemas
+MAX_KEY_VALUE = 2**31 - 1
+
+# Attributes identifying a person, copied from one clinic's owner to another
+# for cross-clinic owners
+OWNER_PROFILE_COLUMNS = [
+    'first_name',
+    'last_name',
+    'address',
+    'city',
+    'postal_code',
+    'phone_number'
+]
+
+def generate_clinic_instance(
+    clinic_parameters: dict,
+    generation_script: str = 'db_generation.py'
+    ) -> str:
+    """
+        Generate the clean instance of a clinic by running the
+        generation script, whose parameters are replaced by the values
+        of clinic_parameters. Returns the directory in which the
+        relations were saved.
+        Defined at module level to be usable in a process pool.
+    """
+    runpy.run_path(
+        generation_script,
+        init_globals={'clinic_parameters': clinic_parameters},
+        run_name='__clinic__'
+    )
+    return clinic_parameters['output_directory']
+
+
+class MultiClinic():
+    """
+        This class is used to generate a database gathering several
+        clinics (e.g. in different countries and with different
+        opening years), to test deduplication across sites.
+        Each clinic is generated by its own run of db_generation.py,
+        in a process pool, with a reserved range of surrogate keys
+        (key_range_size keys from clinic_index * key_range_size), so
+        that the relations of the clinics are merged by concatenation,
+        without re-assigning keys. The clinics share the pools of
+        profile values of the owners and doctors, and a proportion of
+        the owners can be registered in several clinics.
+    """
+    def __init__(self,
+        clinics: list,
+        key_range_size: int = 10**8,
+        rng: np.random.Generator = None
+        ):
+        """
+            Initialize the instance with the list of the clinics, each
+            one being a dictionnary of generation parameters (see
+            db_generation.py) with a unique 'clinic_name', and the
+            number of keys reserved to each clinic per relation.
+            Random draws are made with the generator rng, a new
+            unseeded one is created if not specified.
+        """
+        logging.info("Instantiating object from class MultiClinic")
+
+        clinic_names = [clinic.get('clinic_name') for clinic in clinics]
+        if None in clinic_names or len(set(clinic_names)) != len(clinic_names):
+            raise ValueError("Each clinic must have a unique 'clinic_name'.")
+        if len(clinics) * key_range_size > MAX_KEY_VALUE:
+            raise ValueError(f"The key ranges of {len(clinics)} clinics of size "
+                             f"{key_range_size} exceed the maximum key value "
+                             f"{MAX_KEY_VALUE}.")
+
+        self.clinics = clinics
+        self.key_range_size = key_range_size
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+    #----------------------------------------------------------------
+    def get_clinic_parameters(self,
+        clinic_index: int,
+        master_seed: int,
+        profile_pool_seed: int,
+        output_directory: str
+        ) -> dict:
+        """
+            Return the generation parameters of a clinic: its own
+            parameters, its master seed, the shared profile pool seed,
+            the offset of its key range and its output directory
+            (sub-directory of output_directory named after the clinic).
+        """
+        clinic_parameters = {
+            key: value for key, value in self.clinics[clinic_index].items()
+            if key != 'clinic_name'
+        }
+        clinic_parameters.update({
+            'master_seed': master_seed,
+            'profile_pool_seed': profile_pool_seed,
+            'starting_id_offset': clinic_index * self.key_range_size,
+            'output_directory': os.path.join(
+                output_directory,
+                self.clinics[clinic_index]['clinic_name']
+            )
+        })
+        return clinic_parameters
+
+    #----------------------------------------------------------------
+    def generate_clinics(self,
+        clinic_parameters: list,
+        nb_workers: int = 1,
+        generation_script: str = 'db_generation.py'
+        ) -> list:
+        """
+            Generate the instances of the clinics, from their list of
+            generation parameters (see function get_clinic_parameters).
+            When nb_workers is higher than 1, the clinics are generated
+            in parallel in a process pool.
+            Returns the list of the clinics' output directories.
+        """
+        if nb_workers > 1:
+            with ProcessPoolExecutor(max_workers=nb_workers) as executor:
+                return list(executor.map(
+                    generate_clinic_instance,
+                    clinic_parameters,
+                    [generation_script] * len(clinic_parameters)
+                ))
+        return [
+            generate_clinic_instance(parameters, generation_script)
+            for parameters in clinic_parameters
+        ]
+
+    #----------------------------------------------------------------
+    def check_key_ranges(self,
+        clinic_index: int,
+        relations: dict
+        ):
+        """
+            Check that the surrogate keys of the relations of a clinic
+            (except the lookup relations) are in the clinic's key range.
+        """
+        key_range_start = clinic_index * self.key_range_size
+        key_range_end = key_range_start + self.key_range_size
+        for relation_name, pk_column_name in PRIMARY_KEYS.items():
+            if relation_name in SHARED_RELATIONS or len(relations[relation_name]) == 0:
+                continue
+            keys = relations[relation_name][pk_column_name]
+            if keys.min() < key_range_start or keys.max() >= key_range_end:
+                raise ValueError(f"Keys of relation {relation_name} of clinic "
+                                 f"'{self.clinics[clinic_index]['clinic_name']}' "
+                                 f"exceed its key range [{key_range_start}, "
+                                 f"{key_range_end}). Increase key_range_size.")
+
+    #----------------------------------------------------------------
+    def merge_relations(self,
+        clinic_relations: list
+        ) -> dict:
+        """
+            Returns a dictionnary of the relations of all the clinics,
+            from the list of the relations of each clinic (see function
+            load_relations). Relations are concatenated, their keys
+            being disjoint, except the lookup relations which are
+            identical in all the clinics and kept once.
+        """
+        merged_relations = {}
+        for relation_name in clinic_relations[0]:
+            if relation_name in SHARED_RELATIONS:
+                for relations in clinic_relations[1:]:
+                    if not relations[relation_name].equals(clinic_relations[0][relation_name]):
+                        raise ValueError(f"Lookup relation {relation_name} differs "
+                                         f"between the clinics.")
+                merged_relations[relation_name] = clinic_relations[0][relation_name]
+            else:
+                merged_relations[relation_name] = pd.concat(
+                    [relations[relation_name] for relations in clinic_relations],
+                    ignore_index=True
+                )
+        return merged_relations
+
+    #----------------------------------------------------------------
+    def assign_cross_clinic_owners(self,
+        clinic_owner_data: list,
+        prop_cross_clinic_owners: float
+        ) -> tuple:
+        """
+            Register a proportion of the owners of each clinic (except
+            the first one) as persons already registered in one of the
+            previous clinics: their profile (names, address, phone
+            number) is copied from an owner randomly selected among the
+            owners of the previous clinics. Keys are left unchanged.
+            Returns the DataFrame of the owners of all the clinics and
+            a DataFrame mapping each cross-clinic owner (id_owner) to
+            the owner it was copied from (id_owner_source).
+        """
+        if not 0 <= prop_cross_clinic_owners <= 1:
+            raise ValueError(f"prop_cross_clinic_owners must be between 0 and 1, "
+                             f"got {prop_cross_clinic_owners}.")
+        clinic_sizes = np.array([len(owner_data) for owner_data in clinic_owner_data])
+        owner_data = pd.concat(clinic_owner_data, ignore_index=True)
+        clinic_starts = np.concatenate([[0], np.cumsum(clinic_sizes)])
+
+        targets, sources = [], []
+        for clinic_index in range(1, len(clinic_owner_data)):
+            nb_cross_clinic_owners = int(round(prop_cross_clinic_owners * clinic_sizes[clinic_index]))
+            if nb_cross_clinic_owners == 0 or clinic_starts[clinic_index] == 0:
+                continue
+            targets.append(clinic_starts[clinic_index] + self.rng.choice(
+                clinic_sizes[clinic_index],
+                size=nb_cross_clinic_owners,
+                replace=False
+            ))
+            sources.append(self.rng.integers(
+                clinic_starts[clinic_index],
+                size=nb_cross_clinic_owners
+            ))
+        targets = np.concatenate(targets) if len(targets) > 0 else np.array([], dtype=np.int64)
+        sources = np.concatenate(sources) if len(sources) > 0 else np.array([], dtype=np.int64)
+
+        column_positions = [owner_data.columns.get_loc(column) for column in OWNER_PROFILE_COLUMNS]
+        owner_data.iloc[targets, column_positions] = owner_data.iloc[sources, column_positions].to_numpy()
+
+        cross_clinic_owner_data = pd.DataFrame({
+            'id_owner': owner_data['id_owner'].to_numpy()[targets],
+            'id_owner_source': owner_data['id_owner'].to_numpy()[sources]
+        })
+        return owner_data, cross_clinic_owner_data
+
+    #----------------------------------------------------------------
+    def get_clinic_data(self) -> pd.DataFrame:
+        """
+            Returns a DataFrame describing the clinics: name, country,
+            opening year and range of surrogate keys.
+        """
+        return pd.DataFrame({
+            'clinic_name': [clinic['clinic_name'] for clinic in self.clinics],
+            'country_code': [clinic.get('country_code') for clinic in self.clinics],
+            'clinic_start_year': [clinic.get('clinic_start_year') for clinic in self.clinics],
+            'key_range_start': np.arange(len(self.clinics)) * self.key_range_size,
+            'key_range_end': np.arange(1, len(self.clinics) + 1) * self.key_range_size - 1
+        })
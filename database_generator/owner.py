@@ -1,11 +1,11 @@
 import pandas as pd
 import numpy as np
-import random as rd
 import math
 import string
-from faker import Faker
-fake = Faker()
-from shared_functions import add_primary_key_values
+from shared_functions import (
+    add_primary_key_values,
+    assign_foreign_key)
+from database_generator.profile_pool import ProfilePool
 import logging
 
 logging.basicConfig(
@@ -23,13 +23,19 @@ class Owner:
     """
     def __init__(self,
         nb_animals: int,
-        prop_nb_animal_household: dict = None
+        prop_nb_animal_household: dict = None,
+        rng: np.random.Generator = None,
+        profile_pool: ProfilePool = None
         ):
         """
             Initialize the instance with the number of animals used to
             instantiate class Animal, and an indication of the 
             distribution of the proportion of households owning a certain 
             number of pets provided in a dictionnary (prop_nb_animal_household).
+            Random draws are made with the generator rng (see class
+            RandomStreams), and the owners' profiles are sampled from
+            the pools of profile_pool (see class ProfilePool). New
+            unseeded ones are created if not specified.
         """
         logging.info("Instantiating object from class Owner")
 
@@ -50,6 +56,8 @@ class Owner:
         self.additional_owners = []
         self.household_several_appt = []
         self.microchips_with_many_appointments = []
+        self.rng = rng if rng is not None else np.random.default_rng()
+        self.profile_pool = profile_pool if profile_pool is not None else ProfilePool()
 
     #----------------------------------------------------------------
     def compute_nb_owners(self,
@@ -85,42 +93,21 @@ class Owner:
         """
             Create a DataFrame containing the informations on the owners:
             first_name, last_name, address, city, postal_code, phone_number.
-            All values are randomly generated using the package Faker.
+            All values are sampled from the pools of values generated
+            with package Faker (see class ProfilePool).
         """
         logging.info(f"Star generating the owners' profiles.")
         if nb_owners is None:
             nb_owners = self.nb_owners
 
-        owners_first_names=[]
-        for _ in range(nb_owners):
-            owners_first_names.append(
-                fake.first_name()
-            )
-        owners_last_names=[]
-        for _ in range(nb_owners):
-            owners_last_names.append(
-                fake.last_name()
-            )
-        cities=[]
-        for _ in range(nb_cities):
-            cities.append(
-                fake.city()
-            )
-        postal_codes=[]
-        for _ in range(nb_cities):
-            postal_codes.append(
-                fake.postcode()
-            )
-        streets=[]
-        for _ in range(nb_cities*ratio_city_streets):
-            streets.append(
-                fake.street_name()
-            )
-        phone_numbers=[]
-        for _ in range(nb_owners):
-            phone_numbers.append(
-                fake.phone_number()
-            )
+        owners_first_names = self.profile_pool.sample('first_name', nb_owners, self.rng)
+        owners_last_names = self.profile_pool.sample('last_name', nb_owners, self.rng)
+        cities = self.profile_pool.sample('city', nb_cities, self.rng).tolist()
+        postal_codes = self.profile_pool.sample('postcode', nb_cities, self.rng).tolist()
+        streets = self.profile_pool.sample(
+            'street_name', nb_cities*ratio_city_streets, self.rng
+        ).tolist()
+        phone_numbers = self.profile_pool.sample_phone_numbers(nb_owners, self.rng)
 
         def assign_unique_values(
             keys,
@@ -135,14 +122,14 @@ class Owner:
             if len(values) < len(keys) * min_vals:
                 raise ValueError("Not enough elements in list2 to satisfy minimum requirements.")
 
-            rd.shuffle(values)
+            self.rng.shuffle(values)
             assignment = {}
             index = 0
             for key in keys:
                 # Calculate how many values we can still assign
                 remaining_keys = len(keys) - len(assignment)
                 max_assignable = len(values) - index - (remaining_keys - 1) * min_vals
-                count = rd.randint(min_vals, min(max_vals, max_assignable))
+                count = int(self.rng.integers(min_vals, min(max_vals, max_assignable) + 1))
                 assigned_values = values[index: index + count]
                 assignment[key] = assigned_values
                 index += count
@@ -156,28 +143,31 @@ class Owner:
             raise ValueError("owners_first_names and owners_last_names must be of the same length")
 
         city_to_postal = dict(zip(cities, postal_codes))
-        addresses = [(street, city) for city, streets in addresses.items() for street in streets]
-        selected_addresses = rd.choices(addresses, k=len(owners_first_names))
-
-        data = []
-        for i in range(len(owners_first_names)):
-            first_name = owners_first_names[i]
-            last_name = owners_last_names[i]
-            street, city = selected_addresses[i]
-            address = f"{rd.randint(1, 150)} {street}"
-            postal_code = city_to_postal[city]
-            phone_number = phone_numbers[i]
-            
-            data.append({
-                'first_name': first_name,
-                'last_name': last_name,
-                'address': address,
-                'city': city,
-                'postal_code': postal_code,
-                'phone_number': phone_number
-            })
-
-        owner_data = pd.DataFrame(data)
+        address_streets = np.array(
+            [street for streets in addresses.values() for street in streets]
+        )
+        address_cities = np.array(
+            [city for city, streets in addresses.items() for _ in streets]
+        )
+        selected_addresses = self.rng.integers(
+            len(address_streets),
+            size=len(owners_first_names)
+        )
+        street_numbers = self.rng.integers(1, 151, size=len(owners_first_names))
+
+        owner_data = pd.DataFrame({
+            'first_name': owners_first_names,
+            'last_name': owners_last_names,
+            'address': pd.Series(street_numbers).astype(str) + ' '
+                       + address_streets[selected_addresses],
+            'city': address_cities[selected_addresses],
+            'phone_number': phone_numbers
+        })
+        owner_data.insert(
+            4,
+            'postal_code',
+            owner_data['city'].map(city_to_postal)
+        )
 
         logging.info(f"Generated Owner relation of size "
                      f"{len(owner_data)}.")
@@ -260,11 +250,11 @@ class Owner:
 
         list_microchip_id = microchip_data['id_microchip'].unique()
         indices_microchips = microchip_data.index.values.tolist()
-        rd.shuffle(indices_microchips)
+        self.rng.shuffle(indices_microchips)
 
         list_owner_id = owner_data['id_owner_tmp'].unique()
         indices_owners = owner_data.index.values.tolist()
-        rd.shuffle(indices_owners)
+        self.rng.shuffle(indices_owners)
 
         h = 1
         index_microchip = 0
@@ -313,7 +303,7 @@ class Owner:
 
         id_assigned_owners = animal_owner_data['id_owner_tmp'].unique()
         additional_owners = owner_data[~owner_data['id_owner_tmp'].isin(id_assigned_owners)]['id_owner_tmp'].to_list()
-        rd.shuffle(additional_owners)
+        self.rng.shuffle(additional_owners)
         self.additional_owners = additional_owners
 
         return additional_owners
@@ -348,6 +338,34 @@ class Owner:
 
         return household_several_appt
 
+    #----------------------------------------------------------------
+    def build_household_microchips_index(self,
+        animal_owner_data: pd.DataFrame,
+        microchips: list = None
+        ):
+        """
+            Build the index of the microchips of each household in
+            DataFrame animal_owner_data, restricted to the specified
+            microchips (by default microchips_with_many_appointments).
+            Returns the sorted distinct households, and the microchips
+            of all households concatenated with the offset of each
+            household's list (the microchips of households[i] are
+            household_microchips[offsets[i]:offsets[i+1]]).
+        """
+        if microchips is None:
+            microchips = self.microchips_with_many_appointments
+
+        selected = animal_owner_data[
+            animal_owner_data['id_microchip'].isin(microchips)
+        ]
+        id_households = selected['id_household'].to_numpy()
+        order = np.argsort(id_households, kind='stable')
+        households, counts = np.unique(id_households[order], return_counts=True)
+        offsets = np.concatenate([[0], np.cumsum(counts)])
+        household_microchips = selected['id_microchip'].to_numpy()[order]
+
+        return households, household_microchips, offsets
+
     #----------------------------------------------------------------
     def assign_animal_to_additional_owner(self,
         animal_owner_data: pd.DataFrame,
@@ -365,33 +383,35 @@ class Owner:
             household_several_appt = self.household_several_appt
         nb_additional_owners = len(additional_owners)
 
-        households_2_owners = rd.choices(
+        households_2_owners = self.rng.choice(
             household_several_appt,
-            k=nb_additional_owners)
+            size=nb_additional_owners)
 
-        rows=[]
-        i=0
-        while i <= nb_additional_owners-1:
-            a=int(households_2_owners[i])
-            household_micro = animal_owner_data[
-                (animal_owner_data['id_household']==a)
-                & (animal_owner_data['id_microchip'].isin(self.microchips_with_many_appointments))
-            ]['id_microchip'].tolist()
-            nb_household_animals = len(household_micro)
-            if nb_household_animals == 1:
-                nb_animals_2_owners = 1
-            else:
-                nb_animals_2_owners = rd.randrange(1,nb_household_animals)
-            animals_2_owners = rd.choices(household_micro,k=nb_animals_2_owners)
-
-            for m in animals_2_owners:
-                rows.append({
-                    'id_microchip': m,
-                    'id_owner_tmp': additional_owners[i],
-                    'id_household': a,
-                    'i':i})
-            i+=1
-        animal_additional_owner = pd.DataFrame(rows)
+        households, household_microchips, offsets = self.build_household_microchips_index(
+            animal_owner_data
+        )
+        if not np.isin(households_2_owners, households).all():
+            raise ValueError("Households selected for additional owners "
+                             "have no animal with several appointments.")
+        household_positions = np.searchsorted(households, households_2_owners)
+        nb_household_animals = np.diff(offsets)[household_positions]
+
+        # Draw the number of animals of each additional owner (1 when the
+        # household only has one animal), then the animals themselves
+        # (with replacement) by random offsets into the household's list
+        nb_animals_2_owners = self.rng.integers(1, np.maximum(nb_household_animals, 2))
+        owner_positions = np.repeat(np.arange(nb_additional_owners), nb_animals_2_owners)
+        animal_offsets = self.rng.integers(nb_household_animals[owner_positions])
+        animals_2_owners = household_microchips[
+            offsets[household_positions[owner_positions]] + animal_offsets
+        ]
+
+        animal_additional_owner = pd.DataFrame({
+            'id_microchip': animals_2_owners,
+            'id_owner_tmp': np.asarray(additional_owners)[owner_positions],
+            'id_household': households_2_owners[owner_positions].astype(int),
+            'i': owner_positions
+        })
 
         logging.info(f"{len(animal_additional_owner)} animals assigned "
                      f"to more than one owner.")
@@ -412,22 +432,18 @@ class Owner:
             animal_owner_data['id_microchip'].unique()
         )
         if len(microchip_id_not_assigned) == 0:
-            raise ValueError("All animals were assigned to owners.")
-        else:
-            rows=[]
-            for element in microchip_id_not_assigned:
-                rnd_id_owner = int(rd.choice(animal_owner_data['id_owner_tmp'].unique()))
-                rows.append({
-                    'id_microchip': int(element),
-                    'id_owner_tmp': rnd_id_owner,
-                    'id_household': None,
-                    'i': None
-                })
-            
-            left_animal_owner = pd.DataFrame(rows)
-            logging.info(f"{len(left_animal_owner)} new animals assigned "
-                     f"to owners.")
-            return left_animal_owner
+            logging.info("All animals were already assigned to owners.")
+
+        id_owners = animal_owner_data['id_owner_tmp'].unique()
+        left_animal_owner = pd.DataFrame({
+            'id_microchip': microchip_id_not_assigned.astype(int),
+            'id_owner_tmp': self.rng.choice(id_owners, size=len(microchip_id_not_assigned)).astype(int),
+            'id_household': None,
+            'i': None
+        })
+        logging.info(f"{len(left_animal_owner)} new animals assigned "
+                 f"to owners.")
+        return left_animal_owner
         
     #----------------------------------------------------------------
     def assign_id_owner(self,
@@ -470,10 +486,11 @@ class Owner:
         if owner_data is None or len(owner_data) == 0:
             owner_data = self.owner_data
 
-        animal_owner_data = animal_owner_data.merge(
-            owner_data[['id_owner_tmp', 'id_owner']],
-            on='id_owner_tmp',
-            how='left'
+        animal_owner_data = assign_foreign_key(
+            dataframe=animal_owner_data,
+            key_column='id_owner_tmp',
+            reference=owner_data,
+            fk_column='id_owner'
         )
 
         self.animal_owner_data = animal_owner_data
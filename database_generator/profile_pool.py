@@ -0,0 +1,191 @@
+import os
+import zlib
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from random_streams import get_faker
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="- %(levelname)s - %(asctime)s - %(message)s"
+)
+
+# Faker providers drawn into the pools
+PROFILE_FIELDS = [
+    'first_name',
+    'last_name',
+    'city',
+    'postcode',
+    'street_name',
+    'phone_number'
+]
+
+def generate_field_pool(
+    field: str,
+    pool_size: int,
+    locale: str = None,
+    seed: int = None
+    ) -> np.ndarray:
+    """
+        Returns an array of pool_size values generated by the Faker
+        provider named field (e.g. 'first_name'), with a Faker instance
+        of the specified locale seeded with seed (see function
+        get_faker). Defined at module level to be usable in a process
+        pool.
+    """
+    fake = get_faker(locale, seed)
+    provider = getattr(fake, field)
+    return np.array([provider() for _ in range(pool_size)], dtype=str)
+
+
+class ProfilePool():
+    """
+        This class is used to draw the attributes of people's profiles
+        (names, addresses and phone numbers of owners and doctors) from
+        pools of values generated once with Faker, instead of calling
+        Faker for every person. Each field's pool is generated by its
+        own Faker instance seeded from the pool's seed, and can be
+        cached on disk to be reused between runs. Profiles are then
+        obtained by sampling indices into the pools with a NumPy
+        generator.
+    """
+    def __init__(self,
+        locale: str = None,
+        pool_size: int = 10000,
+        seed: int = None,
+        cache_directory: str = None,
+        nb_workers: int = 1,
+        fields: list = None
+        ):
+        """
+            Initialize the instance and build the pools of the fields
+            (by default PROFILE_FIELDS). Pools are loaded from
+            cache_directory when available, and the generated ones are
+            saved there. Pools are only cached when a seed is given.
+            When nb_workers is higher than 1, the pools are generated
+            in parallel in a process pool.
+        """
+        logging.info("Instantiating object from class ProfilePool")
+
+        self.locale = locale
+        self.pool_size = pool_size
+        self.seed = seed
+        self.cache_directory = cache_directory
+        self.pools = {}
+
+        if fields is None:
+            fields = PROFILE_FIELDS
+        if cache_directory is not None and seed is not None:
+            os.makedirs(cache_directory, exist_ok=True)
+            for field in fields:
+                path = self.get_cache_path(field)
+                if os.path.exists(path):
+                    self.pools[field] = np.load(path, allow_pickle=False)
+
+        missing_fields = [field for field in fields if field not in self.pools]
+        if len(missing_fields) > 0:
+            logging.info(f"Generating profile pools of size {pool_size} "
+                         f"for fields {missing_fields}.")
+            arguments = [
+                (field, pool_size, locale, self.get_field_seed(field))
+                for field in missing_fields
+            ]
+            if nb_workers > 1:
+                with ProcessPoolExecutor(max_workers=nb_workers) as executor:
+                    pools = list(executor.map(generate_field_pool, *zip(*arguments)))
+            else:
+                pools = [generate_field_pool(*args) for args in arguments]
+
+            for field, pool in zip(missing_fields, pools):
+                self.pools[field] = pool
+                if cache_directory is not None and seed is not None:
+                    np.save(self.get_cache_path(field), pool, allow_pickle=False)
+
+    #----------------------------------------------------------------
+    def get_field_seed(self,
+        field: str
+        ) -> int:
+        """
+            Return the seed of the Faker instance generating the pool
+            of a field, derived from the pool's seed and the field name.
+        """
+        if self.seed is None:
+            return None
+        seed_sequence = np.random.SeedSequence(
+            entropy=self.seed,
+            spawn_key=(zlib.crc32(field.encode('utf-8')),)
+        )
+        return int(seed_sequence.generate_state(1, dtype=np.uint64)[0] % 2**63)
+
+    #----------------------------------------------------------------
+    def get_cache_path(self,
+        field: str
+        ) -> str:
+        """
+            Return the path of the file caching the pool of a field.
+            The file name identifies the parameters the pool depends on.
+        """
+        from faker import VERSION as FAKER_VERSION
+
+        return os.path.join(
+            self.cache_directory,
+            f"{self.locale or 'default'}_{self.seed}_{self.pool_size}_"
+            f"faker{FAKER_VERSION}_{field}.npy"
+        )
+
+    #----------------------------------------------------------------
+    def get_pool(self,
+        field: str
+        ) -> np.ndarray:
+        """
+            Return the pool of values of a field
+        """
+        if field not in self.pools:
+            raise KeyError(f"No pool generated for field '{field}'")
+        return self.pools[field]
+
+    #----------------------------------------------------------------
+    def sample(self,
+        field: str,
+        n: int,
+        rng: np.random.Generator = None
+        ) -> np.ndarray:
+        """
+            Return an array of n values of a field, sampled with
+            replacement from its pool with the generator rng.
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        pool = self.get_pool(field)
+        return pool[rng.integers(len(pool), size=n)]
+
+    #----------------------------------------------------------------
+    def sample_phone_numbers(self,
+        n: int,
+        rng: np.random.Generator = None,
+        nb_random_digits: int = 4
+        ) -> np.ndarray:
+        """
+            Return an array of n phone numbers. Formats are sampled from
+            the pool of field 'phone_number', then their last
+            nb_random_digits digits are replaced by random digits, so
+            that phone numbers are not repeated from the pool.
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        phone_numbers = self.sample('phone_number', n, rng)
+        if n == 0:
+            return phone_numbers
+
+        # Work on the code points of the fixed-width strings
+        width = phone_numbers.dtype.itemsize // 4
+        chars = phone_numbers.view(np.uint32).reshape(n, width).copy()
+        is_digit = (chars >= ord('0')) & (chars <= ord('9'))
+        digits_from_end = np.cumsum(is_digit[:, ::-1], axis=1)[:, ::-1]
+        to_replace = is_digit & (digits_from_end <= nb_random_digits)
+        chars[to_replace] = ord('0') + rng.integers(
+            10,
+            size=int(to_replace.sum()),
+            dtype=np.uint32
+        )
+        return chars.view(f'<U{width}').ravel()
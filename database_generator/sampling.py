@@ -0,0 +1,192 @@
+import pandas as pd
+import numpy as np
+from shared_functions import semi_join_mask
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="- %(levelname)s - %(asctime)s - %(message)s"
+)
+
+# Closure rules of the clean instance, as (relation, column, source relation,
+# source column): the tuples of relation whose value of column is found in
+# the kept tuples of the source relation are kept. Rules are applied from the
+# sampled animals, following both the references of the kept tuples and the
+# tuples referencing them.
+CLEAN_CLOSURE_RULES = [
+    ('microchip', 'id_microchip', 'animal', 'id_microchip'),
+    ('microchip_code', 'id_code', 'microchip', 'id_code'),
+    ('animal_weight', 'id_animal', 'animal', 'id_animal'),
+    ('appointment', 'id_animal', 'animal', 'id_animal'),
+    ('animal_owner', 'id_microchip', 'microchip', 'id_microchip'),
+    ('owner', 'id_owner', 'animal_owner', 'id_owner'),
+    ('owner', 'id_owner', 'appointment', 'id_owner'),
+    ('appointment_services', 'id_appointment', 'appointment', 'id_appointment'),
+    ('service', 'id_service', 'appointment_services', 'id_service'),
+    ('appointment_slot', 'id_appointment', 'appointment', 'id_appointment'),
+    ('slot', 'id_slot', 'appointment_slot', 'id_slot'),
+    ('doctor', 'id_doctor', 'slot', 'id_doctor'),
+    ('doctor_historization', 'id_doctor', 'doctor', 'id_doctor')
+]
+
+# Closure rules of the instance polluted with artificial unicity. Tuples
+# created as duplicates of a same clean tuple (same id_<relation>_v1) are
+# kept together, so that the levels of artificial unicity are preserved.
+AU_CLOSURE_RULES = [
+    ('animal', 'id_animal_v1', 'animal', 'id_animal_v1'),
+    ('animal', 'id_animal', 'owner', 'id_animal'),
+    ('microchip', 'id_microchip', 'animal', 'id_microchip'),
+    ('microchip', 'id_microchip_v1', 'microchip', 'id_microchip_v1'),
+    ('microchip_code', 'id_code', 'microchip', 'id_code'),
+    ('microchip_code', 'id_code_v1', 'microchip_code', 'id_code_v1'),
+    ('appointment', 'id_animal', 'animal', 'id_animal'),
+    ('owner', 'id_owner', 'animal', 'id_owner'),
+    ('owner', 'id_owner', 'microchip', 'id_owner'),
+    ('owner', 'id_owner', 'appointment', 'id_owner'),
+    ('owner', 'id_animal', 'animal', 'id_animal'),
+    ('service', 'id_service', 'appointment', 'id_service'),
+    ('service', 'id_service_v1', 'service', 'id_service_v1'),
+    ('appointment_slot', 'id_appointment', 'appointment', 'id_appointment'),
+    ('slot', 'id_slot', 'appointment_slot', 'id_slot'),
+    ('doctor', 'id_doctor', 'slot', 'id_doctor'),
+    ('doctor', 'id_doctor_v1', 'doctor', 'id_doctor_v1')
+]
+
+# Relations of the artificial unicity instance, saved as <relation>_au.csv
+AU_RELATION_NAMES = [
+    'microchip_code',
+    'microchip',
+    'animal',
+    'service',
+    'appointment',
+    'slot',
+    'appointment_slot',
+    'owner',
+    'doctor'
+]
+
+
+class InstanceSampler():
+    """
+        This class is used to downsample an existing database instance
+        (clean or polluted with artificial unicity) to a random subset
+        of its animals. The tuples referenced by the sampled animals,
+        and the tuples referencing them, are pulled in by successive
+        semi-joins (see closure rules above) until no more tuple is
+        added, so that the sub-instance is referentially closed.
+        Each semi-join is computed with a dense boolean lookup array
+        of the kept keys (see function semi_join_mask), instead of a
+        merge of the relations.
+    """
+    def __init__(self,
+        relations: dict,
+        closure_rules: list,
+        rng: np.random.Generator = None
+        ):
+        """
+            Initialize the instance with the relations of the instance
+            to downsample (see function load_relations) and its
+            closure rules (CLEAN_CLOSURE_RULES or AU_CLOSURE_RULES).
+            Random draws are made with the generator rng, a new
+            unseeded one is created if not specified.
+        """
+        logging.info("Instantiating object from class InstanceSampler")
+
+        for relation_name, column, source_name, source_column in closure_rules:
+            for name, col in [(relation_name, column), (source_name, source_column)]:
+                if name not in relations:
+                    raise KeyError(f"Relation '{name}' of the closure rules "
+                                   f"not found in the instance.")
+                if col not in relations[name].columns:
+                    raise KeyError(f"Column '{col}' not found in relation '{name}'.")
+
+        self.relations = relations
+        self.closure_rules = closure_rules
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+    #----------------------------------------------------------------
+    def sample_keys(self,
+        relation_name: str,
+        column: str,
+        nb_keys: int = None,
+        fraction: float = None
+        ) -> np.ndarray:
+        """
+            Returns a random subset of the distinct values of column
+            of the specified relation (e.g. id_animal of relation
+            animal), of size nb_keys or the specified fraction of the
+            distinct values.
+        """
+        keys = pd.unique(self.relations[relation_name][column].dropna())
+        if (nb_keys is None) == (fraction is None):
+            raise ValueError("Exactly one of nb_keys and fraction must be specified.")
+        if nb_keys is None:
+            if not 0 < fraction <= 1:
+                raise ValueError(f"fraction must be in (0, 1], got {fraction}.")
+            nb_keys = int(round(fraction * len(keys)))
+        if nb_keys > len(keys):
+            raise ValueError(f"Cannot sample {nb_keys} values of {column} out of "
+                             f"{len(keys)} distinct values.")
+        return np.sort(self.rng.choice(keys, size=nb_keys, replace=False))
+
+    #----------------------------------------------------------------
+    def close_sample(self,
+        relation_name: str,
+        column: str,
+        keys: np.ndarray
+        ) -> dict:
+        """
+            Returns a dictionnary of boolean masks of the tuples kept
+            in each relation: the tuples of the specified relation
+            whose value of column is in keys, and the tuples added by
+            the closure rules. The rules are applied in turn until a
+            whole pass adds no tuple; masks only grow, so the closure
+            terminates.
+        """
+        masks = {
+            name: np.zeros(len(relation), dtype=bool)
+            for name, relation in self.relations.items()
+        }
+        masks[relation_name] = semi_join_mask(
+            self.relations[relation_name][column].to_numpy(), keys
+        )
+
+        nb_passes = 0
+        changed = True
+        while changed:
+            changed = False
+            nb_passes += 1
+            for target_name, target_column, source_name, source_column in self.closure_rules:
+                source_keys = self.relations[source_name][source_column].to_numpy()[masks[source_name]]
+                added = semi_join_mask(
+                    self.relations[target_name][target_column].to_numpy(),
+                    source_keys
+                ) & ~masks[target_name]
+                if added.any():
+                    masks[target_name] |= added
+                    changed = True
+        logging.info(f"Sample closed after {nb_passes} passes over the closure rules.")
+        return masks
+
+    #----------------------------------------------------------------
+    def get_sampled_relations(self,
+        masks: dict,
+        full_relations: list = None
+        ) -> dict:
+        """
+            Returns a dictionnary of the kept tuples of each relation
+            (see function close_sample). Relations of full_relations
+            (e.g. the lookup relations service and microchip_code) are
+            kept entirely.
+        """
+        if full_relations is None:
+            full_relations = []
+        sampled_relations = {}
+        for relation_name, relation in self.relations.items():
+            if relation_name in full_relations:
+                sampled_relations[relation_name] = relation
+            else:
+                sampled_relations[relation_name] = relation[
+                    masks[relation_name]
+                ].reset_index(drop=True)
+        return sampled_relations
@@ -1,6 +1,5 @@
 import pandas as pd
 import numpy as np
-import random as rd
 from datetime import date, timedelta
 from shared_functions import add_primary_key_values
 import logging
@@ -20,16 +19,20 @@ class Service():
         generation progresses.
     """
     def __init__(self,
-        service_data: pd.DataFrame
+        service_data: pd.DataFrame,
+        rng: np.random.Generator = None
         ):
         """
             Initialize the instance with the data contained in
             csv file service_list.csv included in the package.
+            Random draws are made with the generator rng, a new
+            unseeded one is created if not specified.
         """
         logging.info("Instantiating object from class Service")
 
         self.service_data = service_data
         self.appointment_services_data = []
+        self.rng = rng if rng is not None else np.random.default_rng()
         logging.info(f"Generated Service relation of size "
                      f"{len(self.service_data)}.")
 
@@ -105,7 +108,7 @@ class Service():
             reason = row.appt_reason
 
             if reason == 'surgery':
-                surgery_prop = rd.uniform(0, 1)
+                surgery_prop = self.rng.uniform(0, 1)
                 matched = surgery_types_distribution[
                     (surgery_types_distribution['min_prop'] < surgery_prop) &
                     (surgery_types_distribution['max_prop'] >= surgery_prop)
@@ -123,7 +126,7 @@ class Service():
             services = reason_services_map.get(reason)
             if services is not None:
                 n = len(services)
-                props = [rd.uniform(0, 1) for _ in range(n)]
+                props = self.rng.uniform(0, 1, size=n)
                 for i in range(n):
                     if 1 - services.loc[i, 'probability'] > props[i]:
                         service_type = services.loc[i, 'service']
@@ -172,4 +175,62 @@ class Service():
 
         self.appointment_services_data = appointment_services_data
 
-        return appointment_services_data
\ No newline at end of file
+        return appointment_services_data
+
+    #----------------------------------------------------------------
+    def generate_appointment_services_data_by_chunk(self,
+        appointment_data: pd.DataFrame,
+        chunk_size: int,
+        appt_reason_service_list: pd.DataFrame,
+        surgery_types_distribution: pd.DataFrame,
+        service_data: pd.DataFrame = None,
+        pk_column_name: str = 'id_appointment_service',
+        starting_id_value: int = 1
+        ):
+        """
+            Streaming version of functions map_appointment_services and
+            assign_id_appointment_service: the appointments, sorted by
+            id_appointment, are mapped with services by chunks of
+            chunk_size appointments, and the mapping of each chunk is
+            yielded, so that only one chunk is held at a time. As the
+            chunks follow the order of id_appointment, the identifiers
+            (pk_column_name) are assigned in the same order as by
+            assign_id_appointment_service on the whole relation.
+            The random draws of each chunk are made with its own
+            generator, spawned from the instance's generator.
+        """
+        if chunk_size <= 0:
+            raise ValueError(f"chunk_size must be positive, got {chunk_size}.")
+
+        appointment_data = appointment_data[
+            ['id_appointment', 'appt_reason']
+        ].sort_values('id_appointment')
+        nb_chunks = max(1, -(-len(appointment_data) // chunk_size))
+        logging.info(f"Mapping {len(appointment_data)} appointments with "
+                     f"services in {nb_chunks} chunks of at most {chunk_size} "
+                     f"appointments.")
+
+        rng = self.rng
+        next_id_value = starting_id_value
+        try:
+            for i, chunk_rng in enumerate(rng.spawn(nb_chunks)):
+                self.rng = chunk_rng
+                chunk = self.map_appointment_services(
+                    appointment_data = appointment_data.iloc[
+                        i * chunk_size:(i + 1) * chunk_size
+                    ],
+                    appt_reason_service_list = appt_reason_service_list,
+                    surgery_types_distribution = surgery_types_distribution,
+                    service_data = service_data
+                )
+                chunk = self.assign_id_appointment_service(
+                    appointment_services_data = chunk,
+                    pk_column_name = pk_column_name,
+                    starting_id_value = next_id_value
+                )
+                next_id_value += len(chunk)
+                yield chunk
+        finally:
+            # Do not keep the last chunk
+            self.rng = rng
+            self.appointment_services_data = []
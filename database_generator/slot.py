@@ -3,16 +3,18 @@ import numpy as np
 import random as rd
 import math
 import string
-import holidays
 from dateutil import relativedelta
-from datetime import date, datetime, timedelta
-from pandas.tseries.offsets import MonthEnd, MonthBegin
+from datetime import datetime, timedelta
+from pandas.tseries.offsets import MonthEnd
 from bisect import bisect_left
-from faker import Faker
-fake = Faker()
 from shared_functions import (
     add_primary_key_values,
-    get_country_holidays)
+    get_country_holidays,
+    interval_join)
+from database_generator.slot_store import (
+    SlotStore,
+    REGULAR,
+    OVERTIME)
 import logging
 
 logging.basicConfig(
@@ -23,16 +25,21 @@ logging.basicConfig(
 class Slot():
     """
         This class is used to create the relation Slot, and 
-        progressively generate the required data. The self 
-        contained DataFrames slot_data is updated as data
-        generation progresses.
+        progressively generate the required data. The slots are
+        stored in a compact SlotStore (see class SlotStore) updated
+        as data generation progresses, and only materialized as a
+        DataFrame when matching them to appointments or exporting them.
     """
-    def __init__(self):
+    def __init__(self,
+        rng: np.random.Generator = None
+        ):
         """
-            No argument is required to initiate the instance
+            Initialize the instance. Random draws (sampling of the free
+            slots kept in sparse mode) are made with the generator rng,
+            a new unseeded one is created if not specified.
         """
         logging.info("Instantiating object from class Slot")
-        pass
+        self.rng = rng if rng is not None else np.random.default_rng()
 
     #----------------------------------------------------------------
     def generate_slots(self,
@@ -40,12 +47,14 @@ class Slot():
         start_time: int,
         end_time: int,
         weekly_days_off: list = [4]
-        ):
+        ) -> SlotStore:
         """
             Generates the details on all available slots according to
             the doctors' availabilities during each week the work on,
             the first and last daily appointments' times.
             No slot can be proposed during the specified weekly day off.
+            The days of the slots are numbered from the first period
+            start date (the clinic's opening).
         """
 
         doctor_historization_copy = doctor_historization.copy()
@@ -56,48 +65,44 @@ class Slot():
             doctor_historization_copy['period_end_date']
         )
 
-        start_date = doctor_historization_copy['period_start_date'].min()
-        end_date = (doctor_historization_copy['period_end_date'].max() + MonthBegin(2)) - pd.Timedelta(days=1)
-
-        # Generate all dates from start_date to end_date
-        all_days = pd.date_range(start=start_date, end=end_date, freq='D')
-        week_days = all_days.weekday
-        correct_days = ~np.isin(week_days, weekly_days_off)
-        valid_days = all_days[correct_days]
-
-        hours = range(start_time, end_time)
-        all_datetimes = pd.to_datetime([
-            f"{day.date()} {hour:02d}:00:00"
-            for day in valid_days
-            for hour in hours
-        ])
-
-        datetime_df = pd.DataFrame({'date_time': all_datetimes})
-        datetime_df['date'] = datetime_df['date_time'].dt.date
-        datetime_df['time'] = datetime_df['date_time'].dt.time
-        
-        records = []
-        for _, row in doctor_historization_copy.iterrows():
-            doctor_id = row['id_doctor']
-            start = row['period_start_date'].date()
-            end = row['period_end_date'].date()
-            
-            mask = (datetime_df['date'] >= start) & (datetime_df['date'] <= end)
-            matching_datetimes = datetime_df[mask]
-            
-            for _, dt_row in matching_datetimes.iterrows():
-                records.append({
-                    'id_doctor': doctor_id,
-                    'date': dt_row['date'],
-                    'time': dt_row['time']
-                })
-
-        slot_data = pd.DataFrame(records)
-        slot_data = slot_data.sort_values(
-            by=['id_doctor', 'date', 'time']
-        ).reset_index(drop=True)
-
-        slot_data['date'] = pd.to_datetime(slot_data['date'])
+        origin = doctor_historization_copy['period_start_date'].min()
+        doctor_ids, doctor_codes = np.unique(
+            doctor_historization_copy['id_doctor'].to_numpy(),
+            return_inverse=True
+        )
+        doctor_specialties = doctor_historization_copy.drop_duplicates(
+            'id_doctor'
+        ).set_index('id_doctor')['specialty'].reindex(doctor_ids).to_numpy()
+
+        # Expand each period into its days, then each day into its hours
+        period_starts = (doctor_historization_copy['period_start_date'] - origin).dt.days.to_numpy()
+        period_ends = (doctor_historization_copy['period_end_date'] - origin).dt.days.to_numpy()
+        nb_period_days = period_ends - period_starts + 1
+        period_positions = np.repeat(np.arange(len(nb_period_days)), nb_period_days)
+        days = (
+            np.repeat(period_starts, nb_period_days)
+            + np.arange(len(period_positions))
+            - np.repeat(np.cumsum(nb_period_days) - nb_period_days, nb_period_days)
+        )
+        weekdays = (np.datetime64(origin.date(), 'D').astype(np.int64) + days + 3) % 7
+        working_days = ~np.isin(weekdays, weekly_days_off)
+        days = days[working_days]
+        period_positions = period_positions[working_days]
+
+        hours = np.arange(start_time, end_time)
+        doctors = np.repeat(doctor_codes[period_positions], len(hours))
+        days = np.repeat(days, len(hours))
+        hours = np.tile(hours, len(period_positions))
+
+        order = np.lexsort((hours, days, doctors))
+        slot_data = SlotStore(
+            doctor_ids=doctor_ids,
+            origin=origin,
+            doctors=doctors[order],
+            days=days[order],
+            hours=hours[order],
+            doctor_specialties=doctor_specialties
+        )
 
         logging.info(f"Generated initial version of relation Slot "
                      f"of size {len(slot_data)}")
@@ -107,182 +112,166 @@ class Slot():
     #---------------------------------------------------------------- 
     def generate_slot_data_df(self):
         """
-            Return the current state of the DataFrame slot_data
+            Return the current state of the slots, as a DataFrame
         """
         logging.info("Return the Slot relation's data")
-        return self.slot_data
+        return self.slot_data.to_dataframe()
 
     #----------------------------------------------------------------
     def adjust_slot_to_start_end_dates(self,
-        slot_data: pd.DataFrame,
+        slot_data: SlotStore,
         doctor_data: pd.DataFrame
-        ):
+        ) -> SlotStore:
         """
             Remove the slots dates that are before the associated 
             doctor's working start date or after the working end date.
         """
         logging.info(f"Removing slots outside of the working period "
                      f"to the associated doctors.")
-        slot_data_copy = slot_data.copy()
-        slot_data_copy['date'] = pd.to_datetime(slot_data_copy['date']).dt.date
-
-        id_doctor_list = doctor_data['id_doctor'].unique()
-        for id in id_doctor_list:
-            start_date = doctor_data[doctor_data['id_doctor'] ==  id]['start_date'].values[0]
-            start_date = pd.to_datetime(start_date).date()
-            end_date = doctor_data[doctor_data['id_doctor'] ==  id]['end_date'].values[0]
-            end_date = pd.to_datetime(end_date).date()
-
-            slot_data_copy = slot_data_copy.drop(
-                slot_data_copy[
-                    (slot_data_copy['id_doctor']==id)
-                    & ((slot_data_copy['date'] < start_date)
-                    | (slot_data_copy['date'] > end_date))
-                    ].index
-                )
-
-        self.slot_data = slot_data_copy
-        return slot_data_copy
+
+        # Slots of doctors not included in doctor_data are kept
+        doctor_periods = doctor_data.drop_duplicates('id_doctor')
+        id_doctors = slot_data.get_id_doctors()
+        periods = interval_join(
+            points=slot_data.get_dates(),
+            interval_starts=doctor_periods['start_date'],
+            interval_ends=doctor_periods['end_date'],
+            keys=id_doctors,
+            interval_keys=doctor_periods['id_doctor']
+        )
+        known_doctor = np.isin(id_doctors, doctor_periods['id_doctor'].to_numpy())
+        slot_data = slot_data.take((periods >= 0) | ~known_doctor)
+
+        self.slot_data = slot_data
+        return slot_data
 
     #----------------------------------------------------------------
     def adjust_slots_to_country_holidays(self,
-        slot_data: pd.DataFrame,
+        slot_data: SlotStore,
         country_code: str = 'JO'
-        ):
+        ) -> SlotStore:
         """
             Remove the slots for which the date is a national holiday
             in the clinic's operating country.
         """
         logging.info(f"Adjusting slot dates to comply with public "
                      f"holidays in {country_code}.")
-        years = slot_data['date'].apply(lambda x: x.year).unique()
+        dates = slot_data.get_dates()
+        years = np.unique(dates.astype('datetime64[Y]').astype(np.int64) + 1970)
         jordan_holidays = get_country_holidays(
-            years = years,
+            years = years.tolist(),
             country_code = country_code
         )
-        slot_data = slot_data[~slot_data['date'].isin(jordan_holidays)]
+        holiday_dates = np.array(list(jordan_holidays.keys()), dtype='datetime64[D]')
+        slot_data = slot_data.take(~np.isin(dates, holiday_dates))
 
         self.slot_data = slot_data
         return slot_data
 
     #----------------------------------------------------------------
     def label_appointment_type(self,
-        slot_data: pd.DataFrame,
+        slot_data: SlotStore,
         doctor_historization: pd.DataFrame,
         max_daily_working_hours: int = 8
-        ):
+        ) -> SlotStore:
         """
-            Creates a new column ('type') to the DataFrame slot_data.
             Assign appointment type to each slot. The two categories
             are 'regular' and 'overtime'. The number of regular slots
             has to match the maximal monthly workload of the doctors
             and the maximal daily working hours. Every other slot is
-            categorised 'overtime'.
+            categorised 'overtime'. Slots outside of the doctors'
+            periods in doctor_historization are removed.
         """
         logging.info(f"Start labelling slots (regular/overtime) based "
                      f"on the doctors' workload and daily working hours.")
 
-        slot_data['type'] = ''
-        slot_data['date'] = pd.to_datetime(slot_data['date'])
-        doctor_historization['period_start_date'] = pd.to_datetime(doctor_historization['period_start_date'])
-        doctor_historization['period_end_date'] = pd.to_datetime(doctor_historization['period_end_date'])
-
-        slot_data['year_month'] = slot_data['date'].dt.to_period('M')
-        doctor_historization['year_month'] = doctor_historization['period_start_date'].dt.to_period('M')
-
-        merged = slot_data.merge(
-            doctor_historization,
-            on=['id_doctor', 'year_month'],
-            how='left'
+        # Map each slot to the period of its doctor containing it
+        periods = interval_join(
+            points=slot_data.get_dates(),
+            interval_starts=doctor_historization['period_start_date'],
+            interval_ends=doctor_historization['period_end_date'],
+            keys=slot_data.get_id_doctors(),
+            interval_keys=doctor_historization['id_doctor']
         )
+        in_period = periods >= 0
+        slot_data = slot_data.take(in_period)
+        periods = periods[in_period]
+
+        order = np.lexsort((slot_data.hours, slot_data.days, periods, slot_data.doctors))
+        slot_data = slot_data.take(order)
+        periods = periods[order]
+        days = slot_data.days.astype(np.int64)
+
+        # Within each doctor's period, days are filled in chronological
+        # order: the j-th day (from 0) can hold at most
+        # min(max_daily_working_hours, max_hours - j*max_daily_working_hours)
+        # regular slots, the earliest ones of the day
+        n = len(slot_data)
+        positions = np.arange(n)
+        new_period = np.ones(n, dtype=bool)
+        new_period[1:] = (periods[1:] != periods[:-1]) | (slot_data.doctors[1:] != slot_data.doctors[:-1])
+        new_day = new_period.copy()
+        new_day[1:] |= days[1:] != days[:-1]
+
+        period_first_day = np.maximum.accumulate(np.where(new_period, np.cumsum(new_day) - 1, 0))
+        day_ranks = np.cumsum(new_day) - 1 - period_first_day
+        day_first_position = np.maximum.accumulate(np.where(new_day, positions, 0))
+        slot_ranks = positions - day_first_position
+
+        max_hours = doctor_historization['max_monthly_hours'].to_numpy()[periods]
+        nb_regular_day = np.clip(
+            max_hours - day_ranks * max_daily_working_hours,
+            0,
+            max_daily_working_hours
+        )
+        slot_data.types = np.where(slot_ranks < nb_regular_day, REGULAR, OVERTIME).astype(np.uint8)
 
-        merged = merged[
-            (merged['date'] >= merged['period_start_date']) &
-            (merged['date'] <= merged['period_end_date'])
-        ]
-
-        merged = merged.sort_values(by=['id_doctor', 'year_month', 'date', 'time'])
-        def assign_types(group):
-            max_hours = group['max_monthly_hours'].iloc[0]
-            assigned_regular = 0
-            group['type'] = 'overtime'
-
-            for date, day_group in group.groupby('date'):
-                if assigned_regular >= max_hours:
-                    break
-
-                assignable_today = min(
-                    max_daily_working_hours,
-                    max_hours - assigned_regular
-                )
-                if assignable_today <= 0:
-                    break
-
-                idxs = day_group.index[:assignable_today]
-                group.loc[idxs, 'type'] = 'regular'
-                assigned_regular += assignable_today
-
-            return group
-
-        labeled = merged.groupby(['id_doctor', 'year_month'], group_keys=False).apply(assign_types)
-        revised_slot_data = labeled[['id_doctor', 'specialty', 'date', 'time', 'type']]
-
-        self.slot_data = revised_slot_data
-        return revised_slot_data
+        self.slot_data = slot_data
+        return slot_data
 
     #----------------------------------------------------------------
     def assign_id_slot(self,
-        slot_data: pd.DataFrame,
+        slot_data: SlotStore,
         pk_column_name: str = 'id_slot',
         starting_id_value: int = 1,
-        ):
+        ) -> SlotStore:
         """
-            Creates a new column ('id_slot') to the DataFrame
-            slot_data to serve as main identifier. 
-            Returns the DataFrame with the newly added id.
+            Assign the main identifier ('id_slot') of the slots, by
+            sorting them by date and time (then doctor) and numbering
+            them by position. Returns the sorted SlotStore.
             Order of rows does not matter, no need to sort first.
         """
         logging.info(f"Adding PK id_slot to relation Slot.")
 
-        slot_data = slot_data.sort_values(
-            ['date', 'time']
-        ).reset_index(drop=[True, True])
-
-        slot_data = add_primary_key_values(
-            relation=slot_data,
-            pk_column_name=pk_column_name,
-            starting_id_value=starting_id_value
+        slot_data = slot_data.take(
+            np.lexsort((slot_data.doctors, slot_data.hours, slot_data.days))
         )
+        slot_data.id_slot_column = pk_column_name
+        slot_data.id_slot_start = starting_id_value
         return slot_data
 
     #----------------------------------------------------------------
     def assign_week_slot(self,
-        slot_data: pd.DataFrame,
+        slot_data: SlotStore,
         start_day: int = 5 # has to be between 0 and 6
-        ):
+        ) -> SlotStore:
         """
-            Create a new column ('week') to the DataFrame slot_data.
-            The weeks of the slots are numbered, the first week being
+            Set the first day of the weeks of the slots, used to derive
+            their week numbers (column 'week'), the first week being
             assigned to the week of the first slot.
         """
         logging.info(f"Add the week number to all slots, week 1 being "
                      f"the week of the first slot.")
 
-        slot_weeks = slot_data.copy()
-        min_date = slot_weeks['date'].min()
-        w = min_date.weekday()
-        offset = (w - start_day) % 7
-        week1_start = min_date - pd.Timedelta(days=offset)
-        days_since_anchor = (slot_weeks['date'] - week1_start).dt.days
-        slot_weeks['week'] = (days_since_anchor // 7) + 1
+        slot_data.set_week_start_day(start_day)
 
-        self.slot_data = slot_weeks
-        return slot_weeks
+        self.slot_data = slot_data
+        return slot_data
 
     #----------------------------------------------------------------
     def assign_appointments_to_slots(self,
         appointment_data: pd.DataFrame,
-        slot_data: pd.DataFrame):
+        slot_data: SlotStore):
         """
             Assigns available slots to appointments, prioritizing surgery appointments.
             Rules:
@@ -296,160 +285,114 @@ class Slot():
         logging.info(f"Start creating relation Appointment_Slot by "
                      f"matching appointments to slots.")
 
-        appointment_data_copy = appointment_data.copy()
-        slot_data_copy = slot_data.copy()
-        slot_data_copy['id_appointment'] = None
+        # The matching is made on the arrays of the SlotStore: the
+        # columns of the slots are only materialized for the matched ones
+        if slot_data.doctor_specialties is None:
+            raise ValueError("The specialty of the doctors is required to "
+                             "assign appointments to slots.")
+        slot_weeks = slot_data.get_weeks()
+        slot_ids = slot_data.get_id_slots()
+        is_regular = slot_data.types == REGULAR
+        is_surgeon = slot_data.doctor_specialties[slot_data.doctors] == 'surgeon'
+        weeks = pd.unique(slot_weeks)
 
-        appointment_data_copy['appt_date'] = pd.to_datetime(appointment_data_copy['appt_date'])
-        slot_data_copy['date'] = pd.to_datetime(slot_data_copy['date'])
-        weeks = slot_data_copy['week'].unique()
+        # id_appointment assigned to each slot, -1 for free slots
+        slot_appointments = np.full(len(slot_data), -1, dtype=np.int64)
 
         def generate_surgery_planning(
-            slot_data: pd.DataFrame
-            ) -> pd.DataFrame:
+            ) -> np.ndarray:
             """
                 Generate a surgery slots planning by grouping available
-                slots associated to surgeons by three.
+                regular slots associated to surgeons by three
+                consecutive hours of the same day. Each day's slots
+                are grouped from the first hour of each run of
+                consecutive hours.
+                Returns the positions of the three slots of each group
+                (one row per group), groups being sorted by doctor,
+                day and hour.
             """
-            df = slot_data.copy()
-            df['date'] = pd.to_datetime(df['date'], dayfirst=True).dt.date
-
-            surgeons = df[df['specialty'] == 'surgeon'].copy()
-            if surgeons.empty:
-                return pd.DataFrame(
-                    columns=["id_doctor", "date", "slot1_id", "slot2_id", "slot3_id", "time"]
-                )
-
-            def hour_index(t):
-                return t.hour
-            surgeons.sort_values(["id_doctor", "date", "time"], inplace=True)
-            grouped = surgeons.groupby(["id_doctor", "date", "week", "type"])
-
-            blocks = []
-            k = 1
-            for (doc_id, day, week, type), group in grouped:
-                slot_ids = group["id_slot"].tolist()
-                times   = group["time"].tolist()
-                hours   = [hour_index(t) for t in times]
-                n = len(hours)
-
-                i = 0
-                while i <= n - 3:
-                    # Check if these three hours are consecutive
-                    if hours[i + 1] == hours[i] + 1 and hours[i + 2] == hours[i] + 2:
-                        slot1 = slot_ids[i]
-                        slot2 = slot_ids[i + 1]
-                        slot3 = slot_ids[i + 2]
-                        time1 = times[i].strftime("%H:%M")
-                        time2 = times[i + 1].strftime("%H:%M")
-                        time3 = times[i + 2].strftime("%H:%M")
-
-                        blocks.append({
-                            "id_slot": k,
-                            "id_doctor": doc_id,
-                            "date": day,
-                            "week": week,
-                            "type": type,
-                            "slot1_id": slot1,
-                            "slot2_id": slot2,
-                            "slot3_id": slot3,
-                            "times": f"{time1} → {time2} → {time3}"
-                        })
-                        k = k+1
-                        i += 3
-                    else:
-                        i += 1
-            
-            surgery_planning = pd.DataFrame(blocks)
-
-            return surgery_planning
-
+            positions = np.flatnonzero(is_surgeon & is_regular)
+            positions = positions[np.lexsort((
+                slot_data.hours[positions],
+                slot_data.days[positions],
+                slot_data.doctors[positions]
+            ))]
+            doctors = slot_data.doctors[positions]
+            days = slot_data.days[positions]
+            hours = slot_data.hours[positions].astype(np.int64)
+
+            # Runs of consecutive hours of a doctor's day
+            new_run = np.ones(len(positions), dtype=bool)
+            new_run[1:] = ((doctors[1:] != doctors[:-1])
+                           | (days[1:] != days[:-1])
+                           | (hours[1:] != hours[:-1] + 1))
+            run_starts = np.flatnonzero(new_run)
+            run_lengths = np.diff(np.append(run_starts, len(positions)))
+            rank_in_run = np.arange(len(positions)) - np.repeat(run_starts, run_lengths)
+            run_length = np.repeat(run_lengths, run_lengths)
+
+            group_starts = np.flatnonzero(
+                (rank_in_run % 3 == 0) & (rank_in_run + 3 <= run_length)
+            )
+            return positions[group_starts[:, None] + np.arange(3)]
 
         def assign_appointment_type_to_slots(
             type_appointments: pd.DataFrame,
-            type_planning: pd.DataFrame,
+            free_weeks: np.ndarray,
+            free_ranks: np.ndarray,
             weeks: list
-            ):
+            ) -> np.ndarray:
             """
                 Match the appointments of a specific type: surgery or
                 regular (listed in DataFrame type_appointments) to
-                the planning of available slots for the same specific
-                type (listed in DataFrame type_planning).
+                the free regular slots (or groups of slots) of the
+                planning for the same specific type, given by their
+                week (free_weeks) and rank (free_ranks, e.g. id_slot).
                 The match is made by week: all appointments planned
                 for a week are assigned to slots in the same week.
                 If there are not enough available slots in that week,
                 the week of non-assigned appointments is modified to 
                 the following one.
+                Each week's free regular slots are only counted: the
+                first appointments of the week (in order of
+                type_appointments) take its free slots by increasing
+                rank, up to the week's capacity.
+                Returns the id_appointment assigned to each free slot,
+                -1 for slots remaining free.
             """
-            slots_columns = type_planning.columns
-            assigned_slot = pd.DataFrame(columns = slots_columns)
-            for week in weeks:
-                week_appointments = type_appointments[type_appointments['week'] == week]
-                week_planning = type_planning[type_planning['week'] == week]
-                for _, appt in week_appointments.iterrows():
-                    id_appt = appt['id_appointment']
-                    avail_reg_slot = week_planning[
-                        (week_planning['id_appointment'].isna())
-                        & (week_planning['type'] == 'regular')]
-                    avail_over_slot = week_planning[
-                        (week_planning['id_appointment'].isna())
-                        & (week_planning['type'] == 'regular')]
-
-                    if len(avail_reg_slot) > 0:
-                        id_planning = min(avail_reg_slot['id_slot'])
-                        week_planning.loc[
-                            week_planning['id_slot']==id_planning,
-                        'id_appointment'] = id_appt
-                    elif len(avail_over_slot) > 0:
-                        id_planning = min(avail_over_slot['id_slot'])
-                        week_planning.loc[
-                            week_planning['id_slot']==id_planning,
-                        'id_appointment'] = id_appt
-                    else:
-                        type_appointments.loc[
-                            type_appointments['id_appointment'] == id_appt,
-                        'week'] = week+1
-                assigned_slot = pd.concat(
-                    [assigned_slot, week_planning], 
-                    ignore_index = True)
-
-            return assigned_slot
-
-        def expand_planning_to_slots(
-            planning_df: pd.DataFrame
-            ) -> pd.DataFrame:
-            """
-                Reformat the assigned grouped slots to surgical
-                appointments to get the individual match: 1 slot -
-                1 appointment. In the new format, each surgical
-                appointment will be assigned to three slots
-                (compared to one group of slot in the input DataFrame).
-            """
+            assigned_appointments = np.full(len(free_weeks), -1, dtype=np.int64)
 
-            df = planning_df.copy()
-            df = df.rename(columns={'id_slot': 'id_slot_tmp'})
-            keep_cols = [col for col in df.columns
-                        if col not in ("slot1_id", "slot2_id", "slot3_id")]
-            melted = df.melt(
-                id_vars=keep_cols,
-                value_vars=["slot1_id", "slot2_id", "slot3_id"],
-                var_name="slot_position",
-                value_name="id_slot"
-            )
-
-            melted = melted.dropna(subset=["id_slot"])
-            melted = melted.drop(columns=["slot_position"])
-            cols_order = ["id_doctor", "date", "id_slot", "id_appointment"]
-            if "id_appt" in keep_cols:
-                cols_order.append("id_appointment")
+            # Free slots, grouped by week and sorted by rank
+            free_positions = np.lexsort((free_ranks, free_weeks))
+            free_weeks = free_weeks[free_positions]
 
-            for c in keep_cols:
-                if c not in ("id_doctor", "date", "id_appointment", "id_appointment"):
-                    cols_order.append(c)
-            
-            reformated_planning = melted[cols_order]
+            # Appointments grouped by week, keeping their order
+            appointment_weeks = type_appointments['week'].to_numpy()
+            appointment_ids = type_appointments['id_appointment'].to_numpy()
+            appointment_order = np.argsort(appointment_weeks, kind='stable')
+            sorted_appointment_weeks = appointment_weeks[appointment_order]
 
-            return reformated_planning
+            carried_appointments = {}
+            for week in weeks:
+                week_appointments = appointment_order[
+                    np.searchsorted(sorted_appointment_weeks, week, side='left'):
+                    np.searchsorted(sorted_appointment_weeks, week, side='right')
+                ]
+                if week in carried_appointments:
+                    week_appointments = np.sort(np.concatenate([
+                        week_appointments,
+                        carried_appointments.pop(week)
+                    ]))
+                first_free = np.searchsorted(free_weeks, week, side='left')
+                capacity = np.searchsorted(free_weeks, week, side='right') - first_free
+                nb_assigned = min(capacity, len(week_appointments))
+
+                assigned_appointments[free_positions[first_free:first_free + nb_assigned]] = \
+                    appointment_ids[week_appointments[:nb_assigned]]
+                if nb_assigned < len(week_appointments):
+                    carried_appointments[week + 1] = week_appointments[nb_assigned:]
+
+            return assigned_appointments
 
         # ASSIGN SURGERIES FIRST
         logging.info(f"start assigning surgical appointments to "
@@ -457,72 +400,57 @@ class Slot():
         surgery_appointments = appointment_data[
             appointment_data['appt_reason'] == 'surgery'
         ]
-        surgery_planning = generate_surgery_planning(slot_data_copy)
-        surgery_planning['id_appointment'] = None
-
-        assigned_surgeries_grouped = assign_appointment_type_to_slots(
+        surgery_planning = generate_surgery_planning()
+        # Groups are ranked by their order in the planning
+        assigned_surgeries = assign_appointment_type_to_slots(
             type_appointments = surgery_appointments,
-            type_planning = surgery_planning,
+            free_weeks = slot_weeks[surgery_planning[:, 0]],
+            free_ranks = np.arange(len(surgery_planning)),
             weeks = weeks
         )
-        assigned_surgeries = expand_planning_to_slots(
-            planning_df = assigned_surgeries_grouped
-        )
-
-        # ADD THE id_appointment TO slot_data_copy
-        surg_slot_to_appt = assigned_surgeries.set_index('id_slot')['id_appointment'].to_dict()
-        slot_data_copy['id_appointment'] = slot_data_copy['id_appointment'].fillna(
-            slot_data_copy["id_slot"].map(surg_slot_to_appt)
-        )
+        # Each surgery takes the three slots of its group
+        slot_appointments[surgery_planning.ravel()] = np.repeat(assigned_surgeries, 3)
 
         # ASSIGN FOLLOW-UP SURGERY
         logging.info(f"start assigning surgery follow-up "
                      f"appointments to available slots.")
-        fu_surgery_appointments = appointment_data_copy[
-            appointment_data_copy['appt_reason'] == 'follow-up surgery'
-        ]
-        fu_surgery_planning = slot_data_copy[
-            (slot_data_copy['specialty'] == 'surgeon')
-            & (slot_data_copy['id_appointment'].isna())
+        fu_surgery_appointments = appointment_data[
+            appointment_data['appt_reason'] == 'follow-up surgery'
         ]
-        assigned_fu_surgeries = assign_appointment_type_to_slots(
+        fu_surgery_planning = np.flatnonzero(
+            is_surgeon & is_regular & (slot_appointments == -1)
+        )
+        slot_appointments[fu_surgery_planning] = assign_appointment_type_to_slots(
             type_appointments = fu_surgery_appointments,
-            type_planning = fu_surgery_planning,
+            free_weeks = slot_weeks[fu_surgery_planning],
+            free_ranks = slot_ids[fu_surgery_planning],
             weeks = weeks
         )
-        # ADD THE id_appointment TO slot_data_copy
-        ufs_slot_to_appt = assigned_fu_surgeries.set_index('id_slot')['id_appointment'].to_dict()
-        slot_data_copy['id_appointment'] = slot_data_copy['id_appointment'].fillna(
-            slot_data_copy["id_slot"].map(ufs_slot_to_appt)
-        )
 
         # ASSIGN OTHER APPOINTMENTS
         logging.info(f"start assigning remaining appointments "
                      f"to available slots.")
-        other_appointments = appointment_data_copy[
-            ~appointment_data_copy['appt_reason'].isin(
+        other_appointments = appointment_data[
+            ~appointment_data['appt_reason'].isin(
                 ['follow-up surgery', 'surgery']
             )
         ]
-        other_planning = slot_data_copy[
-            slot_data_copy['id_appointment'].isna()
-        ]
-        assigned_other_appt = assign_appointment_type_to_slots(
+        other_planning = np.flatnonzero(is_regular & (slot_appointments == -1))
+        slot_appointments[other_planning] = assign_appointment_type_to_slots(
             type_appointments = other_appointments,
-            type_planning = other_planning,
+            free_weeks = slot_weeks[other_planning],
+            free_ranks = slot_ids[other_planning],
             weeks = weeks
         )
-        # ADD THE id_appointment TO slot_data_copy
-        other_slot_to_appt = assigned_other_appt.set_index('id_slot')['id_appointment'].to_dict()
-        slot_data_copy['id_appointment'] = slot_data_copy['id_appointment'].fillna(
-            slot_data_copy["id_slot"].map(other_slot_to_appt)
-        )
 
-        appointment_slot_data = slot_data_copy[
-            ~slot_data_copy['id_appointment'].isna()
-        ][['id_appointment', 'id_slot']]
-
-        appointment_slot_data['id_appointment'] = appointment_slot_data['id_appointment'].astype(int)
+        booked_positions = np.flatnonzero(slot_appointments != -1)
+        appointment_slot_data = pd.DataFrame(
+            {
+                'id_appointment': slot_appointments[booked_positions],
+                'id_slot': slot_ids[booked_positions]
+            },
+            index=booked_positions
+        )
 
         logging.info(f"Generated relation Appointment_Slot "
                      f"of size {len(appointment_slot_data)}")
@@ -555,4 +483,74 @@ class Slot():
         )
 
         self.appointment_slot_data = appointment_slot_data
-        return appointment_slot_data
\ No newline at end of file
+        return appointment_slot_data
+
+    #----------------------------------------------------------------
+    def select_booked_slots(self,
+        slot_data: SlotStore,
+        appointment_slot_data: pd.DataFrame,
+        free_slots_fraction: float = 0.0
+        ) -> SlotStore:
+        """
+            Sparse mode: return a SlotStore with only the slots booked
+            by an appointment (listed in appointment_slot_data), plus
+            a random fraction free_slots_fraction of the free slots,
+            sorted by id_slot. The capacity of the doctors' days is kept
+            in the counters returned by function summarize_slot_capacity.
+        """
+        if not 0 <= free_slots_fraction <= 1:
+            raise ValueError(f"free_slots_fraction must be between 0 and 1, "
+                             f"got {free_slots_fraction}.")
+
+        is_kept = np.isin(
+            slot_data.get_id_slots(),
+            appointment_slot_data['id_slot'].to_numpy()
+        )
+        free_positions = np.flatnonzero(~is_kept)
+        nb_free_kept = int(round(len(free_positions) * free_slots_fraction))
+        if nb_free_kept > 0:
+            is_kept[self.rng.choice(free_positions, size=nb_free_kept, replace=False)] = True
+
+        booked_slot_data = slot_data.take(np.flatnonzero(is_kept))
+        logging.info(f"Sparse Slot relation of size {len(booked_slot_data)} "
+                     f"kept out of {len(slot_data)} slots.")
+        return booked_slot_data
+
+    #----------------------------------------------------------------
+    def summarize_slot_capacity(self,
+        slot_data: SlotStore,
+        appointment_slot_data: pd.DataFrame
+        ) -> pd.DataFrame:
+        """
+            Return a DataFrame with one row per doctor and working day,
+            counting its slots (nb_slots), regular slots
+            (nb_regular_slots) and slots booked by an appointment
+            (nb_booked_slots), so that the capacity of the planning is
+            kept when only the booked slots are exported.
+        """
+        is_booked = np.isin(
+            slot_data.get_id_slots(),
+            appointment_slot_data['id_slot'].to_numpy()
+        )
+        nb_days = int(slot_data.days.max()) + 1 if len(slot_data) > 0 else 1
+        keys = slot_data.doctors.astype(np.int64) * nb_days + slot_data.days
+        unique_keys, key_positions = np.unique(keys, return_inverse=True)
+
+        capacity_data = pd.DataFrame({
+            'id_doctor': slot_data.doctor_ids[unique_keys // nb_days],
+            'date': pd.to_datetime(
+                slot_data.origin + (unique_keys % nb_days).astype('timedelta64[D]')
+            ),
+            'nb_slots': np.bincount(key_positions, minlength=len(unique_keys)),
+            'nb_regular_slots': np.bincount(
+                key_positions,
+                weights=slot_data.types == REGULAR,
+                minlength=len(unique_keys)
+            ).astype(np.int64),
+            'nb_booked_slots': np.bincount(
+                key_positions,
+                weights=is_booked,
+                minlength=len(unique_keys)
+            ).astype(np.int64)
+        })
+        return capacity_data
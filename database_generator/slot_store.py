@@ -0,0 +1,200 @@
+import numpy as np
+import pandas as pd
+from datetime import time
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="- %(levelname)s - %(asctime)s - %(message)s"
+)
+
+# Labels of the slot types, indexed by their uint8 code
+SLOT_TYPES = np.array(['regular', 'overtime', ''], dtype=object)
+REGULAR, OVERTIME, UNLABELLED = 0, 1, 2
+
+# datetime.time objects of the hours of the day, indexed by hour
+HOUR_TIMES = np.array([time(hour) for hour in range(24)], dtype=object)
+
+
+class SlotStore():
+    """
+        This class is used to store the slots of relation Slot in a
+        compact form: one array per attribute (struct of arrays), with
+        one small integer per slot and attribute instead of Timestamp,
+        time and string objects:
+        - doctors: index of the slot's doctor in doctor_ids (uint16)
+        - days: number of days since the origin date (uint16)
+        - hours: hour of the day (uint8)
+        - types: type of the slot, code in SLOT_TYPES (uint8)
+        The identifiers of the slots (assigned by position once the
+        slots are sorted, only stored explicitly for a subset of the
+        slots) and their week number are derived arithmetically.
+        The columns date, time, type... are only materialized when
+        exporting the slots to a DataFrame.
+    """
+    def __init__(self,
+        doctor_ids: np.ndarray,
+        origin,
+        doctors: np.ndarray,
+        days: np.ndarray,
+        hours: np.ndarray,
+        types: np.ndarray = None,
+        doctor_specialties: np.ndarray = None
+        ):
+        """
+            Initialize the instance with the sorted distinct id_doctor
+            values (doctor_ids), the origin date of the day numbers
+            (usually the clinic's opening), and the attributes' arrays.
+            Slots are unlabelled if types is not specified.
+            doctor_specialties gives the specialty of each doctor of
+            doctor_ids, when known.
+        """
+        if len(doctor_ids) > np.iinfo(np.uint16).max:
+            raise ValueError(f"A SlotStore can store the slots of at most "
+                             f"{np.iinfo(np.uint16).max} doctors.")
+        if len(days) > 0 and (np.min(days) < 0 or np.max(days) > np.iinfo(np.uint16).max):
+            raise ValueError(f"Slot days must be between 0 and "
+                             f"{np.iinfo(np.uint16).max} days after the origin date.")
+
+        self.doctor_ids = np.asarray(doctor_ids)
+        self.doctor_specialties = doctor_specialties
+        self.origin = np.datetime64(pd.Timestamp(origin).date(), 'D')
+        self.doctors = np.asarray(doctors, dtype=np.uint16)
+        self.days = np.asarray(days, dtype=np.uint16)
+        self.hours = np.asarray(hours, dtype=np.uint8)
+        if types is None:
+            types = np.full(len(self.days), UNLABELLED, dtype=np.uint8)
+        self.types = np.asarray(types, dtype=np.uint8)
+
+        # Set by functions Slot.assign_id_slot and set_week_start_day
+        self.id_slot_column = None
+        self.id_slot_start = None
+        self.id_slots = None
+        self.week_start_day = None
+        self.week1_start = None
+
+    #----------------------------------------------------------------
+    def __len__(self):
+        return len(self.days)
+
+    #----------------------------------------------------------------
+    @property
+    def nbytes(self) -> int:
+        """
+            Return the memory used by the slots' arrays, in bytes
+        """
+        return (self.doctors.nbytes + self.days.nbytes
+                + self.hours.nbytes + self.types.nbytes)
+
+    #----------------------------------------------------------------
+    def take(self,
+        positions: np.ndarray
+        ):
+        """
+            Return a new SlotStore containing the slots at the specified
+            positions (integer positions or boolean mask), in that order.
+            The id_slot of the slots, if assigned, are kept.
+        """
+        slot_store = SlotStore(
+            doctor_ids=self.doctor_ids,
+            origin=self.origin,
+            doctors=self.doctors[positions],
+            days=self.days[positions],
+            hours=self.hours[positions],
+            types=self.types[positions],
+            doctor_specialties=self.doctor_specialties
+        )
+        slot_store.week_start_day = self.week_start_day
+        slot_store.week1_start = self.week1_start
+        if self.id_slot_column is not None:
+            slot_store.id_slot_column = self.id_slot_column
+            slot_store.id_slots = self.get_id_slots()[positions]
+        return slot_store
+
+    #----------------------------------------------------------------
+    def get_dates(self) -> np.ndarray:
+        """
+            Return the dates of the slots (dtype datetime64[D])
+        """
+        return self.origin + self.days.astype('timedelta64[D]')
+
+    #----------------------------------------------------------------
+    def get_id_doctors(self) -> np.ndarray:
+        """
+            Return the id_doctor of the slots
+        """
+        return self.doctor_ids[self.doctors]
+
+    #----------------------------------------------------------------
+    def set_week_start_day(self,
+        start_day: int
+        ):
+        """
+            Set the first day of the weeks (0 for Monday to 6 for
+            Sunday), week 1 being the week of the first slot.
+        """
+        first_day = int(self.days.min())
+        # 1970-01-01 (day 0 of datetime64) was a Thursday (weekday 3)
+        first_weekday = (int(self.origin.astype(np.int64)) + first_day + 3) % 7
+        self.week_start_day = start_day
+        self.week1_start = first_day - (first_weekday - start_day) % 7
+
+    #----------------------------------------------------------------
+    def get_weeks(self) -> np.ndarray:
+        """
+            Return the week numbers of the slots, as set by function
+            set_week_start_day.
+        """
+        if self.week1_start is None:
+            raise ValueError("No week start day set for the slots yet.")
+        return (self.days.astype(np.int64) - self.week1_start) // 7 + 1
+
+    #----------------------------------------------------------------
+    def get_id_slots(self) -> np.ndarray:
+        """
+            Return the id_slot of the slots, assigned by position by
+            function Slot.assign_id_slot.
+        """
+        if self.id_slots is not None:
+            return self.id_slots
+        if self.id_slot_start is None:
+            raise ValueError("No id_slot assigned to the slots yet.")
+        return np.arange(self.id_slot_start, self.id_slot_start + len(self))
+
+    #----------------------------------------------------------------
+    def to_dataframe(self,
+        columns: list = None
+        ) -> pd.DataFrame:
+        """
+            Materialize the slots into a DataFrame with the specified
+            columns, among id_slot (or the name given when assigned),
+            id_doctor, specialty, date, time, type and week.
+            By default, all the columns available are returned.
+        """
+        if columns is None:
+            columns = ['id_doctor', 'date', 'time', 'type']
+            if self.doctor_specialties is not None:
+                columns.insert(1, 'specialty')
+            if self.id_slot_column is not None:
+                columns.insert(0, self.id_slot_column)
+            if self.week_start_day is not None:
+                columns.append('week')
+
+        materializers = {
+            'id_doctor': self.get_id_doctors,
+            'specialty': lambda: self.doctor_specialties[self.doctors],
+            'date': lambda: pd.to_datetime(self.get_dates()),
+            'time': lambda: HOUR_TIMES[self.hours],
+            'type': lambda: SLOT_TYPES[self.types],
+            'week': self.get_weeks
+        }
+        if self.id_slot_column is not None:
+            materializers[self.id_slot_column] = self.get_id_slots
+
+        slot_data = pd.DataFrame(index=pd.RangeIndex(len(self)))
+        for column in columns:
+            if column not in materializers:
+                raise KeyError(f"Column '{column}' cannot be materialized "
+                               f"from the SlotStore.")
+            slot_data[column] = materializers[column]()
+        return slot_data
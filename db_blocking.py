@@ -0,0 +1,146 @@
+import os
+import pandas as pd
+from data_pollutor.blocking_index import (
+    BlockingIndex,
+    generate_qgram_keys,
+    generate_soundex_keys,
+    generate_prefix_keys,
+    generate_sorted_neighbourhood_order,
+    evaluate_blocking_index,
+    evaluate_sorted_neighbourhood
+)
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="- %(levelname)s - %(asctime)s - %(message)s"
+)
+
+#================================================================
+# Parameters
+output_directory = 'working_data/blocking'
+qgram_size = 3
+microchip_prefix_length = 6
+sorted_neighbourhood_window = 5
+# Blocks containing more rows are dropped from the q-gram indexes
+max_block_size = 1000
+
+os.makedirs(output_directory, exist_ok=True)
+
+#================================================================
+# Import data from polluted relations
+logging.info(f"Importing csv files containing the data of the polluted "
+             f"relations to build blocking indexes on.")
+
+animal_au_dirty = pd.read_csv('working_data/animal_au_dirty.csv')
+owner_au_dirty = pd.read_csv('working_data/owner_au_dirty.csv')
+microchip_au_dirty = pd.read_csv('working_data/microchip_au_dirty.csv')
+doctor_au_dirty = pd.read_csv('working_data/doctor_au_dirty.csv')
+
+#================================================================
+# Build blocking indexes and evaluate them against the ground truth
+# (identifier of the clean tuple kept in the *_v1 columns)
+# Each index gives the row positions in the polluted csv file
+blocking_results = []
+
+def build_and_evaluate(
+    relation_dirty: pd.DataFrame,
+    name: str,
+    row_keys: tuple,
+    true_column: str,
+    max_block_size: int = None
+    ):
+    index = BlockingIndex.from_row_keys(
+        row_positions=row_keys[0],
+        row_keys=row_keys[1],
+        nb_rows=len(relation_dirty),
+        name=name,
+        max_block_size=max_block_size
+    )
+    index.save(os.path.join(output_directory, f"{name}.npz"))
+    blocking_results.append(evaluate_blocking_index(
+        index=index,
+        true_labels=relation_dirty[true_column]
+    ))
+
+## Relation animal
+build_and_evaluate(
+    relation_dirty=animal_au_dirty,
+    name='animal_name_soundex',
+    row_keys=generate_soundex_keys(animal_au_dirty['name']),
+    true_column='id_animal_v1'
+)
+build_and_evaluate(
+    relation_dirty=animal_au_dirty,
+    name='animal_name_qgram',
+    row_keys=generate_qgram_keys(animal_au_dirty['name'], q=qgram_size),
+    true_column='id_animal_v1',
+    max_block_size=max_block_size
+)
+blocking_results.append(evaluate_sorted_neighbourhood(
+    sorted_rows=generate_sorted_neighbourhood_order(
+        animal_au_dirty, ['name', 'breed']
+    ),
+    true_labels=animal_au_dirty['id_animal_v1'],
+    window_size=sorted_neighbourhood_window,
+    name='animal_name_breed_sorted_neighbourhood'
+))
+
+## Relation owner
+build_and_evaluate(
+    relation_dirty=owner_au_dirty,
+    name='owner_last_name_soundex',
+    row_keys=generate_soundex_keys(owner_au_dirty['last_name']),
+    true_column='id_owner_v1'
+)
+build_and_evaluate(
+    relation_dirty=owner_au_dirty,
+    name='owner_last_name_qgram',
+    row_keys=generate_qgram_keys(owner_au_dirty['last_name'], q=qgram_size),
+    true_column='id_owner_v1',
+    max_block_size=max_block_size
+)
+build_and_evaluate(
+    relation_dirty=owner_au_dirty,
+    name='owner_phone_number_qgram',
+    row_keys=generate_qgram_keys(
+        owner_au_dirty['phone_number'], q=qgram_size + 1, keep='digits'
+    ),
+    true_column='id_owner_v1',
+    max_block_size=max_block_size
+)
+blocking_results.append(evaluate_sorted_neighbourhood(
+    sorted_rows=generate_sorted_neighbourhood_order(
+        owner_au_dirty, ['last_name', 'first_name']
+    ),
+    true_labels=owner_au_dirty['id_owner_v1'],
+    window_size=sorted_neighbourhood_window,
+    name='owner_last_first_name_sorted_neighbourhood'
+))
+
+## Relation microchip
+build_and_evaluate(
+    relation_dirty=microchip_au_dirty,
+    name='microchip_number_prefix',
+    row_keys=generate_prefix_keys(
+        microchip_au_dirty['number'], prefix_length=microchip_prefix_length
+    ),
+    true_column='id_microchip_v1'
+)
+
+## Relation doctor
+build_and_evaluate(
+    relation_dirty=doctor_au_dirty,
+    name='doctor_last_name_soundex',
+    row_keys=generate_soundex_keys(doctor_au_dirty['last_name']),
+    true_column='id_doctor_v1'
+)
+
+#================================================================
+# Save evaluation results in a csv file
+logging.info(f"Saving evaluation of the blocking indexes into new "
+             f"csv file.")
+
+pd.DataFrame(blocking_results).to_csv(
+    os.path.join(output_directory, 'blocking_evaluation.csv')
+)
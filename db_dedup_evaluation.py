@@ -0,0 +1,77 @@
+import os
+import pandas as pd
+from au_pollutor.ground_truth import GroundTruthStore, GROUND_TRUTH_KEYS
+from au_pollutor.dedup_evaluation import evaluate_relation_deduplication
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="- %(levelname)s - %(asctime)s - %(message)s"
+)
+
+logging.info(f"Setting values of input parameters.")
+# Set the directory and the suffix of the instance the deduplication was run
+# on ('au' for the *_au.csv files, 'au_dirty' for the *_au_dirty.csv files)
+input_directory = 'working_data'
+instance_suffix = 'au_dirty'
+
+# Set the cluster file of each relation to evaluate: a csv file giving, for
+# the tuples of the relation (identified by their id, e.g. 'id_animal'), the
+# cluster assigned by the deduplication method in column cluster_column.
+# Tuples missing from the cluster file are considered as singletons
+cluster_files = {
+    'animal': 'working_data/animal_clusters.csv'
+}
+cluster_column = 'cluster'
+
+# Set the directory of the ground truth saved by db_pollution_au.py (None to
+# read the clean identifiers from the *_v1 columns of the instance)
+ground_truth_directory = 'working_data/ground_truth'
+
+# Set the csv file in which the evaluation is saved
+output_path = 'working_data/dedup_evaluation.csv'
+
+#----------------------------------------------------------------------------
+ground_truth = None
+if ground_truth_directory is not None:
+    ground_truth = GroundTruthStore(ground_truth_directory)
+
+dedup_results = {}
+for relation, cluster_file in cluster_files.items():
+    if relation not in GROUND_TRUTH_KEYS:
+        raise KeyError(f"No ground truth identifiers defined for "
+                       f"relation {relation}")
+    au_column = GROUND_TRUTH_KEYS[relation][0]
+
+    logging.info(f"Importing relation {relation} and its clusters from "
+                 f"{cluster_file}.")
+    relation_au = pd.read_csv(os.path.join(input_directory, f"{relation}_{instance_suffix}.csv"))
+    clusters = pd.read_csv(cluster_file, usecols=[au_column, cluster_column])
+    if clusters[au_column].duplicated().any():
+        raise ValueError(f"Some tuples of relation {relation} are assigned to "
+                         f"several clusters in {cluster_file}.")
+    if cluster_column in relation_au.columns:
+        relation_au = relation_au.drop(columns=cluster_column)
+    relation_au = relation_au.merge(clusters, on=au_column, how='left')
+
+    # Each tuple without cluster gets its own one
+    singletons = relation_au[cluster_column].isna()
+    relation_au[cluster_column] = relation_au[cluster_column].astype(str)
+    relation_au.loc[singletons, cluster_column] = (
+        'singleton_' + relation_au.loc[singletons, au_column].astype(str)
+    )
+    logging.info(f"{int(singletons.sum())} tuples of relation {relation} are "
+                 f"not found in the cluster file and considered as singletons.")
+
+    dedup_results[relation] = evaluate_relation_deduplication(
+        relation=relation,
+        relation_au=relation_au,
+        cluster_column=cluster_column,
+        ground_truth=ground_truth
+    )
+
+#================================================================
+# Save evaluation results in a csv file
+logging.info(f"Saving evaluation of the deduplication into {output_path}.")
+
+pd.DataFrame.from_dict(dedup_results, orient='index').rename_axis('relation').to_csv(output_path)
@@ -0,0 +1,40 @@
+from embedded_db.embedded_schema import EmbeddedDatabase
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="- %(levelname)s - %(asctime)s - %(message)s"
+)
+
+logging.info(f"Setting values of input parameters.")
+# Set the engine of the local database: 'sqlite' (no additional package) or
+# 'duckdb' (requires pip install duckdb)
+dialect = 'sqlite'
+database_path = 'working_data/perfect_pet.sqlite'
+
+# Set the schemas to create and load: 'clean_db' (clean instance),
+# 'polluted_db_au' (polluted with artificial unicity) and 'polluted_db'
+# (polluted with artificial unicity and data quality issues)
+schema_names = ['clean_db', 'polluted_db_au', 'polluted_db']
+
+# Set the directory of the data files of the relations (csv files, or parquet
+# files with the same names)
+data_directory = 'working_data'
+
+#----------------------------------------------------------------------------
+Database = EmbeddedDatabase(
+    database_path = database_path,
+    dialect = dialect
+)
+for schema_name in schema_names:
+    logging.info(f"Loading schema {schema_name} into {database_path}.")
+    Database.load_schema(
+        schema_name = schema_name,
+        data_directory = data_directory
+    )
+
+# Check the loaded instances
+for schema_name in schema_names:
+    nb_animals = Database.query(f"SELECT count(*) AS nb FROM {schema_name}.animal")['nb'][0]
+    logging.info(f"Schema {schema_name} contains {nb_animals} animals.")
+Database.close()
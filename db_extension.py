@@ -0,0 +1,319 @@
+import os
+import pandas as pd
+from database_generator.animal import AnimalWeigth
+from database_generator.microchip import Microchip
+from database_generator.appointment import Appointment
+from database_generator.service import Service
+from database_generator.slot import Slot
+from database_generator.extension import InstanceExtension, load_relations
+from random_streams import RandomStreams
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="- %(levelname)s - %(asctime)s - %(message)s"
+)
+
+# import external data
+logging.info(f"Importing base datasets from csv files.")
+animal_list = pd.read_csv('base_data/animal_list.csv')
+appt_reason_service_list = pd.read_csv('base_data/appt_reason_service_list.csv')
+cat_breed_weight_range = pd.read_csv('base_data/cat_breed_weight_range.csv')
+dog_breed_weight_range = pd.read_csv('base_data/dog_breed_weight_range.csv')
+microchip_codes_data = pd.read_csv('base_data/microchip_codes_data.csv')
+surgery_types_distribution = pd.read_csv('base_data/surgery_types_distribution.csv')
+
+logging.info(f"Setting values of input parameters.")
+# Set the master seed from which all random draws are derived (see
+# db_generation.py). Each extension gets its own streams, derived from its
+# last operation date
+master_seed = 56
+streams = RandomStreams(master_seed)
+
+# Set the directories of the instance to extend: the directory of the generated
+# instance, followed by the directories of its previous extensions (if any)
+instance_directories = ['working_data']
+logging.info(f"The instance to extend is read from {instance_directories}.")
+
+# Set the new last appointment date of the instance. When None, the instance
+# is extended by extension_months months
+last_operation_date = None
+extension_months = 3
+
+# Set the number of new patients microchipped during the new period. When None,
+# patients keep being registered at the same daily rate as in the instance
+nb_new_animals = None
+
+# Set the same parameters as the ones used to generate the instance (see
+# db_generation.py)
+life_expectancy = 15
+dob_microchip_gap = 100
+country_code = 'JO'
+start_time = 8
+end_time = 20
+week_start_day = 5
+weekly_days_off = [4]
+daily_max_worked_hours = 8
+locations_dict = {
+    'between_shoulders':0.9,
+    'midline_cervicals':0.01,
+    'left_lateral_neck':0.08,
+    'right_lateral_neck':0.01
+}
+prop_visit_non_followup = {
+    'annual_visit':0.5,
+    'sick_pet':0.2,
+    'injured_pet':0.2,
+    'surgery':0.1
+}
+
+#----------------------------------------------------------------------------
+# Load the relations of the instance to extend
+logging.info(f"Loading the relations of the instance to extend.")
+relations = load_relations(instance_directories)
+
+if last_operation_date is None:
+    last_period_end_date = pd.to_datetime(
+        relations['doctor_historization']['period_end_date']
+    ).max()
+    last_operation_date = (
+        last_period_end_date + pd.offsets.MonthEnd(extension_months)
+    ).date()
+logging.info(f"The new last appointment date was set to {last_operation_date}.")
+
+# The streams of the extension depend on its last operation date
+extension_shard = last_operation_date.toordinal()
+output_directory = f"working_data/extension_{last_operation_date}"
+
+Extension = InstanceExtension(
+    relations = relations,
+    last_operation_date = last_operation_date,
+    rng = streams.generator('extension', extension_shard)
+)
+
+#----------------------------------------------------------------------------
+# Extend the working periods of the doctors still working at the clinic
+logging.info(f"Extending relations Doctor and Doctor_Historization.")
+doctor_delta, doctor_historization_delta = Extension.extend_doctor_historization()
+
+#----------------------------------------------------------------------------
+# Continue the appointment timeline of the living animals
+logging.info(f"Generating the appointments of the existing animals.")
+continued_appointment_data = Extension.continue_appointments(
+    life_expectancy = life_expectancy,
+    prop_visit_non_followup = prop_visit_non_followup
+)
+
+#----------------------------------------------------------------------------
+# Create the new patients and their microchips
+if nb_new_animals is None:
+    nb_new_animals = Extension.estimate_nb_new_animals()
+logging.info(f"The number of new patients was set to {nb_new_animals}.")
+new_animal_data = Extension.generate_new_animals(
+    base_animal_data = animal_list,
+    nb_new_animals = nb_new_animals,
+    dob_microchip_gap = dob_microchip_gap
+)
+
+# The market years of the microchip codes are only stored in the base dataset,
+# whose rows are in the order of relation microchip_code
+microchip_code_data = microchip_codes_data.join(
+    relations['microchip_code'][['id_code']]
+)
+MicrochipData = Microchip(
+    animal_data = new_animal_data,
+    microchip_code_data = microchip_code_data,
+    rng = streams.generator('extension_microchip', extension_shard)
+)
+microchip_data = MicrochipData.generate_microchip_data_df()
+microchip_data['implant_date'] = new_animal_data['implant_date']
+microchip_data = MicrochipData.assign_random_microchip_number(
+    microchip_data = microchip_data,
+    excluded_numbers = relations['microchip']['number'].to_numpy()
+)
+microchip_data = MicrochipData.assign_fk_microchip_code(microchip_data)
+microchip_data = MicrochipData.assign_implant_location(
+    microchip_data = microchip_data,
+    locations_dict = locations_dict
+)
+
+new_animal_data, microchip_data = Extension.assign_new_animal_ids(
+    animal_data = new_animal_data,
+    microchip_data = microchip_data
+)
+animal_owner_delta = Extension.assign_new_animals_to_owners(
+    animal_data = new_animal_data
+)
+
+#----------------------------------------------------------------------------
+# Create the new appointments: initial visits of the new patients on their
+# implant date, and appointments of the existing animals
+logging.info(f"Creating the new tuples of relation Appointment.")
+initial_appointment_data = pd.DataFrame({
+    'id_animal': new_animal_data['id_animal'],
+    'appt_date': new_animal_data['implant_date'],
+    'appt_reason': 'initial_visit'
+})
+appointment_delta = pd.concat(
+    [continued_appointment_data, initial_appointment_data],
+    ignore_index=True
+)
+
+AppointmentData = Appointment(
+    microchip_data = microchip_data,
+    clinic_start_year = Extension.opening_date.year,
+    last_operation_date = last_operation_date,
+    life_expectancy = life_expectancy,
+    rng = streams.generator('extension_appointment', extension_shard)
+)
+appointment_delta = AppointmentData.correction_appt_date_daysoff(
+    appointment_data = appointment_delta,
+    country_code = country_code,
+    weekly_days_off = weekly_days_off
+)
+appointment_delta['appt_date'] = pd.to_datetime(appointment_delta['appt_date'])
+appointment_delta = Extension.assign_id_appointment(
+    appointment_data = appointment_delta,
+    new_animal_data = new_animal_data,
+    new_animal_owner_data = animal_owner_delta
+)
+
+#----------------------------------------------------------------------------
+# Create the slots of the new period and match them with the new appointments
+logging.info(f"Creating the slots of the new period.")
+SlotData = Slot(
+    rng = streams.generator('extension_slot', extension_shard)
+)
+slot_data = SlotData.generate_slots(
+    doctor_historization = doctor_historization_delta,
+    start_time = start_time,
+    end_time = end_time,
+    weekly_days_off = weekly_days_off
+)
+slot_data = SlotData.adjust_slot_to_start_end_dates(
+    slot_data = slot_data,
+    doctor_data = relations['doctor']
+)
+slot_data = SlotData.adjust_slots_to_country_holidays(
+    slot_data = slot_data,
+    country_code = country_code
+)
+slot_data = SlotData.label_appointment_type(
+    slot_data = slot_data,
+    doctor_historization = doctor_historization_delta,
+    max_daily_working_hours = daily_max_worked_hours
+)
+slot_data = SlotData.assign_id_slot(
+    slot_data = slot_data,
+    pk_column_name = 'id_slot',
+    starting_id_value = Extension.get_next_id('slot', 'id_slot')
+)
+slot_data = SlotData.assign_week_slot(
+    slot_data = slot_data,
+    start_day = week_start_day
+)
+
+logging.info(f"Matching the new appointments with the new slots.")
+appointment_delta = AppointmentData.assign_week_appointment(
+    appointment_data = appointment_delta,
+    slot_data = slot_data.to_dataframe(columns=['date']),
+    start_day = week_start_day
+)
+appointment_slot_delta = SlotData.assign_appointments_to_slots(
+    appointment_data = appointment_delta,
+    slot_data = slot_data
+)
+appointment_slot_delta = SlotData.assign_id_appointment_slot(
+    appointment_slot_data = appointment_slot_delta,
+    pk_column_name = 'id_appointment_slot',
+    starting_id_value = Extension.get_next_id('appointment_slot', 'id_appointment_slot')
+)
+
+#----------------------------------------------------------------------------
+# Create the weights of the animals for the new appointments
+logging.info(f"Creating the new tuples of relation Animal_Weight.")
+weighted_animal_data = pd.concat([
+    relations['animal'][
+        relations['animal']['id_animal'].isin(appointment_delta['id_animal'])
+    ],
+    new_animal_data
+], ignore_index=True)
+AnimalWeigthData = AnimalWeigth(
+    animal_data = weighted_animal_data,
+    appointment_data = appointment_delta,
+    cat_breed_weight_range = cat_breed_weight_range,
+    dog_breed_weight_range = dog_breed_weight_range,
+    rng = streams.generator('extension_animal_weight', extension_shard),
+    min_nb_rows = 1
+)
+initial_weight_data = AnimalWeigthData.assign_initial_weight_to_animals(
+    cat_breed_weight_range = cat_breed_weight_range,
+    dog_breed_weight_range = dog_breed_weight_range
+)
+initial_weight_data = Extension.get_initial_weights(
+    initial_weight_data = initial_weight_data
+)
+animal_weight_delta = AnimalWeigthData.assign_weight_per_appointment(
+    initial_weight_data = initial_weight_data
+)
+animal_weight_delta = AnimalWeigthData.assign_id_weight(
+    animal_weight_data = animal_weight_delta,
+    pk_column_name = 'id_weight',
+    starting_id_value = Extension.get_next_id('animal_weight', 'id_weight')
+)
+
+#----------------------------------------------------------------------------
+# Map the new appointments with services
+logging.info(f"Creating the new tuples of relation Appointment_Service.")
+ServiceData = Service(
+    service_data = relations['service'],
+    rng = streams.generator('extension_service', extension_shard)
+)
+appointment_services_delta = ServiceData.map_appointment_services(
+    appointment_data = appointment_delta,
+    appt_reason_service_list = appt_reason_service_list,
+    surgery_types_distribution = surgery_types_distribution
+)
+appointment_services_delta = ServiceData.assign_id_appointment_service(
+    appointment_services_data = appointment_services_delta,
+    pk_column_name = 'id_appointment_service',
+    starting_id_value = Extension.get_next_id('appointment_services', 'id_appointment_service')
+)
+
+
+#================================================================
+# Save the new tuples of the relations in csv files, with the same structure
+# as the relations of the instance. Tuples of relation doctor replace the
+# existing ones with the same id_doctor.
+logging.info(f"Saving the new tuples of the relations into csv files "
+             f"in {output_directory}.")
+os.makedirs(output_directory, exist_ok=True)
+
+microchip_data = microchip_data.rename(columns={'microchip_number': 'number'})
+delta_relations = {
+    'microchip': microchip_data[
+        ['id_microchip', 'id_code', 'number', 'implant_date', 'location']],
+    'animal': new_animal_data[
+        ['id_animal', 'species', 'breed', 'name', 'id_microchip', 'gender', 'dob', 'hash_id']],
+    'animal_weight': animal_weight_delta[
+        ['id_weight', 'id_animal', 'id_appointment', 'weight']],
+    'appointment': appointment_delta[
+        ['id_appointment', 'id_animal', 'appt_reason', 'id_owner']],
+    'appointment_services': appointment_services_delta[
+        ['id_appointment_service', 'id_appointment', 'id_service']],
+    'slot': slot_data.to_dataframe(
+        columns=['id_slot', 'id_doctor', 'date', 'time', 'type']),
+    'appointment_slot': appointment_slot_delta[
+        ['id_appointment_slot', 'id_appointment', 'id_slot']],
+    'animal_owner': animal_owner_delta[
+        ['id_animal_owner', 'id_microchip', 'id_owner']],
+    'doctor': doctor_delta[
+        ['id_doctor', 'first_name', 'last_name', 'license_number', 'specialty',
+         'start_date', 'end_date', 'max_monthly_hours', 'period_start_date', 'period_end_date']],
+    'doctor_historization': doctor_historization_delta[
+        ['id_doctor_histo', 'id_doctor', 'first_name', 'last_name', 'specialty',
+         'license_number', 'period_start_date', 'period_end_date', 'max_monthly_hours']]
+}
+for relation_name, relation in delta_relations.items():
+    relation.to_csv(os.path.join(output_directory, f"{relation_name}_rel.csv"))
+    logging.info(f"Saved {len(relation)} new tuples of relation {relation_name}.")
@@ -1,7 +1,7 @@
+import os
 import pandas as pd
 import numpy as np
 import random as rd
-import holidays
 import math
 from datetime import date, timedelta
 from database_generator.animal import Animal, AnimalWeigth
@@ -11,6 +11,9 @@ from database_generator.service import Service
 from database_generator.doctor import Doctor
 from database_generator.slot import Slot
 from database_generator.owner import Owner
+from database_generator.profile_pool import ProfilePool
+from database_generator.export import export_relation, export_relation_chunks, export_relations
+from random_streams import RandomStreams
 import logging
 
 logging.basicConfig(
@@ -29,6 +32,11 @@ service_list = pd.read_csv('base_data/service_list.csv')
 surgery_types_distribution = pd.read_csv('base_data/surgery_types_distribution.csv')
 
 logging.info(f"Setting values of input parameters.")
+# Set the master seed from which all random draws are derived: each
+# class gets its own random stream, so results do not depend on the
+# order in which the stages are run
+master_seed = 56
+
 # set the number of unique animals to represent in the database
 nb_animals = 250000
 logging.info(f"The number of unique animals to include in the database "
@@ -165,6 +173,14 @@ logging.info(f"The first day of the week was set to {end_time}:00.")
 weekly_days_off = [4]
 logging.info(f"The list of weekly days off was set to {weekly_days_off}.")
 
+# Set whether only the slots booked by an appointment are exported in relation
+# Slot (sparse mode), the capacity of each doctor's days being saved as counters,
+# and the fraction of the free slots exported along with them in that mode
+sparse_slots = False
+free_slots_fraction = 0.0
+logging.info(f"The sparse slot mode was set to {sparse_slots}, keeping a "
+             f"fraction {free_slots_fraction} of the free slots.")
+
 # Specify the distribution of households per number of pets
 prop_nb_animal_household = {
     4:0.05,
@@ -193,6 +209,93 @@ prop_household_several_owner = 0.3
 logging.info(f"The proportion of households in which more than one person "
              f"is registered as a pet owner was set to {prop_household_several_owner}.")
 
+# Set the number of values generated with Faker per profile attribute (names,
+# cities, streets...), from which the owners' and doctors' profiles are sampled
+profile_pool_size = 10000
+logging.info(f"The size of the pools of profile values was set to {profile_pool_size}.")
+
+# Set the directory in which the pools are cached between runs, and the number
+# of processes generating them
+profile_pool_directory = 'working_data/profile_pools'
+profile_pool_nb_workers = 1
+
+# Set the number of animals whose appointments are generated at once. When set,
+# the wide denormalized appointments (the intermediate of the appointment
+# generation) are only built for one chunk of animals at a time, and only
+# their normalized version is kept. Relations animal, microchip, animal_weight
+# and appointment_service are also written in their csv files as soon as they
+# are generated (by chunks for the last two). The other relations (appointments,
+# slots...) are still held in memory, so the peak memory of the generation
+# keeps growing with the number of animals. None generates the appointments of
+# all animals at once.
+generation_chunk_size = None
+logging.info(f"The number of animals per appointment generation chunk was "
+             f"set to {generation_chunk_size}.")
+
+# Set the seed of the pools of profile values. None derives it from the master
+# seed; instances generated with the same seed share their pools
+profile_pool_seed = None
+
+# Set the directory in which the relations are saved
+output_directory = 'working_data'
+
+# Set the number of threads writing the files of the relations concurrently,
+# the number of rows formatted at once, and the compression of the files (None,
+# 'gzip', 'bz2' or 'xz'; the next scripts read uncompressed csv files)
+export_nb_workers = 4
+export_chunk_size = 100000
+export_compression = None
+
+# Set the first value of the surrogate key of each relation, and the offset
+# added to the keys of the relations specific to the clinic (all but the
+# lookup relations microchip_code and service). The multi-clinic runner (see
+# db_multi_clinic.py) sets the offset to reserve a range of keys to each clinic
+starting_id_offset = 0
+starting_id_values = {
+    'id_code': 3,
+    'id_appointment': 23,
+    'id_animal': 47,
+    'id_microchip': 34,
+    'id_weight': 1,
+    'id_service': 1,
+    'id_appointment_service': 1,
+    'id_doctor': 1,
+    'id_doctor_histo': 1,
+    'id_slot': 1,
+    'id_appointment_slot': 17,
+    'id_owner': 85,
+    'id_animal_owner': 1
+}
+
+# When the instance is generated by the multi-clinic runner, the parameters of
+# the clinic (clinic_parameters) replace the values above
+if 'clinic_parameters' in globals():
+    unknown_parameters = set(clinic_parameters) - set(globals())
+    if len(unknown_parameters) > 0:
+        raise KeyError(f"Unknown generation parameters {sorted(unknown_parameters)}.")
+    globals().update(clinic_parameters)
+    # The values logged above are those replaced for the clinic
+    for parameter, value in clinic_parameters.items():
+        logging.info(f"The parameter {parameter} was set to {value} by the "
+                     f"multi-clinic runner.")
+streams = RandomStreams(master_seed)
+starting_id_values = {
+    key: value if key in ['id_code', 'id_service'] else value + starting_id_offset
+    for key, value in starting_id_values.items()
+}
+
+#----------------------------------------------------------------------------
+# Create the pools of profile values shared by the Doctor and Owner classes
+logging.info(f"Instantiating object from ProfilePool class.")
+if profile_pool_seed is None:
+    profile_pool_seed = streams.integer_seed('profile_pool')
+profile_pool = ProfilePool(
+    pool_size = profile_pool_size,
+    seed = profile_pool_seed,
+    cache_directory = profile_pool_directory,
+    nb_workers = profile_pool_nb_workers
+)
+
 #----------------------------------------------------------------------------
 # Create the Animal class to create and modify the animal_data DataFrame
 logging.info(f"Instantiating object from Animal class.")
@@ -201,7 +304,8 @@ Animal = Animal(
     nb_animals = nb_animals,
     clinic_start_year = clinic_start_year,
     last_operation_date = last_operation_date,
-    initial_augmentation_seed = 56
+    initial_augmentation_seed = 56,
+    rng = streams.generator('animal')
 )
 
 # Create the initial animal_data DataFrame
@@ -244,7 +348,7 @@ logging.info(f"Assigning unique id values (id_code) to tuples in Microchip relat
 microchip_code_data = MicrochipCode.assign_id_code(
     microchip_code_data = microchip_code_data,
     pk_column_name = 'id_code',
-    starting_id_value = 3,
+    starting_id_value = starting_id_values['id_code'],
 )
 
 #----------------------------------------------------------------------------
@@ -252,7 +356,8 @@ microchip_code_data = MicrochipCode.assign_id_code(
 logging.info(f"Instantiating object from Microchip class.")
 Microchip = Microchip(
     animal_data = animal_data,
-    microchip_code_data = microchip_code_data
+    microchip_code_data = microchip_code_data,
+    rng = streams.generator('microchip')
 )
 
 # Create the initial microchip_data DataFrame
@@ -281,41 +386,55 @@ Appointment = Appointment(
     microchip_data = microchip_data,
     clinic_start_year = clinic_start_year,
     last_operation_date = last_operation_date,
-    life_expectancy = 15
-)
-
-# Create the initial appointment_data_denorm DataFrame
-logging.info(f"Assigning number values of appointments to each animal included "
-             f"in relation Animal.")
-appointment_data_denorm = Appointment.assign_nb_appointments()
-
-# Assign reason of first appointment
-logging.info(f"Assigning a reason for the first appointment of each animal "
-             f"included in relation Animal.")
-appointment_data_denorm = Appointment.assign_first_appointment_reason(
-    appointment_data_denorm = appointment_data_denorm
-)
+    life_expectancy = 15,
+    rng = streams.generator('appointment')
+)
+
+if generation_chunk_size is not None:
+    # Generate the appointments by chunks of animals, only keeping the
+    # normalized appointments of each chunk
+    logging.info(f"Generating the appointments of each animal included in "
+                 f"relation Animal by chunks of {generation_chunk_size} animals.")
+    appointment_data = Appointment.generate_appointment_data_by_chunk(
+        chunk_size = generation_chunk_size,
+        distribution_reason_microchipped_before_opening = distribution_reason_microchipped_before_opening,
+        distribution_reason_microchipped_after_opening = distribution_reason_microchipped_after_opening,
+        prop_visit_non_followup = prop_visit_non_followup,
+        perc_followup = perc_followup
+    )
+else:
+    # Create the initial appointment_data_denorm DataFrame
+    logging.info(f"Assigning number values of appointments to each animal included "
+                 f"in relation Animal.")
+    appointment_data_denorm = Appointment.assign_nb_appointments()
+
+    # Assign reason of first appointment
+    logging.info(f"Assigning a reason for the first appointment of each animal "
+                 f"included in relation Animal.")
+    appointment_data_denorm = Appointment.assign_first_appointment_reason(
+        appointment_data_denorm = appointment_data_denorm
+    )
         
-# Assign the date of the first appointment
-logging.info(f"Assigning a date for the first appointment of each animal "
-             f"included in relation Animal.")
-appointment_data_denorm = Appointment.assign_first_appointment_date(
-    appointment_data_denorm = appointment_data_denorm
-)
-
-# Assign details of following appointments
-logging.info(f"Assigning reasons and dates for all appointments following "
-             f"the first one for each animal included in relation Animal.")
-appointment_data_denorm = Appointment.assign_appointment_details (
-    appointment_data_denorm = appointment_data_denorm
-)
-
-# Reformat appointments df to denormalize it
-logging.info(f"Reformating the Appintment relation to match the database "
-             f"schema, such that every tuple represents one appointment only.")
-appointment_data = Appointment.reformatting_appointment_df(
-    appointment_data_denorm = appointment_data_denorm
-)
+    # Assign the date of the first appointment
+    logging.info(f"Assigning a date for the first appointment of each animal "
+                 f"included in relation Animal.")
+    appointment_data_denorm = Appointment.assign_first_appointment_date(
+        appointment_data_denorm = appointment_data_denorm
+    )
+
+    # Assign details of following appointments
+    logging.info(f"Assigning reasons and dates for all appointments following "
+                 f"the first one for each animal included in relation Animal.")
+    appointment_data_denorm = Appointment.assign_appointment_details (
+        appointment_data_denorm = appointment_data_denorm
+    )
+
+    # Reformat appointments df to denormalize it
+    logging.info(f"Reformating the Appintment relation to match the database "
+                 f"schema, such that every tuple represents one appointment only.")
+    appointment_data = Appointment.reformatting_appointment_df(
+        appointment_data_denorm = appointment_data_denorm
+    )
 
 # Correct the appointments assignement to match the calendar of the country
 logging.info(f"Modifying the appointment dates to avoid scheduling any appointment "
@@ -332,7 +451,7 @@ logging.info(f"Assigning unique id values (id_appointment) to tuples in "
 appointment_data = Appointment.assign_id_appointment(
     appointment_data = appointment_data,
     pk_column_name = 'id_appointment',
-    starting_id_value = 23,
+    starting_id_value = starting_id_values['id_appointment'],
 )
 
 #----------------------------------------------------------------------------
@@ -349,7 +468,7 @@ logging.info(f"Assigning unique id values (id_animal) to tuples in "
 animal_data = Animal.assign_id_animal(
     animal_data = animal_data,
     pk_column_name = 'id_animal',
-    starting_id_value = 47,
+    starting_id_value = starting_id_values['id_animal'],
 )
 
 #----------------------------------------------------------------------------
@@ -366,7 +485,7 @@ logging.info(f"Assigning unique id values (id_microchip) to tuples in "
 microchip_data = Microchip.assign_id_microchip(
     microchip_data = microchip_data,
     pk_column_name = 'id_microchip',
-    starting_id_value = 34
+    starting_id_value = starting_id_values['id_microchip']
 )
 
 #----------------------------------------------------------------------------
@@ -391,38 +510,92 @@ AnimalWeigth = AnimalWeigth(
     animal_data = animal_data,
     appointment_data = appointment_data,
     cat_breed_weight_range = cat_breed_weight_range,
-    dog_breed_weight_range = dog_breed_weight_range
+    dog_breed_weight_range = dog_breed_weight_range,
+    rng = streams.generator('animal_weight')
 )  
 
-# Create the dataframe containing the initial weight of each animal
-initial_weight_data = AnimalWeigth.assign_initial_weight_to_animals(
-    cat_breed_weight_range = cat_breed_weight_range,
-    dog_breed_weight_range = dog_breed_weight_range
-)
-logging.info(f"Initial version of AnimalWeight relation created of size "
-             f"{len(initial_weight_data)}, by assigning the initial weight "
-             f"value to every animal included in relation Animal.")
-
-# Compute the other weight values
-logging.info(f"Assigning weight values for other appointments for all animals "
-             f"included in relation Animal.")
-animal_weight_data = AnimalWeigth.assign_weight_per_appointment(
-    initial_weight_data = initial_weight_data
-)
+# Columns of the relations written as soon as they are generated in streaming
+# mode (see parameter generation_chunk_size)
+animals_columns = ['id_animal', 'species', 'breed', 'name', 'id_microchip', 'gender', 'dob', 'hash_id']
+microchip_columns = ['id_microchip', 'id_code', 'number', 'implant_date', 'location']
+animals_weight_columns = ['id_weight', 'id_animal', 'id_appointment', 'weight']
+appointment_services_columns = ['id_appointment_service', 'id_appointment', 'id_service']
 
-# Assign id_weight
-logging.info(f"Assigning unique id values (id_weight) to tuples in "
-             f"AnimalWeight relation.")
-animal_weight_data = AnimalWeigth.assign_id_weight(
-    animal_weight_data = animal_weight_data,
-    pk_column_name = 'id_weight',
-    starting_id_value = 1
-)
+if generation_chunk_size is not None:
+    # Save relations animal and microchip, whose values are final, and only
+    # keep the keys used by the next stages
+    logging.info(f"Saving the data of relations Animal and Microchip into new "
+                 f"csv files.")
+    os.makedirs(output_directory, exist_ok=True)
+    streamed_export_results = {
+        'animal_rel': export_relation(
+            relation = animal_data[animals_columns],
+            path = os.path.join(output_directory, 'animal_rel.csv'),
+            compression = export_compression,
+            chunk_size = export_chunk_size
+        ),
+        'microchip_rel': export_relation(
+            relation = microchip_data.rename(
+                columns={'microchip_number': 'number'}
+            )[microchip_columns],
+            path = os.path.join(output_directory, 'microchip_rel.csv'),
+            compression = export_compression,
+            chunk_size = export_chunk_size
+        )
+    }
+    animal_data = animal_data[['id_animal', 'id_microchip']]
+    microchip_data = microchip_data[['id_microchip']]
+    Animal.animal_data = animal_data
+    Microchip.microchip_data = microchip_data
+
+    # Generate the weights by chunks of animals, each chunk being written in
+    # the csv file of relation animal_weight then dropped
+    logging.info(f"Generating the weight values of relation AnimalWeight by "
+                 f"chunks of {generation_chunk_size} animals.")
+    streamed_export_results['animal_weight_rel'] = export_relation_chunks(
+        chunks = AnimalWeigth.generate_animal_weight_data_by_chunk(
+            chunk_size = generation_chunk_size,
+            cat_breed_weight_range = cat_breed_weight_range,
+            dog_breed_weight_range = dog_breed_weight_range,
+            first_id_appointment = starting_id_values['id_appointment'],
+            pk_column_name = 'id_weight',
+            starting_id_value = starting_id_values['id_weight']
+        ),
+        path = os.path.join(output_directory, 'animal_weight_rel.csv'),
+        columns = animals_weight_columns,
+        compression = export_compression
+    )
+else:
+    # Create the dataframe containing the initial weight of each animal
+    initial_weight_data = AnimalWeigth.assign_initial_weight_to_animals(
+        cat_breed_weight_range = cat_breed_weight_range,
+        dog_breed_weight_range = dog_breed_weight_range
+    )
+    logging.info(f"Initial version of AnimalWeight relation created of size "
+                 f"{len(initial_weight_data)}, by assigning the initial weight "
+                 f"value to every animal included in relation Animal.")
+
+    # Compute the other weight values
+    logging.info(f"Assigning weight values for other appointments for all animals "
+                 f"included in relation Animal.")
+    animal_weight_data = AnimalWeigth.assign_weight_per_appointment(
+        initial_weight_data = initial_weight_data
+    )
+
+    # Assign id_weight
+    logging.info(f"Assigning unique id values (id_weight) to tuples in "
+                 f"AnimalWeight relation.")
+    animal_weight_data = AnimalWeigth.assign_id_weight(
+        animal_weight_data = animal_weight_data,
+        pk_column_name = 'id_weight',
+        starting_id_value = starting_id_values['id_weight']
+    )
 #----------------------------------------------------------------------------
 # Create the Service class to create and modify the service and appointment_service DataFrames
 logging.info(f"Instantiating object from Service class.")
 Service = Service(
-    service_data = service_list
+    service_data = service_list,
+    rng = streams.generator('service')
 )
 
 # Create the dataframe service_data
@@ -435,28 +608,48 @@ logging.info(f"Assigning unique id values (id_service) to tuples in "
 service_data = Service.assign_id_service(
     service_data = service_data,
     pk_column_name = 'id_service',
-    starting_id_value = 1
-)
-
-# Creation of appointment_services_data dataframe to map appointments with services
-logging.info(f"Matching appointments with services.")
-appointment_services_data = Service.map_appointment_services(
-    service_data = service_data,
-    appointment_data = appointment_data,
-    appt_reason_service_list = appt_reason_service_list,
-    surgery_types_distribution = surgery_types_distribution
-)
-logging.info(f"Appointment_Service relation created of size "
-             f"{len(appointment_services_data)}.")
-
-# Add id_appointment_service to dataframe appointment_services_data
-logging.info(f"Assigning unique id values (id_appointment_service) to tuples in "
-             f"Appointment_Service relation.")
-appointment_services_data = Service.assign_id_appointment_service(
-    appointment_services_data = appointment_services_data,
-    pk_column_name = 'id_appointment_service',
-    starting_id_value = 1
-)
+    starting_id_value = starting_id_values['id_service']
+)
+
+if generation_chunk_size is not None:
+    # Map the appointments with services by chunks of appointments (about the
+    # appointments of generation_chunk_size animals), each chunk being written
+    # in the csv file of relation appointment_service then dropped
+    logging.info(f"Matching appointments with services by chunks.")
+    streamed_export_results['appointment_services_rel'] = export_relation_chunks(
+        chunks = Service.generate_appointment_services_data_by_chunk(
+            appointment_data = appointment_data,
+            chunk_size = generation_chunk_size * max(1, len(appointment_data) // nb_animals),
+            appt_reason_service_list = appt_reason_service_list,
+            surgery_types_distribution = surgery_types_distribution,
+            service_data = service_data,
+            pk_column_name = 'id_appointment_service',
+            starting_id_value = starting_id_values['id_appointment_service']
+        ),
+        path = os.path.join(output_directory, 'appointment_services_rel.csv'),
+        columns = appointment_services_columns,
+        compression = export_compression
+    )
+else:
+    # Creation of appointment_services_data dataframe to map appointments with services
+    logging.info(f"Matching appointments with services.")
+    appointment_services_data = Service.map_appointment_services(
+        service_data = service_data,
+        appointment_data = appointment_data,
+        appt_reason_service_list = appt_reason_service_list,
+        surgery_types_distribution = surgery_types_distribution
+    )
+    logging.info(f"Appointment_Service relation created of size "
+                 f"{len(appointment_services_data)}.")
+
+    # Add id_appointment_service to dataframe appointment_services_data
+    logging.info(f"Assigning unique id values (id_appointment_service) to tuples in "
+                 f"Appointment_Service relation.")
+    appointment_services_data = Service.assign_id_appointment_service(
+        appointment_services_data = appointment_services_data,
+        pk_column_name = 'id_appointment_service',
+        starting_id_value = starting_id_values['id_appointment_service']
+    )
 
 #----------------------------------------------------------------------------
 # Create the Doctor class and relations doctor_data and doctor_historization_data
@@ -466,7 +659,9 @@ Doctor = Doctor(
     yearly_turnover = yearly_turnover,
     weekly_worked_days = weekly_worked_days,
     daily_max_worked_hours = daily_max_worked_hours,
-    yearly_holiday_weeks = yearly_holiday_weeks
+    yearly_holiday_weeks = yearly_holiday_weeks,
+    rng = streams.generator('doctor'),
+    profile_pool = profile_pool
 )
 
 appointment_data_copy = Doctor.generate_appointment_data_copy_df()
@@ -561,7 +756,7 @@ logging.info(f"Assigning unique id values (id_doctor) to tuples in "
 doctor_data_details = Doctor.assign_id_doctor(
     doctor_data = doctor_data_details,
     pk_column_name = 'id_doctor',
-    starting_id_value = 1,
+    starting_id_value = starting_id_values['id_doctor'],
 )
 
 # Compute monthly demand
@@ -602,7 +797,7 @@ logging.info(f"Assigning unique id values (id_doctor_histo) to tuples in "
 doctor_historization_data = Doctor.assign_id_doctor_histo(
     doctor_historization_data = doctor_historization_data,
     pk_column_name = 'id_doctor_histo',
-    starting_id_value = 1,
+    starting_id_value = starting_id_values['id_doctor_histo'],
 )
 
 # Update relation doctor_data
@@ -615,7 +810,9 @@ doctor_data = Doctor.add_current_workload_to_doctor_data(
 #----------------------------------------------------------------------------
 # Create the Slot class and relation slot_data
 logging.info(f"Instantiating object from Slot class.")
-SlotData = Slot()
+SlotData = Slot(
+    rng = streams.generator('slot')
+)
 
 # Create initial relation slot_data
 slot_data = SlotData.generate_slots(
@@ -658,7 +855,7 @@ logging.info(f"Assigning unique id values (id_slot) to tuples in "
 revised_slot_data = SlotData.assign_id_slot(
     slot_data = revised_slot_data,
         pk_column_name = 'id_slot',
-        starting_id_value = 1
+        starting_id_value = starting_id_values['id_slot']
 )
 
 # Add a week number to slots in order to facilitate the match between
@@ -675,7 +872,7 @@ revised_slot_data = SlotData.assign_week_slot(
 logging.info(f"Assigning week numbers to appointments.")
 appointment_data = Appointment.assign_week_appointment(
     appointment_data = appointment_data,
-    slot_data = revised_slot_data,
+    slot_data = revised_slot_data.to_dataframe(columns=['date']),
     start_day = week_start_day
 )
 
@@ -696,13 +893,17 @@ logging.info(f"Assigning unique id values (id_appointment_slot) to tuples in "
 appointment_slot_data = SlotData.assign_id_appointment_slot(
     appointment_slot_data = appointment_slot_data,
     pk_column_name = 'id_appointment_slot',
-    starting_id_value = 17
+    starting_id_value = starting_id_values['id_appointment_slot']
 )
 
 #----------------------------------------------------------------------------
 # Instantiate class Owner and create the relation owner
 logging.info(f"Instantiating object from Owner class.")
-OwnerData = Owner(nb_animals = nb_animals)
+OwnerData = Owner(
+    nb_animals = nb_animals,
+    rng = streams.generator('owner'),
+    profile_pool = profile_pool
+)
 
 # Compute number of owners
 logging.info(f"Computing the total number of owners to be included in the database.")
@@ -785,7 +986,7 @@ logging.info(f"Assigning unique id values (id_owner) to tuples in "
 owner_data = OwnerData.assign_id_owner(
     owner_data = owner_data,
     pk_column_name = 'id_owner',
-    starting_id_value = 85
+    starting_id_value = starting_id_values['id_owner']
 )
 
 # Assign id_owner to animal_owner_data
@@ -800,7 +1001,7 @@ logging.info(f"Assigning FK values id_animal to Owner relation.")
 animal_owner_data = OwnerData.assign_id_animal_owner(
     animal_owner_data = animal_owner_data,
     pk_column_name = 'id_animal_owner',
-    starting_id_value = 1
+    starting_id_value = starting_id_values['id_animal_owner']
 )
 
 logging.info(f"Assigning FK values id_owner to Appointment relation.")
@@ -815,23 +1016,26 @@ appointment_data = Appointment.assign_appointment_id_owner(
 logging.info(f"Adjusting the struture of all relations to match "
              f"the clean database schema.")
 
-# Relation animal
-animals_columns = ['id_animal', 'species', 'breed', 'name', 'id_microchip', 'gender', 'dob', 'hash_id']
-animal_rel = animal_data[animals_columns]
+# Relations animal, animal_weight, microchip and appointment_service are
+# already saved in streaming mode
+if generation_chunk_size is None:
+    # Relation animal
+    animal_rel = animal_data[animals_columns]
 
-# Relation animal_weight
-animals_weight_columns = ['id_weight', 'id_animal', 'id_appointment', 'weight']
-animal_weight_rel = animal_weight_data[animals_weight_columns]
+    # Relation animal_weight
+    animal_weight_rel = animal_weight_data[animals_weight_columns]
+
+    # Relation microchip
+    microchip_data = microchip_data.rename(columns={'microchip_number': 'number'})
+    microchip_rel = microchip_data[microchip_columns]
+
+    # Relation appointment_service
+    appointment_services_rel = appointment_services_data[appointment_services_columns]
 
 # Relation microchip_code
 microchip_code_columns = ['id_code', 'code', 'brand', 'provider', 'country']
 microchip_code_rel = microchip_code_data[microchip_code_columns]
 
-# Relation microchip
-microchip_data = microchip_data.rename(columns={'microchip_number': 'number'})
-microchip_columns = ['id_microchip', 'id_code', 'number', 'implant_date', 'location']
-microchip_rel = microchip_data[microchip_columns]
-
 # Relation owner
 owner_columns = ['id_owner', 'first_name', 'last_name', 'address', 'city', 'postal_code', 'phone_number']
 owner_rel = owner_data[owner_columns]
@@ -848,13 +1052,19 @@ service_rel = service_data[service_columns]
 appointment_columns = ['id_appointment', 'id_animal', 'appt_reason', 'id_owner']
 appointment_rel = appointment_data[appointment_columns]
 
-# Relation appointment_service
-appointment_services_columns = ['id_appointment_service', 'id_appointment', 'id_service']
-appointment_services_rel = appointment_services_data[appointment_services_columns]
-
 # Relation slot
 slot_columns = ['id_slot', 'id_doctor', 'date', 'time', 'type']
-slot_rel = revised_slot_data[slot_columns]
+if sparse_slots:
+    slot_capacity_rel = SlotData.summarize_slot_capacity(
+        slot_data = revised_slot_data,
+        appointment_slot_data = appointment_slot_data
+    )
+    revised_slot_data = SlotData.select_booked_slots(
+        slot_data = revised_slot_data,
+        appointment_slot_data = appointment_slot_data,
+        free_slots_fraction = free_slots_fraction
+    )
+slot_rel = revised_slot_data.to_dataframe(columns=slot_columns)
 
 # Relation appointment_slot
 appointment_slot_columns = ['id_appointment_slot', 'id_appointment', 'id_slot']
@@ -874,17 +1084,30 @@ doctor_historization_rel = doctor_historization_data[doctor_histo_columns]
 #================================================================
 # Save relations data in csv files
 logging.info(f"Saving the data of the clean relations into new csv files.")
-
-microchip_code_rel.to_csv('working_data/microchip_code_rel.csv')
-microchip_rel.to_csv('working_data/microchip_rel.csv')
-animal_rel.to_csv('working_data/animal_rel.csv')
-animal_weight_rel.to_csv('working_data/animal_weight_rel.csv')
-service_rel.to_csv('working_data/service_rel.csv')
-appointment_rel.to_csv('working_data/appointment_rel.csv')
-appointment_services_rel.to_csv('working_data/appointment_services_rel.csv')
-slot_rel.to_csv('working_data/slot_rel.csv')
-appointment_slot_rel.to_csv('working_data/appointment_slot_rel.csv')
-owner_rel.to_csv('working_data/owner_rel.csv')
-animal_owner_rel.to_csv('working_data/animal_owner_rel.csv')
-doctor_rel.to_csv('working_data/doctor_rel.csv')
-doctor_historization_rel.to_csv('working_data/doctor_historization_rel.csv')
\ No newline at end of file
+relations = {
+    'microchip_code_rel': microchip_code_rel,
+    'service_rel': service_rel,
+    'appointment_rel': appointment_rel,
+    'slot_rel': slot_rel,
+    'appointment_slot_rel': appointment_slot_rel,
+    'owner_rel': owner_rel,
+    'animal_owner_rel': animal_owner_rel,
+    'doctor_rel': doctor_rel,
+    'doctor_historization_rel': doctor_historization_rel
+}
+if generation_chunk_size is None:
+    relations.update({
+        'microchip_rel': microchip_rel,
+        'animal_rel': animal_rel,
+        'animal_weight_rel': animal_weight_rel,
+        'appointment_services_rel': appointment_services_rel
+    })
+if sparse_slots:
+    relations['slot_capacity'] = slot_capacity_rel
+export_report = export_relations(
+    relations = relations,
+    output_directory = output_directory,
+    nb_workers = export_nb_workers,
+    compression = export_compression,
+    chunk_size = export_chunk_size
+)
@@ -0,0 +1,121 @@
+import os
+from database_generator.extension import load_relations
+from database_generator.multi_clinic import MultiClinic
+from database_generator.profile_pool import ProfilePool
+from random_streams import RandomStreams
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="- %(levelname)s - %(asctime)s - %(message)s"
+)
+
+logging.info(f"Setting values of input parameters.")
+# Set the master seed from which the seeds of the clinics are derived
+master_seed = 56
+streams = RandomStreams(master_seed)
+
+# Describe the clinics: each one is generated by db_generation.py, whose
+# parameters are replaced by the ones specified here (the others keep the
+# values set in db_generation.py)
+clinics = [
+    {
+        'clinic_name': 'clinic_jo',
+        'nb_animals': 50000,
+        'country_code': 'JO',
+        'clinic_start_year': 2015,
+        'week_start_day': 5,
+        'weekly_days_off': [4]
+    },
+    {
+        'clinic_name': 'clinic_fr',
+        'nb_animals': 30000,
+        'country_code': 'FR',
+        'clinic_start_year': 2018,
+        'week_start_day': 0,
+        'weekly_days_off': [6]
+    }
+]
+
+# Set the number of surrogate keys reserved to each clinic in each relation:
+# keys of clinic i start at i * key_range_size
+key_range_size = 10**8
+
+# Set the proportion of the owners of a clinic also registered (same names,
+# address and phone number, different id_owner) in one of the previous clinics
+prop_cross_clinic_owners = 0.05
+
+# Set the number of clinics generated in parallel
+nb_workers = 2
+
+# Set the pools of profile values shared by the clinics (see db_generation.py)
+profile_pool_size = 10000
+profile_pool_directory = 'working_data/profile_pools'
+
+output_directory = 'working_data/multi_clinic'
+
+#----------------------------------------------------------------------------
+if __name__ == '__main__':
+    MultiClinicData = MultiClinic(
+        clinics = clinics,
+        key_range_size = key_range_size,
+        rng = streams.generator('multi_clinic')
+    )
+
+    # Generate the shared pools of profile values once, so that the clinics
+    # load them from the cache instead of generating them concurrently
+    profile_pool_seed = streams.integer_seed('profile_pool')
+    ProfilePool(
+        pool_size = profile_pool_size,
+        seed = profile_pool_seed,
+        cache_directory = profile_pool_directory
+    )
+
+    clinic_parameters = [
+        MultiClinicData.get_clinic_parameters(
+            clinic_index = clinic_index,
+            master_seed = streams.integer_seed('clinic', clinic_index),
+            profile_pool_seed = profile_pool_seed,
+            output_directory = output_directory
+        )
+        for clinic_index in range(len(clinics))
+    ]
+    for parameters in clinic_parameters:
+        parameters['profile_pool_size'] = profile_pool_size
+        parameters['profile_pool_directory'] = profile_pool_directory
+
+    logging.info(f"Generating {len(clinics)} clinics with {nb_workers} workers.")
+    clinic_directories = MultiClinicData.generate_clinics(
+        clinic_parameters = clinic_parameters,
+        nb_workers = nb_workers
+    )
+
+    #------------------------------------------------------------------------
+    # Merge the relations of the clinics, whose keys are disjoint
+    logging.info(f"Merging the relations of the clinics.")
+    clinic_relations = []
+    for clinic_index, clinic_directory in enumerate(clinic_directories):
+        relations = load_relations([clinic_directory])
+        MultiClinicData.check_key_ranges(
+            clinic_index = clinic_index,
+            relations = relations
+        )
+        clinic_relations.append(relations)
+    merged_relations = MultiClinicData.merge_relations(clinic_relations)
+
+    logging.info(f"Registering owners in several clinics.")
+    merged_relations['owner'], cross_clinic_owner_data = MultiClinicData.assign_cross_clinic_owners(
+        clinic_owner_data = [relations['owner'] for relations in clinic_relations],
+        prop_cross_clinic_owners = prop_cross_clinic_owners
+    )
+
+    #================================================================
+    # Save the merged relations in csv files, with the same structure as the
+    # relations of a single clinic, along with the description of the clinics
+    # and the list of the owners registered in several clinics
+    logging.info(f"Saving the merged relations into csv files in {output_directory}.")
+    for relation_name, relation in merged_relations.items():
+        relation.to_csv(os.path.join(output_directory, f"{relation_name}_rel.csv"))
+        logging.info(f"Saved {len(relation)} tuples of relation {relation_name}.")
+    MultiClinicData.get_clinic_data().to_csv(os.path.join(output_directory, 'clinic.csv'))
+    cross_clinic_owner_data.to_csv(os.path.join(output_directory, 'cross_clinic_owner.csv'))
@@ -1,6 +1,8 @@
 import pandas as pd
 import numpy as np
 from au_pollutor.au_insertion import au_transformator
+from au_pollutor.ground_truth import save_ground_truth_store
+from random_streams import RandomStreams
 import logging
 
 logging.basicConfig(
@@ -40,6 +42,10 @@ animal_augmentation_rate = 0.75
 logging.info(f"The augmentation rate for relation Animal "
              f"was set to {animal_augmentation_rate}.")
 
+# Set the master seed from which all random draws are derived
+master_seed = 56
+streams = RandomStreams(master_seed)
+
 #================================================================
 # Instantiate object au_transformator
 Transf = au_transformator(
@@ -55,7 +61,8 @@ Transf = au_transformator(
     slot_rel = slot_rel,
     appointment_slot_rel = appointment_slot_rel,
     doctor_rel = doctor_rel,
-    doctor_historization_rel = doctor_historization_rel
+    doctor_historization_rel = doctor_historization_rel,
+    rng = streams.generator('au_insertion')
 )
 
 #================================================================
@@ -229,4 +236,20 @@ appointment_slot_au.to_csv('working_data/appointment_slot_au.csv')
 ## Relation slot
 slot_au.to_csv('working_data/slot_au.csv')
 ## Relation doctor
-doctor_au.to_csv('working_data/doctor_au.csv')
\ No newline at end of file
+doctor_au.to_csv('working_data/doctor_au.csv')
+
+#================================================================
+# Save the mapping between the identifiers of the relations suffering
+# from artificial unicity and those of the clean relations
+save_ground_truth_store(
+    directory='working_data/ground_truth',
+    au_relations={
+        'animal': animal_au,
+        'microchip': microchip_au,
+        'owner': owner_au,
+        'microchip_code': microchip_code_au,
+        'service': service_au,
+        'doctor': doctor_au,
+        'slot': slot_au
+    }
+)
@@ -0,0 +1,41 @@
+import os
+from data_pollutor.pollution_log import PollutionLog
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="- %(levelname)s - %(asctime)s - %(message)s"
+)
+
+logging.info(f"Setting values of input parameters.")
+# Set the directory of the replay log saved by db_pollution_data.py
+pollution_log_directory = 'working_data/pollution_log'
+
+# Set the directory of the relations polluted with artificial unicity
+# (*_au.csv files) and the directory in which the rebuilt polluted relations
+# (*_au_dirty.csv files) are saved
+input_directory = 'working_data'
+output_directory = 'working_data'
+
+# Set the relations to rebuild (None for all the relations of the log)
+relation_names = None
+
+# Set the number of rows read and rebuilt at once, for relations too large to
+# be held in memory (None to rebuild each relation in memory)
+replay_chunk_size = None
+
+#----------------------------------------------------------------------------
+Log = PollutionLog(pollution_log_directory)
+if relation_names is None:
+    relation_names = Log.relations
+
+os.makedirs(output_directory, exist_ok=True)
+for relation_name in relation_names:
+    output_path = os.path.join(output_directory, f"{relation_name}_au_dirty.csv")
+    Log.replay_relation(
+        relation_name = relation_name,
+        input_path = os.path.join(input_directory, f"{relation_name}_au.csv"),
+        output_path = output_path,
+        chunk_size = replay_chunk_size
+    )
+    logging.info(f"Saved rebuilt polluted relation {relation_name} into {output_path}.")
@@ -0,0 +1,88 @@
+import os
+from database_generator.extension import load_relations
+from database_generator.sampling import (
+    InstanceSampler,
+    CLEAN_CLOSURE_RULES,
+    AU_CLOSURE_RULES,
+    AU_RELATION_NAMES
+)
+from random_streams import RandomStreams
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="- %(levelname)s - %(asctime)s - %(message)s"
+)
+
+logging.info(f"Setting values of input parameters.")
+# Set the master seed from which all random draws are derived (see
+# db_generation.py)
+master_seed = 56
+streams = RandomStreams(master_seed)
+
+# Set the instance to downsample: 'rel' for the clean instance (read from its
+# directory followed by the directories of its extensions, if any), 'au' for
+# the instance polluted with artificial unicity
+instance_suffix = 'rel'
+instance_directories = ['working_data']
+
+# Set the number of animals to sample (or, if None, the fraction of animals).
+# For the 'au' instance, animals are sampled among the clean animals
+# (id_animal_v1) and all their duplicates are kept
+nb_animals_sample = 5000
+fraction_animals_sample = None
+
+output_directory = f"working_data/sample_{instance_suffix}"
+
+#----------------------------------------------------------------------------
+logging.info(f"Loading the relations of the instance from {instance_directories}.")
+if instance_suffix == 'rel':
+    relations = load_relations(instance_directories)
+    closure_rules = CLEAN_CLOSURE_RULES
+    sampled_column = 'id_animal'
+elif instance_suffix == 'au':
+    relations = load_relations(
+        instance_directories,
+        relation_names = AU_RELATION_NAMES,
+        suffix = 'au'
+    )
+    closure_rules = AU_CLOSURE_RULES
+    sampled_column = 'id_animal_v1'
+else:
+    raise ValueError(f"Unknown instance suffix '{instance_suffix}', "
+                     f"expected 'rel' or 'au'.")
+
+Sampler = InstanceSampler(
+    relations = relations,
+    closure_rules = closure_rules,
+    rng = streams.generator('sampling')
+)
+
+logging.info(f"Sampling the animals and closing the sample.")
+sampled_keys = Sampler.sample_keys(
+    relation_name = 'animal',
+    column = sampled_column,
+    nb_keys = nb_animals_sample,
+    fraction = fraction_animals_sample if nb_animals_sample is None else None
+)
+masks = Sampler.close_sample(
+    relation_name = 'animal',
+    column = sampled_column,
+    keys = sampled_keys
+)
+# Lookup relations are kept entirely
+sampled_relations = Sampler.get_sampled_relations(
+    masks = masks,
+    full_relations = ['microchip_code', 'service']
+)
+
+
+#================================================================
+# Save the sub-instance in csv files, with the same names as the relations
+# of the instance
+logging.info(f"Saving the sampled relations into csv files in {output_directory}.")
+os.makedirs(output_directory, exist_ok=True)
+for relation_name, relation in sampled_relations.items():
+    relation.to_csv(os.path.join(output_directory, f"{relation_name}_{instance_suffix}.csv"))
+    logging.info(f"Saved {len(relation)} out of {len(relations[relation_name])} "
+                 f"tuples of relation {relation_name}.")
@@ -0,0 +1,414 @@
+import os
+import re
+import csv
+import sqlite3
+import pandas as pd
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="- %(levelname)s - %(asctime)s - %(message)s"
+)
+
+# Schemas of the PostgreSQL database, with the file creating their model and
+# the data file (in the data directory, without extension) of each table, as
+# loaded by the load_*_postgresql.py scripts
+EMBEDDED_SCHEMAS = {
+    'clean_db': {
+        'model_file': 'postgresql/clean_db/perfectpet_clean_data_model.sql',
+        'data_files': {
+            'microchip_code': 'microchip_code_rel',
+            'microchip': 'microchip_rel',
+            'owner': 'owner_rel',
+            'animal': 'animal_rel',
+            'animal_weight': 'animal_weight_rel',
+            'animal_owner': 'animal_owner_rel',
+            'doctor': 'doctor_rel',
+            'doctor_historization': 'doctor_historization_rel',
+            'service': 'service_rel',
+            'appointment': 'appointment_rel',
+            'appointment_service': 'appointment_services_rel',
+            'slot': 'slot_rel',
+            'appointment_slot': 'appointment_slot_rel'
+        }
+    },
+    'polluted_db_au': {
+        'model_file': 'postgresql/polluted_au_data_db/perfectpet_polluted_au_model.sql',
+        'data_files': {
+            'microchip_code': 'microchip_code_au',
+            'microchip': 'microchip_au',
+            'owner': 'owner_au',
+            'animal': 'animal_au',
+            'doctor': 'doctor_au',
+            'service': 'service_au',
+            'appointment': 'appointment_au',
+            'slot': 'slot_au',
+            'appointment_slot': 'appointment_slot_au'
+        }
+    },
+    'polluted_db': {
+        'model_file': 'postgresql/polluted_au_data_db/perfectpet_polluted_data_model.sql',
+        'data_files': {
+            'microchip_code': 'microchip_code_au_dirty',
+            'microchip': 'microchip_au_dirty',
+            'owner': 'owner_au_dirty',
+            'animal': 'animal_au_dirty',
+            'doctor': 'doctor_au_dirty',
+            'service': 'service_au_dirty',
+            'appointment': 'appointment_au',
+            'slot': 'slot_au',
+            'appointment_slot': 'appointment_slot_au'
+        }
+    }
+}
+
+# Column types of the PostgreSQL models, and their embedded equivalent
+COLUMN_TYPES = {
+    'integer': 'INTEGER',
+    'double precision': 'DOUBLE',
+    'date': 'DATE',
+    'time': 'TIME'
+}
+DIALECTS = ['duckdb', 'sqlite']
+
+def parse_model_file(
+    model_file: str
+    ) -> dict:
+    """
+        Returns the model of a schema read from a PostgreSQL file
+        creating it (perfectpet_*_model.sql), as a dictionnary with:
+        - 'enums': values of each enumerated type
+        - 'tables': list of the tables' names (without schema), their
+          columns as (name, PostgreSQL type, not null, default value)
+          tuples and their primary key columns
+        - 'indexes': list of the indexes' names, tables and columns
+        Statements other than CREATE TYPE, TABLE and INDEX (schema
+        creation, owners, tablespaces) are ignored.
+    """
+    with open(model_file, encoding='utf-8') as file:
+        model_sql = re.sub(r'--[^\n]*', '', file.read())
+    model_sql = re.sub(r'\s+COLLATE\s+pg_catalog\."default"', '', model_sql)
+
+    model = {'enums': {}, 'tables': [], 'indexes': []}
+    for statement in model_sql.split(';'):
+        statement = ' '.join(statement.split())
+        enum_match = re.match(r'CREATE TYPE ([\w.]+) AS ENUM \((.*)\)$', statement)
+        table_match = re.match(r'CREATE TABLE IF NOT EXISTS [\w]+\.(\w+) \((.*)\)'
+                               r'( TABLESPACE \w+)?$', statement)
+        index_match = re.match(r'CREATE INDEX IF NOT EXISTS (\w+) ON [\w]+\.(\w+)'
+                               r'( USING \w+)? \((.*)\)( TABLESPACE \w+)?$', statement)
+        if enum_match:
+            model['enums'][enum_match.group(1)] = re.findall(r"'([^']*)'", enum_match.group(2))
+        elif table_match:
+            columns, primary_key = [], []
+            for element in re.split(r',\s*(?![^()]*\))', table_match.group(2)):
+                element = element.strip()
+                key_match = re.match(r'CONSTRAINT \w+ PRIMARY KEY \((.*)\)$', element)
+                if key_match:
+                    primary_key = [column.strip().strip('"') for column in key_match.group(1).split(',')]
+                    continue
+                column_match = re.match(r'"?(\w+)"? (.+?)( DEFAULT (\S+))?( NOT NULL)?$', element)
+                if column_match is None:
+                    raise ValueError(f"Cannot parse element '{element}' of table "
+                                     f"{table_match.group(1)} in {model_file}.")
+                columns.append((
+                    column_match.group(1),
+                    column_match.group(2),
+                    column_match.group(5) is not None,
+                    column_match.group(4)
+                ))
+            model['tables'].append({
+                'name': table_match.group(1),
+                'columns': columns,
+                'primary_key': primary_key
+            })
+        elif index_match:
+            model['indexes'].append({
+                'name': index_match.group(1),
+                'table': index_match.group(2),
+                'columns': [
+                    column.split()[0].strip('"')
+                    for column in index_match.group(4).split(',')
+                ]
+            })
+    return model
+
+def translate_column_type(
+    column_type: str,
+    enums: dict
+    ) -> tuple:
+    """
+        Returns the embedded type of a column of PostgreSQL type
+        column_type, and the values allowed by the column (list of
+        the enumerated type's values, None if it is not an enumerated
+        type). Enumerated types are translated to VARCHAR columns,
+        checked against their values.
+    """
+    if column_type in enums:
+        return 'VARCHAR', enums[column_type]
+    varchar_match = re.match(r'character varying\((\d+)\)$', column_type)
+    if varchar_match:
+        return f'VARCHAR({varchar_match.group(1)})', None
+    if column_type not in COLUMN_TYPES:
+        raise KeyError(f"No embedded equivalent for column type '{column_type}'.")
+    return COLUMN_TYPES[column_type], None
+
+
+class EmbeddedDatabase():
+    """
+        This class is used to create the schemas of the Perfect Pet
+        database (clean, polluted with artificial unicity, and also
+        polluted with data quality issues) in a local DuckDB or SQLite
+        database, without any database server, and to load the
+        generated relations into them.
+        The tables and indexes are translated from the PostgreSQL
+        models (perfectpet_*_model.sql) and the tables are loaded with
+        the bulk ingestion of the engine (read_csv / read_parquet for
+        DuckDB). With SQLite, which has no schemas, each schema is
+        stored in its own file (<database>_<schema>.sqlite) attached
+        to the database under the schema name, so that tables are
+        queried as in PostgreSQL (e.g. clean_db.animal).
+        Foreign key constraints are not created.
+    """
+    def __init__(self,
+        database_path: str,
+        dialect: str = 'sqlite'
+        ):
+        """
+            Initialize the instance with the path of the database file
+            and its dialect ('duckdb' or 'sqlite'), and connect to the
+            database. With SQLite, the files of the existing schemas
+            are attached.
+        """
+        logging.info("Instantiating object from class EmbeddedDatabase")
+
+        if dialect not in DIALECTS:
+            raise ValueError(f"Unknown dialect '{dialect}', expected one of {DIALECTS}.")
+        self.database_path = database_path
+        self.dialect = dialect
+
+        if dialect == 'duckdb':
+            try:
+                import duckdb
+            except ImportError:
+                raise ImportError("The duckdb dialect requires package duckdb "
+                                  "(pip install duckdb).")
+            self.connection = duckdb.connect(database_path)
+        else:
+            self.connection = sqlite3.connect(database_path)
+            for schema_name in EMBEDDED_SCHEMAS:
+                if os.path.exists(self.get_schema_path(schema_name)):
+                    self.attach_schema(schema_name)
+
+    #----------------------------------------------------------------
+    def get_schema_path(self,
+        schema_name: str
+        ) -> str:
+        """
+            Return the path of the SQLite file storing a schema
+        """
+        root, _ = os.path.splitext(self.database_path)
+        return f"{root}_{schema_name}.sqlite"
+
+    #----------------------------------------------------------------
+    def attach_schema(self,
+        schema_name: str
+        ):
+        """
+            Attach the SQLite file of a schema to the database, under
+            the schema name (if not attached yet).
+        """
+        attached_schemas = [row[1] for row in self.connection.execute("PRAGMA database_list")]
+        if schema_name not in attached_schemas:
+            self.connection.execute(
+                "ATTACH DATABASE ? AS " + schema_name,
+                (self.get_schema_path(schema_name),)
+            )
+
+    #----------------------------------------------------------------
+    def create_schema(self,
+        schema_name: str,
+        model: dict
+        ):
+        """
+            (Re)create the tables of a schema from its model (see
+            function parse_model_file). Existing tables are dropped.
+            Indexes are created by function create_indexes, once the
+            tables are loaded.
+        """
+        logging.info(f"Creating the tables of schema {schema_name}.")
+        if self.dialect == 'duckdb':
+            self.connection.execute(f"CREATE SCHEMA IF NOT EXISTS {schema_name}")
+        else:
+            self.attach_schema(schema_name)
+
+        for table in model['tables']:
+            definitions = []
+            for column_name, column_type, not_null, default in table['columns']:
+                embedded_type, values = translate_column_type(column_type, model['enums'])
+                definition = f'"{column_name}" {embedded_type}'
+                if default is not None:
+                    definition += f' DEFAULT {default}'
+                if not_null:
+                    definition += ' NOT NULL'
+                if values is not None:
+                    allowed_values = ', '.join(f"'{value}'" for value in values)
+                    definition += f' CHECK ("{column_name}" IN ({allowed_values}))'
+                definitions.append(definition)
+            if len(table['primary_key']) > 0:
+                key_columns = ', '.join(f'"{column}"' for column in table['primary_key'])
+                definitions.append(f'PRIMARY KEY ({key_columns})')
+
+            self.connection.execute(f"DROP TABLE IF EXISTS {schema_name}.{table['name']}")
+            self.connection.execute(
+                f"CREATE TABLE {schema_name}.{table['name']} ({', '.join(definitions)})"
+            )
+        self.commit()
+
+    #----------------------------------------------------------------
+    def create_indexes(self,
+        schema_name: str,
+        model: dict
+        ):
+        """
+            Create the indexes of a schema from its model (see function
+            parse_model_file).
+        """
+        logging.info(f"Creating the indexes of schema {schema_name}.")
+        for index in model['indexes']:
+            columns = ', '.join(f'"{column}"' for column in index['columns'])
+            if self.dialect == 'duckdb':
+                self.connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS {index['name']} "
+                    f"ON {schema_name}.{index['table']} ({columns})"
+                )
+            else:
+                self.connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS {schema_name}.{index['name']} "
+                    f"ON {index['table']} ({columns})"
+                )
+        self.commit()
+
+    #----------------------------------------------------------------
+    def load_table(self,
+        schema_name: str,
+        table: dict,
+        data_path: str,
+        enums: dict,
+        batch_size: int = 100000
+        ) -> int:
+        """
+            Load the data file data_path (csv or parquet file, with a
+            column per column of the table, other columns are ignored)
+            into a table of the model of a schema, whose enumerated
+            types are enums. DuckDB reads the file natively and casts
+            the columns to their types; SQLite rows are inserted by
+            batches of batch_size rows.
+            Returns the number of rows loaded.
+        """
+        column_names = [column[0] for column in table['columns']]
+        quoted_names = ', '.join(f'"{column}"' for column in column_names)
+        table_name = f"{schema_name}.{table['name']}"
+        is_parquet = data_path.endswith('.parquet')
+
+        if self.dialect == 'duckdb':
+            reader = (
+                f"read_parquet('{data_path}')" if is_parquet
+                else f"read_csv('{data_path}', header=true, all_varchar=true)"
+            )
+            casts = ', '.join(
+                f'CAST("{column_name}" AS {translate_column_type(column_type, enums)[0]})'
+                for column_name, column_type, _, _ in table['columns']
+            )
+            self.connection.execute(
+                f"INSERT INTO {table_name} ({quoted_names}) SELECT {casts} FROM {reader}"
+            )
+            return self.connection.execute(f"SELECT count(*) FROM {table_name}").fetchone()[0]
+
+        insert_statement = (
+            f"INSERT INTO {table_name} ({quoted_names}) "
+            f"VALUES ({', '.join('?' * len(column_names))})"
+        )
+        nb_rows = 0
+        if is_parquet:
+            data = pd.read_parquet(data_path, columns=column_names)
+            data = data.astype(object).where(data.notna(), None)
+            self.connection.executemany(insert_statement, data.itertuples(index=False, name=None))
+            nb_rows = len(data)
+        else:
+            with open(data_path, newline='', encoding='utf-8') as file:
+                reader = csv.reader(file)
+                header = next(reader)
+                missing_columns = [column for column in column_names if column not in header]
+                if len(missing_columns) > 0:
+                    raise KeyError(f"Columns {missing_columns} of table {table_name} "
+                                   f"not found in {data_path}.")
+                positions = [header.index(column) for column in column_names]
+                batch = []
+                for row in reader:
+                    batch.append([row[position] if row[position] != '' else None
+                                  for position in positions])
+                    if len(batch) == batch_size:
+                        self.connection.executemany(insert_statement, batch)
+                        nb_rows += len(batch)
+                        batch = []
+                self.connection.executemany(insert_statement, batch)
+                nb_rows += len(batch)
+        self.commit()
+        return nb_rows
+
+    #----------------------------------------------------------------
+    def load_schema(self,
+        schema_name: str,
+        data_directory: str = 'working_data',
+        model_file: str = None
+        ):
+        """
+            Create a schema of EMBEDDED_SCHEMAS from its PostgreSQL
+            model, load its tables from the data files of data_directory
+            (parquet file if it exists, csv file otherwise), then create
+            its indexes.
+        """
+        if schema_name not in EMBEDDED_SCHEMAS:
+            raise KeyError(f"Unknown schema '{schema_name}', expected one of "
+                           f"{list(EMBEDDED_SCHEMAS)}.")
+        if model_file is None:
+            model_file = EMBEDDED_SCHEMAS[schema_name]['model_file']
+        data_files = EMBEDDED_SCHEMAS[schema_name]['data_files']
+        model = parse_model_file(model_file)
+
+        self.create_schema(schema_name, model)
+        for table in model['tables']:
+            data_path = os.path.join(data_directory, f"{data_files[table['name']]}.parquet")
+            if not os.path.exists(data_path):
+                data_path = os.path.join(data_directory, f"{data_files[table['name']]}.csv")
+            nb_rows = self.load_table(schema_name, table, data_path, model['enums'])
+            logging.info(f"Loaded {nb_rows} rows into table {schema_name}.{table['name']}.")
+        self.create_indexes(schema_name, model)
+
+    #----------------------------------------------------------------
+    def commit(self):
+        """
+            Commit the current transaction (SQLite only, DuckDB
+            statements are committed automatically)
+        """
+        if self.dialect == 'sqlite':
+            self.connection.commit()
+
+    #----------------------------------------------------------------
+    def query(self,
+        sql: str
+        ) -> pd.DataFrame:
+        """
+            Return the result of a query as a DataFrame
+        """
+        if self.dialect == 'duckdb':
+            return self.connection.execute(sql).df()
+        return pd.read_sql_query(sql, self.connection)
+
+    #----------------------------------------------------------------
+    def close(self):
+        """
+            Close the connection to the database
+        """
+        self.connection.close()
@@ -0,0 +1,128 @@
+import zlib
+import random as rd
+import numpy as np
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format="- %(levelname)s - %(asctime)s - %(message)s"
+)
+
+# Seeded Faker instances shared in the process, one per locale
+_faker_instances = {}
+
+def get_faker(
+    locale: str = None,
+    seed: int = None
+    ):
+    """
+        Returns a Faker instance of the specified locale. Package faker
+        is imported on first call only. Seeded instances are shared in
+        the process (one per locale, created once as creating one loads
+        the providers of its locale) and re-seeded with seed at each
+        call: all the values of a seeded sequence must be drawn before
+        requesting an instance of the same locale again. Without seed,
+        a new unseeded instance is returned.
+    """
+    from faker import Faker
+
+    if seed is None:
+        return Faker(locale)
+    if locale not in _faker_instances:
+        _faker_instances[locale] = Faker(locale)
+    fake = _faker_instances[locale]
+    fake.seed_instance(seed)
+    return fake
+
+
+class RandomStreams():
+    """
+        This class is used to derive all the random number generators
+        used by the generation and pollution steps from one master
+        seed. Each stage (identified by its name) and each shard of
+        a stage gets its own independent stream, which only depends on
+        the master seed, the stage name and the shard number: streams
+        do not depend on the order in which they are requested, so
+        sequential and parallel runs produce identical output.
+    """
+    def __init__(self,
+        master_seed: int = None
+        ):
+        """
+            Initialize the instance with the master seed. When no
+            master seed is given, one is drawn from the OS entropy and
+            logged so that the run can be reproduced.
+        """
+        if master_seed is None:
+            master_seed = int(np.random.SeedSequence().entropy % 2**63)
+        self.master_seed = int(master_seed)
+        logging.info(f"Random streams derived from master seed "
+                     f"{self.master_seed}.")
+
+    #----------------------------------------------------------------
+    def get_seed_sequence(self,
+        stage: str,
+        shard: int = 0
+        ) -> np.random.SeedSequence:
+        """
+            Return the SeedSequence of a stage and shard. The stage
+            name is hashed with a stable function (crc32), unlike the
+            built-in hash() which changes between interpreter runs.
+        """
+        stage_key = zlib.crc32(stage.encode('utf-8'))
+        return np.random.SeedSequence(
+            entropy=self.master_seed,
+            spawn_key=(stage_key, int(shard))
+        )
+
+    #----------------------------------------------------------------
+    def generator(self,
+        stage: str,
+        shard: int = 0
+        ) -> np.random.Generator:
+        """
+            Return a new NumPy Generator for the given stage and shard
+        """
+        return np.random.Generator(
+            np.random.PCG64(self.get_seed_sequence(stage, shard))
+        )
+
+    #----------------------------------------------------------------
+    def integer_seed(self,
+        stage: str,
+        shard: int = 0
+        ) -> int:
+        """
+            Return an integer seed for the given stage and shard, to
+            seed libraries that do not accept a NumPy Generator.
+        """
+        return int(self.get_seed_sequence(stage, shard).generate_state(
+            1, dtype=np.uint64)[0] % 2**63)
+
+    #----------------------------------------------------------------
+    def faker(self,
+        stage: str,
+        shard: int = 0,
+        locale: str = None
+        ):
+        """
+            Return a new Faker instance seeded for the given stage and
+            shard (each instance has its own random state).
+        """
+        fake = get_faker(locale)
+        fake.seed_instance(self.integer_seed(f"{stage}/faker", shard))
+        return fake
+
+    #----------------------------------------------------------------
+    def seed_global(self,
+        stage: str,
+        shard: int = 0
+        ):
+        """
+            Seed the global random and NumPy states for the given stage
+            and shard. Only needed for third-party code relying on the
+            global states, such as the nlpaug augmenters.
+        """
+        seed = self.integer_seed(f"{stage}/global", shard)
+        rd.seed(seed)
+        np.random.seed(seed % 2**32)
@@ -1,6 +1,5 @@
 import pandas as pd
-import random as rd
-import holidays
+import numpy as np
 import string
 from datetime import timedelta
 
@@ -32,7 +31,10 @@ def get_country_holidays(
         in specified country (country_code). For list of country codes 
         accepted, refer to https://pypi.org/project/holidays/.
         Default country_code is 'JO' for Jordan
+        Package holidays is imported on first call only.
     """
+    import holidays
+
     supported = holidays.list_supported_countries()
     supported_codes = list(supported.keys())
     if country_code not in supported_codes:
@@ -47,37 +49,339 @@ def get_country_holidays(
 
 def generate_random_strings(
     n: int,
-    length: int = 10
+    length: int = 10,
+    rng: np.random.Generator = None
     ):
     """
         Returns a list of size n of randomly generated strings
-        of specified length.
+        of specified length, drawn from the generator rng.
         Used mainly to generate fake vet lience numbers.
     """
-    chars = string.ascii_letters + string.digits
-    return [''.join(rd.choices(chars, k=length)) for _ in range(n)]
+    if rng is None:
+        rng = np.random.default_rng()
+    chars = np.array(list(string.ascii_letters + string.digits))
+    drawn_chars = chars[rng.integers(len(chars), size=(n, length))]
+    return [''.join(row) for row in drawn_chars]
 
 
 def select_random_date_in_range(
     min_date: pd.Timestamp,
-    max_date: pd.Timestamp
+    max_date: pd.Timestamp,
+    rng: np.random.Generator = None
     ):
     """
         Returns a date of format pd.Timestamp randomly selected
-        between min_date and max_date
+        between min_date and max_date, drawn from the generator rng
     """
+    if rng is None:
+        rng = np.random.default_rng()
     delta = (max_date - min_date).days
-    random_days = rd.randint(0, delta)
+    random_days = int(rng.integers(0, delta + 1))
     random_date = min_date + timedelta(days=random_days)
     return random_date
 
 def generate_random_dates(
     min_date: pd.Timestamp,
     max_date: pd.Timestamp,
-    n: int):
+    n: int,
+    rng: np.random.Generator = None):
     """
         Returns a list of size n containing dates of format pd.Timestamp
         randomly selected between min_date and max_date
     """
-    random_dates = [select_random_date_in_range(min_date, max_date) for _ in range(n)]
+    if rng is None:
+        rng = np.random.default_rng()
+    random_dates = [select_random_date_in_range(min_date, max_date, rng) for _ in range(n)]
     return random_dates
+
+def generate_random_dates_array(
+    min_date,
+    max_date,
+    n: int,
+    rng: np.random.Generator = None,
+    include_max_date: bool = True
+    ) -> np.ndarray:
+    """
+        Returns an array of size n and dtype datetime64[D] containing
+        dates randomly selected between min_date and max_date, all
+        drawn from the generator rng in one call. max_date is excluded
+        when include_max_date is False.
+        Column-level equivalent of generate_random_dates.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    min_day = np.datetime64(pd.Timestamp(min_date).date(), 'D')
+    max_day = np.datetime64(pd.Timestamp(max_date).date(), 'D')
+    delta = (max_day - min_day).astype(np.int64) + int(include_max_date)
+    offsets = rng.integers(0, delta, size=n)
+    return min_day + offsets.astype('timedelta64[D]')
+
+def generate_uuid4_bytes(
+    n: int,
+    rng: np.random.Generator = None
+    ) -> np.ndarray:
+    """
+        Returns an array of shape (n, 16) and dtype uint8 containing
+        n random version 4 UUIDs in binary form, drawn from the
+        generator rng in one call (version and variant bits are set
+        as specified by RFC 4122).
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    uuid_bytes = np.frombuffer(rng.bytes(16 * n), dtype=np.uint8).reshape(n, 16).copy()
+    uuid_bytes[:, 6] = (uuid_bytes[:, 6] & 0x0f) | 0x40
+    uuid_bytes[:, 8] = (uuid_bytes[:, 8] & 0x3f) | 0x80
+    return uuid_bytes
+
+def format_uuid_bytes(
+    uuid_bytes: np.ndarray
+    ) -> np.ndarray:
+    """
+        Returns an array of strings with the canonical representation
+        of binary UUIDs (array of shape (n, 16) and dtype uint8), e.g.
+        '1b4e28ba-2fa1-41d2-883f-0016d3cca427', as returned by str()
+        on a uuid.UUID or by Faker's uuid4().
+    """
+    hex_digits = np.frombuffer(b'0123456789abcdef', dtype=np.uint8)
+    n = len(uuid_bytes)
+    nibbles = np.empty((n, 32), dtype=np.uint8)
+    nibbles[:, 0::2] = uuid_bytes >> 4
+    nibbles[:, 1::2] = uuid_bytes & 0x0f
+
+    chars = np.full((n, 36), ord('-'), dtype=np.uint8)
+    chars[:, [i for i in range(36) if i not in (8, 13, 18, 23)]] = hex_digits[nibbles]
+    return chars.view('S36').ravel().astype(str).astype(object)
+
+def generate_uuid4_strings(
+    n: int,
+    rng: np.random.Generator = None
+    ) -> np.ndarray:
+    """
+        Returns an array of n random version 4 UUID strings, drawn from
+        the generator rng in one batch. Format-compatible with Faker's
+        uuid4(), but without its per-call overhead.
+    """
+    return format_uuid_bytes(generate_uuid4_bytes(n, rng))
+
+def sample_unique_integers(
+    low: int,
+    high: int,
+    n: int,
+    rng: np.random.Generator = None,
+    excluded: np.ndarray = None
+    ) -> np.ndarray:
+    """
+        Returns an array of n distinct integers randomly selected
+        between low (included) and high (excluded), drawn from the
+        generator rng. Values are drawn in batch and only the
+        duplicates (and the values found in array excluded, if
+        specified) are drawn again, until all values are distinct.
+    """
+    if excluded is None:
+        excluded = np.array([], dtype=np.int64)
+    if n > high - low - len(excluded):
+        raise ValueError(f"Cannot draw {n} distinct integers between "
+                         f"{low} and {high}.")
+    if rng is None:
+        rng = np.random.default_rng()
+
+    values = rng.integers(low, high, size=n, dtype=np.int64)
+    while True:
+        _, first_positions = np.unique(values, return_index=True)
+        duplicated = np.ones(n, dtype=bool)
+        duplicated[first_positions] = False
+        duplicated |= np.isin(values, excluded)
+        nb_duplicated = int(duplicated.sum())
+        if nb_duplicated == 0:
+            return values
+        values[duplicated] = rng.integers(low, high, size=nb_duplicated, dtype=np.int64)
+
+def build_dense_key_map(
+    keys,
+    values,
+    missing_value: int = -1
+    ) -> np.ndarray:
+    """
+        Returns a lookup array translating dense integer keys (such
+        as the surrogate keys generated by add_primary_key_values)
+        into values: key_map[key] = value. Positions not associated
+        to any key, or associated to a missing value, contain
+        missing_value. Keys must be distinct non-negative integers,
+        and values integers.
+    """
+    keys = np.asarray(keys)
+    values = np.asarray(values)
+    if len(keys) != len(values):
+        raise ValueError("keys and values must be of the same size")
+    if len(keys) == 0:
+        return np.full(0, missing_value, dtype=np.int64)
+    if pd.isna(keys).any() or (keys < 0).any():
+        raise ValueError("keys must be non-negative integers")
+    keys = keys.astype(np.int64)
+    if len(np.unique(keys)) != len(keys):
+        raise ValueError("keys of a dense key map must be distinct")
+
+    known = ~pd.isna(values)
+    key_map = np.full(int(keys.max()) + 1, missing_value, dtype=np.int64)
+    key_map[keys[known]] = values[known].astype(np.int64)
+    return key_map
+
+def translate_keys(
+    key_map: np.ndarray,
+    keys,
+    missing_value: int = -1
+    ) -> np.ndarray:
+    """
+        Translate keys with a lookup array built by build_dense_key_map,
+        using a single fancy-index. Returns an integer array when every
+        key is found, or a float array with NaN for keys not found (as
+        a left merge would).
+    """
+    keys = np.asarray(keys)
+    found = ~pd.isna(keys)
+    positions = np.zeros(len(keys), dtype=np.int64)
+    positions[found] = keys[found].astype(np.int64)
+    found &= (positions >= 0) & (positions < len(key_map))
+    positions[~found] = 0
+
+    translated = key_map[positions] if len(key_map) > 0 else positions
+    found &= translated != missing_value
+    if found.all():
+        return translated
+    translated = translated.astype(np.float64)
+    translated[~found] = np.nan
+    return translated
+
+def semi_join_mask(
+    values,
+    keys
+    ) -> np.ndarray:
+    """
+        Returns a boolean mask of the values found in keys, i.e. the
+        rows of a relation kept by a semi-join of its column values
+        with the column keys of another relation. Keys are marked in a
+        dense boolean lookup array, and each value is checked with a
+        single fancy-index. Values and keys must be integers (missing
+        values are never found), keys non-negative.
+    """
+    values = np.asarray(values)
+    keys = np.asarray(keys)
+    keys = keys[~pd.isna(keys)].astype(np.int64)
+    mask = ~pd.isna(values)
+    if len(keys) == 0 or not mask.any():
+        return np.zeros(len(values), dtype=bool)
+    if (keys < 0).any():
+        raise ValueError("keys must be non-negative integers")
+
+    lookup = np.zeros(int(keys.max()) + 1, dtype=bool)
+    lookup[keys] = True
+    positions = np.zeros(len(values), dtype=np.int64)
+    positions[mask] = values[mask].astype(np.int64)
+    mask &= (positions >= 0) & (positions < len(lookup))
+    positions[~mask] = 0
+    return mask & lookup[positions]
+
+def assign_foreign_key(
+    dataframe: pd.DataFrame,
+    key_column: str,
+    reference: pd.DataFrame,
+    reference_key_column: str = None,
+    fk_column: str = None
+    ) -> pd.DataFrame:
+    """
+        Creates column fk_column in dataframe, filled with the values of
+        reference[fk_column] of the rows of reference whose value of
+        reference_key_column matches the value of key_column. Equivalent
+        to a left merge of dataframe with reference[[reference_key_column,
+        fk_column]] on a key unique in reference, but the column is
+        assigned in place through a dense key map instead of copying
+        dataframe. reference_key_column defaults to key_column.
+        Returns dataframe.
+    """
+    if reference_key_column is None:
+        reference_key_column = key_column
+    for column, relation in [(key_column, dataframe),
+                             (reference_key_column, reference),
+                             (fk_column, reference)]:
+        if column not in relation.columns:
+            raise KeyError(f"Required column '{column}' not found "
+                           f"in DataFrame")
+
+    key_map = build_dense_key_map(
+        reference[reference_key_column].to_numpy(),
+        reference[fk_column].to_numpy()
+    )
+    dataframe[fk_column] = translate_keys(
+        key_map,
+        dataframe[key_column].to_numpy()
+    )
+    return dataframe
+
+def interval_join(
+    points,
+    interval_starts,
+    interval_ends,
+    keys = None,
+    interval_keys = None
+    ) -> np.ndarray:
+    """
+        Map each point (e.g. a slot date) to the interval containing it
+        (e.g. a doctor's working period), i.e. the interval such that
+        start <= point <= end, with the same key (e.g. id_doctor) when
+        keys are specified. Intervals of a same key must not overlap.
+        Missing ends are treated as open-ended intervals.
+        Returns the position in the intervals' arrays of the interval
+        of each point, or -1 when no interval contains it.
+        Intervals are sorted by key and start once, and each point is
+        located with a binary search: O((n + m) log(n + m)).
+    """
+    points = pd.to_datetime(pd.Series(points)).to_numpy()
+    interval_starts = pd.to_datetime(pd.Series(interval_starts)).to_numpy()
+    interval_ends = pd.to_datetime(pd.Series(interval_ends)).to_numpy()
+    nb_intervals = len(interval_starts)
+    if keys is None:
+        keys = np.zeros(len(points), dtype=np.int64)
+        interval_keys = np.zeros(nb_intervals, dtype=np.int64)
+
+    # Dense codes of the keys (-1 for point keys without any interval)
+    interval_key_codes, key_values = pd.factorize(pd.Series(interval_keys))
+    key_codes = pd.Index(key_values).get_indexer(pd.Series(keys))
+
+    # Dense ranks of the dates, so that (key, date) fits in one integer
+    valid_intervals = ~np.isnat(interval_starts)
+    _, ranks = np.unique(
+        np.concatenate([interval_starts, points]),
+        return_inverse=True
+    )
+    ranks = ranks.reshape(-1)
+    interval_ranks, point_ranks = ranks[:nb_intervals], ranks[nb_intervals:]
+    nb_ranks = int(ranks.max()) + 1 if len(ranks) > 0 else 1
+
+    interval_composite = interval_key_codes.astype(np.int64) * nb_ranks + interval_ranks
+    interval_composite[~valid_intervals] = -1
+    order = np.argsort(interval_composite, kind='stable')
+    sorted_composite = interval_composite[order]
+
+    point_composite = key_codes.astype(np.int64) * nb_ranks + point_ranks
+    candidates = np.searchsorted(sorted_composite, point_composite, side='right') - 1
+    positions = order[np.maximum(candidates, 0)]
+
+    found = (
+        (candidates >= 0)
+        & (key_codes >= 0)
+        & ~np.isnat(points)
+        & (interval_key_codes[positions] == key_codes)
+        & valid_intervals[positions]
+        & (np.isnat(interval_ends[positions]) | (points <= interval_ends[positions]))
+    ) if nb_intervals > 0 else np.zeros(len(points), dtype=bool)
+    return np.where(found, positions, -1)
+
+def count_pairs(
+    sizes: np.ndarray
+    ) -> int:
+    """
+        Returns the number of pairs that can be formed within groups
+        of the given sizes, i.e. the sum of C(n, 2) over sizes.
+    """
+    sizes = np.asarray(sizes, dtype=np.int64)
+    return int((sizes * (sizes - 1) // 2).sum())
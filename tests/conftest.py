@@ -0,0 +1,161 @@
+import numpy as np
+import pandas as pd
+import pytest
+from data_pollutor.data_pollution_functions import (
+    transform_string_to_lower,
+    transform_string_to_upper,
+    randomly_double_letters,
+    set_day_to_first_array,
+    replace_year_within_range_array
+)
+from data_pollutor.pollution_plan import (
+    RELATION_RNG,
+    convert_to_string,
+    pollute_relation,
+    pollute_relation_by_chunk
+)
+
+NB_ROWS = 60
+SEED = 56
+
+@pytest.fixture
+def au_relation_path(tmp_path):
+    """
+        Write a tiny relation suffering from artificial unicity in a
+        csv file, with the layout of the *_au.csv files (index saved),
+        and return its path.
+    """
+    rng = np.random.default_rng(SEED)
+    relation_au = pd.DataFrame({
+        'id_animal': np.arange(47, 47 + NB_ROWS),
+        'name': rng.choice(['Bella', 'Milly', 'Nala', 'Luna', 'Bob', 'Lilly'], NB_ROWS),
+        'last_name': rng.choice(['Smith', 'Odonnell', 'Pena', 'Soto'], NB_ROWS),
+        'breed': rng.choice(['canaan', 'beagle', 'persian', 'siamese'], NB_ROWS),
+        'weight': np.round(rng.uniform(1, 40, NB_ROWS), 2),
+        'dob': pd.to_datetime('2010-01-01') + pd.to_timedelta(rng.integers(0, 4000, NB_ROWS), unit='D')
+    })
+    relation_au['dob'] = relation_au['dob'].dt.date
+    path = tmp_path / 'animal_au.csv'
+    relation_au.to_csv(path)
+    return path
+
+#----------------------------------------------------------------
+@pytest.fixture
+def pollution_plan():
+    """
+        Return a pollution plan using every operation, on the columns
+        of the tiny relation.
+    """
+    return [
+        {
+            'operation': 'convert',
+            'column': 'id_animal',
+            'function': convert_to_string
+        },
+        {
+            'operation': 'apply',
+            'column': 'name',
+            'function': transform_string_to_lower,
+            'fraction': 0.3
+        },
+        {
+            'operation': 'apply',
+            'column': 'name',
+            'function': randomly_double_letters,
+            'fraction': 0.4,
+            'kwargs': {
+                'letters': ['l', 'n', 'b'],
+                'rng': RELATION_RNG
+            }
+        },
+        {
+            'operation': 'replace_map',
+            'column': 'last_name',
+            'kwargs': {
+                'name_map': {'Smith': 'Levesques'}
+            }
+        },
+        {
+            'operation': 'apply',
+            'column': 'last_name',
+            'function': transform_string_to_upper,
+            'fraction': 0.2
+        },
+        {
+            'operation': 'permute',
+            'column': 'breed',
+            'fraction': 0.3
+        },
+        {
+            'operation': 'set_none',
+            'column': 'weight',
+            'fraction': 0.2
+        },
+        {
+            'operation': 'apply_date',
+            'column': 'dob',
+            'function': set_day_to_first_array,
+            'fraction': 0.3,
+            'kwargs': {
+                'relative': 'before',
+                'relative_date': '2019-01-01'
+            }
+        },
+        {
+            'operation': 'apply_date',
+            'column': 'dob',
+            'function': replace_year_within_range_array,
+            'fraction': 0.3,
+            'kwargs': {
+                'year_start': 2005,
+                'year_end': 2025,
+                'rng': RELATION_RNG
+            }
+        },
+        {
+            'operation': 'set_none',
+            'column': 'dob',
+            'fraction': 0.1
+        }
+    ]
+
+#----------------------------------------------------------------
+@pytest.fixture
+def pollute_file():
+    """
+        Return the function polluting a relation file, see function
+        pollute_relation_file.
+    """
+    return pollute_relation_file
+
+#----------------------------------------------------------------
+def pollute_relation_file(
+    input_path,
+    output_path,
+    plan: list,
+    chunk_size: int = None,
+    relation_log: dict = None
+    ) -> int:
+    """
+        Pollute the relation of the csv file input_path as
+        db_pollution_data.py does, in memory when chunk_size is None
+        and by chunks otherwise, and save it in output_path.
+        Returns the number of rows of the relation.
+    """
+    if chunk_size is None:
+        relation_au = pd.read_csv(input_path)
+        pollute_relation(
+            relation_au,
+            plan,
+            np.random.default_rng(SEED),
+            relation_log
+        ).to_csv(output_path)
+        return len(relation_au)
+    return pollute_relation_by_chunk(
+        input_path = input_path,
+        output_path = output_path,
+        plan = plan,
+        seed = SEED,
+        chunk_size = chunk_size,
+        relation_log = relation_log
+    )
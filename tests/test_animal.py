@@ -0,0 +1,30 @@
+from datetime import date
+import numpy as np
+import pandas as pd
+import pytest
+from database_generator.animal import Animal
+
+@pytest.mark.parametrize('nb_animals', [100, 2000, 4000])
+def test_small_instances_are_generated(nb_animals):
+    animal_list = pd.read_csv('base_data/animal_list.csv')
+    Generator = Animal(
+        base_animal_data = animal_list,
+        nb_animals = nb_animals,
+        clinic_start_year = 2015,
+        last_operation_date = date(2025, 6, 30),
+        initial_augmentation_seed = 56,
+        rng = np.random.default_rng(56)
+    )
+    animal_data = Generator.assign_date_of_birth(
+        prop_born_before_opening = 0.3,
+        max_animal_age_at_opening = 10
+    )
+    animal_data = Generator.assign_hash_id(animal_data)
+    animal_data = Generator.assign_tmp_id(animal_data)
+
+    assert len(animal_data) == nb_animals
+    assert animal_data.index.is_unique
+    assert animal_data['dob'].notna().all()
+    assert (animal_data['dob'] <= pd.Timestamp(2025, 6, 30)).all()
+    assert (animal_data['dob'] >= pd.Timestamp(2015, 1, 1)).sum() == nb_animals - int(nb_animals * 0.3)
+    assert animal_data['id_tmp'].is_unique
@@ -0,0 +1,114 @@
+from itertools import combinations
+import numpy as np
+import pandas as pd
+import pytest
+from data_pollutor.blocking_index import (
+    BlockingIndex,
+    generate_qgram_keys,
+    generate_soundex_keys,
+    generate_prefix_keys,
+    generate_sorted_neighbourhood_order,
+    evaluate_blocking_index,
+    evaluate_sorted_neighbourhood)
+
+# Polluted tuples and the clean tuple they correspond to
+RELATION = pd.DataFrame({
+    'name': ['Robert', 'Rupert', 'robert!', 'Bob', 'Ashcraft', 'Ashcroft',
+             'Tymczak', None, 'Pfister', 'pfister', 'Robbert', 'Lee'],
+    'phone': ['0612345678', '0612345679', '06 12 34 56 78', '0712345678',
+              '0698765432', '0698765432', '07111', '0611111111', '0622222222',
+              '0622222223', '0612345678', None],
+    'id_animal_v1': [1, 2, 1, 1, 3, 3, 4, 5, 6, 6, 1, 7]
+})
+
+KEY_GENERATORS = {
+    'name_soundex': lambda: generate_soundex_keys(RELATION['name']),
+    'name_qgram': lambda: generate_qgram_keys(RELATION['name'], q=3),
+    'phone_qgram': lambda: generate_qgram_keys(RELATION['phone'], q=4, keep='digits'),
+    'phone_prefix': lambda: generate_prefix_keys(RELATION['phone'], prefix_length=4)
+}
+
+def enumerate_pairs(
+    row_positions: np.ndarray,
+    row_keys: np.ndarray,
+    max_block_size: int = None
+    ) -> dict:
+    """
+        Returns the candidate, true and covered true pairs of a blocking
+        computed by comparing the keys of all the pairs of rows.
+    """
+    keys_per_row = {row: set() for row in range(len(RELATION))}
+    block_sizes = pd.Series(row_keys).value_counts()
+    for row, key in zip(row_positions, row_keys):
+        if max_block_size is None or block_sizes[key] <= max_block_size:
+            keys_per_row[row].add(key)
+
+    candidate_pairs = true_pairs = covered_true_pairs = 0
+    true_labels = RELATION['id_animal_v1'].to_numpy()
+    for first, second in combinations(range(len(RELATION)), 2):
+        is_candidate = len(keys_per_row[first] & keys_per_row[second]) > 0
+        is_true = true_labels[first] == true_labels[second]
+        candidate_pairs += is_candidate
+        true_pairs += is_true
+        covered_true_pairs += is_candidate and is_true
+    return {
+        'candidate_pairs': candidate_pairs,
+        'true_pairs': true_pairs,
+        'covered_true_pairs': covered_true_pairs
+    }
+
+#----------------------------------------------------------------
+@pytest.mark.parametrize('max_block_size', [None, 3])
+@pytest.mark.parametrize('key_generator', KEY_GENERATORS)
+def test_pair_completeness_matches_the_enumeration_of_pairs(key_generator, max_block_size):
+    row_positions, row_keys = KEY_GENERATORS[key_generator]()
+    index = BlockingIndex.from_row_keys(
+        row_positions = row_positions,
+        row_keys = row_keys,
+        nb_rows = len(RELATION),
+        name = key_generator,
+        max_block_size = max_block_size
+    )
+    results = evaluate_blocking_index(index, RELATION['id_animal_v1'])
+    expected = enumerate_pairs(row_positions, row_keys, max_block_size)
+
+    for key, value in expected.items():
+        assert results[key] == value, key
+    total_pairs = len(RELATION) * (len(RELATION) - 1) // 2
+    assert results['pair_completeness'] == pytest.approx(
+        expected['covered_true_pairs'] / expected['true_pairs']
+    )
+    assert results['reduction_ratio'] == pytest.approx(
+        1 - expected['candidate_pairs'] / total_pairs
+    )
+
+#----------------------------------------------------------------
+def test_candidate_pairs_upper_bound_keeps_the_covered_pairs():
+    row_positions, row_keys = generate_qgram_keys(RELATION['name'], q=3)
+    index = BlockingIndex.from_row_keys(
+        row_positions = row_positions,
+        row_keys = row_keys,
+        nb_rows = len(RELATION)
+    )
+    results = evaluate_blocking_index(index, RELATION['id_animal_v1'], max_exact_pairs=0)
+    expected = enumerate_pairs(row_positions, row_keys)
+
+    assert results['covered_true_pairs'] == expected['covered_true_pairs']
+    assert results['candidate_pairs'] >= expected['candidate_pairs']
+
+#----------------------------------------------------------------
+@pytest.mark.parametrize('window_size', [2, 3, 5, 20])
+def test_sorted_neighbourhood_matches_the_enumeration_of_pairs(window_size):
+    sorted_rows = generate_sorted_neighbourhood_order(RELATION, ['name', 'phone'])
+    results = evaluate_sorted_neighbourhood(sorted_rows, RELATION['id_animal_v1'], window_size)
+
+    ranks = np.argsort(sorted_rows)
+    true_labels = RELATION['id_animal_v1'].to_numpy()
+    candidate_pairs = covered_true_pairs = 0
+    for first, second in combinations(range(len(RELATION)), 2):
+        is_candidate = abs(ranks[first] - ranks[second]) < window_size
+        candidate_pairs += is_candidate
+        covered_true_pairs += is_candidate and true_labels[first] == true_labels[second]
+
+    assert results['candidate_pairs'] == candidate_pairs
+    assert results['covered_true_pairs'] == covered_true_pairs
@@ -0,0 +1,100 @@
+from itertools import combinations
+import pytest
+from au_pollutor.dedup_evaluation import evaluate_deduplication
+
+TRUE_LABELS = [1, 1, 1, 2, 2, 3, 4, 4, 4, 4]
+
+CLUSTERINGS = {
+    'all_singletons': list(range(len(TRUE_LABELS))),
+    'one_cluster': ['a'] * len(TRUE_LABELS),
+    'partial_overlap': ['a', 'a', 'b', 'b', 'b', 'c', 'd', 'd', 'e', 'e'],
+    'exact': ['x', 'x', 'x', 'y', 'y', 'z', 'w', 'w', 'w', 'w']
+}
+
+def get_clusters(
+    labels: list
+    ) -> set:
+    """
+        Returns the clusters of labels as a set of frozensets of
+        tuple positions.
+    """
+    clusters = {}
+    for position, label in enumerate(labels):
+        clusters.setdefault(label, set()).add(position)
+    return {frozenset(cluster) for cluster in clusters.values()}
+
+#----------------------------------------------------------------
+def evaluate_by_enumeration(
+    predicted_labels: list,
+    true_labels: list
+    ) -> dict:
+    """
+        Returns the pairwise and cluster counts of evaluate_deduplication
+        computed by enumerating all the pairs of tuples.
+    """
+    true_positives = predicted_pairs = true_pairs = 0
+    for first, second in combinations(range(len(true_labels)), 2):
+        same_predicted = predicted_labels[first] == predicted_labels[second]
+        same_true = true_labels[first] == true_labels[second]
+        predicted_pairs += same_predicted
+        true_pairs += same_true
+        true_positives += same_predicted and same_true
+
+    predicted_clusters = get_clusters(predicted_labels)
+    true_clusters = get_clusters(true_labels)
+    return {
+        'true_positive_pairs': true_positives,
+        'false_positive_pairs': predicted_pairs - true_positives,
+        'false_negative_pairs': true_pairs - true_positives,
+        'nb_predicted_clusters': len(predicted_clusters),
+        'nb_true_clusters': len(true_clusters),
+        'exact_cluster_matches': len(predicted_clusters & true_clusters)
+    }
+
+#----------------------------------------------------------------
+@pytest.mark.parametrize('clustering', CLUSTERINGS)
+def test_counts_match_the_enumeration_of_pairs(clustering):
+    results = evaluate_deduplication(CLUSTERINGS[clustering], TRUE_LABELS)
+    expected = evaluate_by_enumeration(CLUSTERINGS[clustering], TRUE_LABELS)
+
+    assert results['nb_tuples'] == len(TRUE_LABELS)
+    for key, value in expected.items():
+        assert results[key] == value, key
+
+#----------------------------------------------------------------
+@pytest.mark.parametrize('clustering', CLUSTERINGS)
+def test_metrics_match_the_enumeration_of_pairs(clustering):
+    results = evaluate_deduplication(CLUSTERINGS[clustering], TRUE_LABELS)
+    expected = evaluate_by_enumeration(CLUSTERINGS[clustering], TRUE_LABELS)
+
+    true_positives = expected['true_positive_pairs']
+    predicted_pairs = true_positives + expected['false_positive_pairs']
+    true_pairs = true_positives + expected['false_negative_pairs']
+    pairwise_precision = true_positives / predicted_pairs if predicted_pairs > 0 else 1.0
+    pairwise_recall = true_positives / true_pairs
+    cluster_precision = expected['exact_cluster_matches'] / expected['nb_predicted_clusters']
+    cluster_recall = expected['exact_cluster_matches'] / expected['nb_true_clusters']
+
+    assert results['pairwise_precision'] == pytest.approx(pairwise_precision)
+    assert results['pairwise_recall'] == pytest.approx(pairwise_recall)
+    assert results['cluster_precision'] == pytest.approx(cluster_precision)
+    assert results['cluster_recall'] == pytest.approx(cluster_recall)
+    for metric in ['pairwise', 'cluster']:
+        precision = results[f'{metric}_precision']
+        recall = results[f'{metric}_recall']
+        expected_f1 = 2 * precision * recall / (precision + recall) if precision + recall > 0 else 0.0
+        assert results[f'{metric}_f1'] == pytest.approx(expected_f1)
+
+#----------------------------------------------------------------
+def test_singletons_and_one_cluster_bound_the_metrics():
+    singletons = evaluate_deduplication(CLUSTERINGS['all_singletons'], TRUE_LABELS)
+    one_cluster = evaluate_deduplication(CLUSTERINGS['one_cluster'], TRUE_LABELS)
+    exact = evaluate_deduplication(CLUSTERINGS['exact'], TRUE_LABELS)
+
+    assert singletons['pairwise_recall'] == 0.0
+    assert singletons['pairwise_precision'] == 1.0
+    assert singletons['exact_cluster_matches'] == 1
+    assert one_cluster['pairwise_recall'] == 1.0
+    assert one_cluster['exact_cluster_matches'] == 0
+    assert exact['pairwise_f1'] == 1.0
+    assert exact['cluster_f1'] == 1.0
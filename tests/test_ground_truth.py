@@ -0,0 +1,93 @@
+from itertools import product
+import numpy as np
+import pandas as pd
+import pytest
+from au_pollutor.ground_truth import save_ground_truth_store, GroundTruthStore
+
+# Identifiers are not contiguous, do not start at 1, and the largest one
+# does not fit in an int16
+ANIMAL_AU = pd.DataFrame({
+    'id_animal': [12, 13, 15, 16, 20, 21, 40000],
+    'id_animal_v1': [5, 7, 5, 9, 7, 5, 9],
+    'name': ['Rex', 'Tom', 'rex', 'Kit', 'Tom', 'Rexx', 'Kit']
+})
+SLOT_AU = pd.DataFrame({
+    'id_slot': [3, 4, 5]
+})
+MISSING_AU_IDS = [0, 11, 14, 17, 39999, 40001]
+
+@pytest.fixture(params=['r', None])
+def ground_truth(request, tmp_path):
+    """
+        Save the ground truth of the tiny relations and load it back,
+        memory-mapped or in memory.
+    """
+    save_ground_truth_store(
+        directory = tmp_path / 'ground_truth',
+        au_relations = {'animal': ANIMAL_AU, 'slot': SLOT_AU}
+    )
+    return GroundTruthStore(tmp_path / 'ground_truth', mmap_mode=request.param)
+
+#----------------------------------------------------------------
+def test_clean_ids_round_trip(ground_truth):
+    assert sorted(ground_truth.relations) == ['animal', 'slot']
+    np.testing.assert_array_equal(
+        ground_truth.clean_id('animal', ANIMAL_AU['id_animal']),
+        ANIMAL_AU['id_animal_v1']
+    )
+    for au_id, clean_id in zip(ANIMAL_AU['id_animal'], ANIMAL_AU['id_animal_v1']):
+        assert ground_truth.clean_id('animal', au_id) == clean_id
+    np.testing.assert_array_equal(
+        ground_truth.clean_id('slot', SLOT_AU['id_slot']),
+        SLOT_AU['id_slot']
+    )
+
+#----------------------------------------------------------------
+def test_missing_ids_map_to_minus_one(ground_truth):
+    np.testing.assert_array_equal(
+        ground_truth.clean_id('animal', MISSING_AU_IDS),
+        np.full(len(MISSING_AU_IDS), -1)
+    )
+    assert ground_truth.cluster_of('animal', 14).size == 0
+    assert ground_truth.cluster('animal', 6).size == 0
+    assert not ground_truth.same_entity('animal', 14, 14)
+    with pytest.raises(KeyError):
+        ground_truth.clean_id('owner', 1)
+
+#----------------------------------------------------------------
+def test_clusters_match_the_clean_ids(ground_truth):
+    for clean_id, group in ANIMAL_AU.groupby('id_animal_v1'):
+        expected = sorted(group['id_animal'])
+        assert sorted(ground_truth.cluster('animal', clean_id)) == expected
+        for au_id in group['id_animal']:
+            assert sorted(ground_truth.cluster_of('animal', au_id)) == expected
+
+    cluster_sizes = ground_truth.cluster_sizes('animal')
+    assert cluster_sizes.sum() == len(ANIMAL_AU)
+    assert list(cluster_sizes[[0, 2, 4]]) == [3, 2, 2]
+
+#----------------------------------------------------------------
+def test_same_entity_matches_the_pairs_of_clean_ids(ground_truth):
+    pairs = list(product(ANIMAL_AU.index, repeat=2))
+    au_ids_a = ANIMAL_AU['id_animal'].to_numpy()[[a for a, b in pairs]]
+    au_ids_b = ANIMAL_AU['id_animal'].to_numpy()[[b for a, b in pairs]]
+    expected = [
+        ANIMAL_AU.loc[a, 'id_animal_v1'] == ANIMAL_AU.loc[b, 'id_animal_v1']
+        for a, b in pairs
+    ]
+
+    np.testing.assert_array_equal(
+        ground_truth.same_entity('animal', au_ids_a, au_ids_b),
+        expected
+    )
+
+#----------------------------------------------------------------
+def test_mapping_df_round_trips(ground_truth):
+    pd.testing.assert_frame_equal(
+        ground_truth.generate_mapping_df('animal'),
+        ANIMAL_AU[['id_animal', 'id_animal_v1']]
+    )
+    pd.testing.assert_frame_equal(
+        ground_truth.generate_mapping_df('slot'),
+        SLOT_AU.assign(id_slot_v1=SLOT_AU['id_slot'])
+    )
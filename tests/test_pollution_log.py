@@ -0,0 +1,36 @@
+import pytest
+from data_pollutor.pollution_log import save_pollution_log, PollutionLog
+
+@pytest.mark.parametrize('pollution_chunk_size', [None, 7])
+@pytest.mark.parametrize('replay_chunk_size', [None, 5])
+def test_replay_rebuilds_the_polluted_relation(
+    au_relation_path, pollution_plan, pollute_file, tmp_path,
+    pollution_chunk_size, replay_chunk_size
+    ):
+    polluted_path = tmp_path / 'animal_au_dirty.csv'
+    relation_log = {}
+    pollute_file(au_relation_path, polluted_path, pollution_plan, pollution_chunk_size, relation_log)
+    save_pollution_log(
+        directory = tmp_path / 'pollution_log',
+        master_seed = 56,
+        relation_plans = {'animal': pollution_plan},
+        relation_logs = {'animal': relation_log},
+        chunk_size = pollution_chunk_size
+    )
+
+    replayed_path = tmp_path / 'animal_au_replayed.csv'
+    PollutionLog(tmp_path / 'pollution_log').replay_relation(
+        relation_name = 'animal',
+        input_path = au_relation_path,
+        output_path = replayed_path,
+        chunk_size = replay_chunk_size
+    )
+    assert replayed_path.read_bytes() == polluted_path.read_bytes()
+
+#----------------------------------------------------------------
+def test_replay_log_rejects_unknown_relations(au_relation_path, pollution_plan, pollute_file, tmp_path):
+    relation_log = {}
+    pollute_file(au_relation_path, tmp_path / 'animal_au_dirty.csv', pollution_plan, None, relation_log)
+    save_pollution_log(tmp_path, 56, {'animal': pollution_plan}, {'animal': relation_log})
+    with pytest.raises(KeyError):
+        PollutionLog(tmp_path).get_relation_steps('owner')
@@ -0,0 +1,25 @@
+import pandas as pd
+
+def test_chunked_pollution_does_not_depend_on_chunk_size(au_relation_path, pollution_plan, pollute_file, tmp_path):
+    nb_rows = len(pd.read_csv(au_relation_path))
+    outputs = []
+    # A chunk size larger than the relation reads it in a single chunk
+    for chunk_size in [1, 7, 10 * nb_rows]:
+        output_path = tmp_path / f'animal_au_dirty_{chunk_size}.csv'
+        assert pollute_file(au_relation_path, output_path, pollution_plan, chunk_size) == nb_rows
+        outputs.append(output_path.read_bytes())
+    assert outputs[0] == outputs[1] == outputs[2]
+
+#----------------------------------------------------------------
+def test_chunked_pollution_keeps_the_in_memory_layout(au_relation_path, pollution_plan, pollute_file, tmp_path):
+    pollute_file(au_relation_path, tmp_path / 'in_memory.csv', pollution_plan)
+    pollute_file(au_relation_path, tmp_path / 'chunked.csv', pollution_plan, 7)
+    in_memory = pd.read_csv(tmp_path / 'in_memory.csv', index_col=0)
+    chunked = pd.read_csv(tmp_path / 'chunked.csv', index_col=0)
+    assert list(chunked.columns) == list(in_memory.columns)
+    assert chunked.index.equals(in_memory.index)
+    # The values are polluted in both modes
+    clean = pd.read_csv(au_relation_path)
+    for polluted in [in_memory, chunked]:
+        assert (polluted['name'] != clean['name']).any()
+        assert polluted['weight'].isna().any()
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+from data_pollutor.pollution_provenance import save_pollution_provenance, PollutionProvenance
+
+@pytest.fixture(params=[None, 7])
+def provenance(request, au_relation_path, pollution_plan, pollute_file, tmp_path):
+    """
+        Pollute the tiny relation in memory and by chunks, save its
+        provenance and return it with the clean and polluted relations.
+    """
+    polluted_path = tmp_path / 'animal_au_dirty.csv'
+    relation_log = {}
+    nb_rows = pollute_file(au_relation_path, polluted_path, pollution_plan, request.param, relation_log)
+    clean = pd.read_csv(au_relation_path, dtype=str)
+    save_pollution_provenance(
+        directory = tmp_path / 'pollution_provenance',
+        relation_plans = {'animal': pollution_plan},
+        relation_logs = {'animal': relation_log},
+        relation_columns = {'animal': list(clean.columns)},
+        relation_sizes = {'animal': nb_rows}
+    )
+    polluted = pd.read_csv(polluted_path, index_col=0, dtype=str)
+    return PollutionProvenance(tmp_path / 'pollution_provenance'), clean, polluted
+
+#----------------------------------------------------------------
+def get_modified_cells(
+    clean: pd.DataFrame,
+    polluted: pd.DataFrame
+    ) -> pd.DataFrame:
+    """
+        Returns a boolean DataFrame of the cells whose value differs
+        between the clean and the polluted relations.
+    """
+    return clean.fillna('') != polluted[clean.columns].fillna('')
+
+#----------------------------------------------------------------
+def test_error_rates_match_the_diff(provenance):
+    Provenance, clean, polluted = provenance
+    expected = get_modified_cells(clean, polluted).mean()
+    error_rates = Provenance.get_error_rates('animal')
+    # No step of the plan can restore a value modified by a previous one
+    pd.testing.assert_series_equal(error_rates, expected, check_names=False)
+    assert (error_rates[['name', 'weight', 'dob']] > 0).all()
+
+#----------------------------------------------------------------
+def test_cell_steps_match_the_diff(provenance, pollution_plan):
+    Provenance, clean, polluted = provenance
+    modified_cells = get_modified_cells(clean, polluted)
+    for column in clean.columns:
+        for position in range(len(clean)):
+            steps = Provenance.get_cell_steps('animal', position, column)
+            assert (len(steps) > 0) == modified_cells.at[position, column]
+            assert all(pollution_plan[step['step']]['column'] == column for step in steps)
+            assert [step['step'] for step in steps] == sorted(step['step'] for step in steps)
+
+#----------------------------------------------------------------
+def test_cells_match_the_steps(provenance):
+    Provenance, clean, polluted = provenance
+    step_table = Provenance.get_step_table('animal')
+    cells = Provenance.get_cells('animal')
+    assert np.array_equal(
+        cells['step'].value_counts().reindex(step_table.index, fill_value=0).to_numpy(),
+        step_table['nb_cells'].to_numpy()
+    )
+    set_none_cells = Provenance.get_cells('animal', operation='set_none')
+    for row in set_none_cells.itertuples():
+        assert pd.isna(polluted.at[row.position, row.column])